@@ -0,0 +1,98 @@
+# app/api_cache.py
+import hashlib
+import json
+import os
+import time
+
+TTL_PADRAO = 3600  # segundos
+TAMANHO_BLOCO = 1 << 16
+
+def diretorio_padrao():
+    return os.getenv("CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".ccaip_user_manager", "cache")
+
+class CacheApi:
+    """
+    Cache em disco das respostas da API (template e times). Cada URL guarda o
+    corpo bruto e um arquivo de metadados com ETag/Last-Modified, usado para
+    revalidação condicional depois que o TTL expira.
+
+    As entradas são separadas por credencial (padrão: TOKEN): ao trocar de
+    token, outro tenant ou usuário não recebe o template e os times do
+    anterior. Só um resumo (hash) do token entra no nome dos arquivos.
+    """
+
+    def __init__(self, diretorio=None, ttl=None, credencial=None):
+        self.diretorio = diretorio or diretorio_padrao()
+        self.ttl = ttl if ttl is not None else float(os.getenv("CACHE_TTL_SECONDS") or TTL_PADRAO)
+        credencial = credencial if credencial is not None else os.getenv("TOKEN") or ""
+        self._credencial = hashlib.sha256(credencial.encode('utf-8')).hexdigest()[:8]
+        os.makedirs(self.diretorio, exist_ok=True)
+
+    def _base(self, url_key, url):
+        resumo = hashlib.sha1(url.encode('utf-8')).hexdigest()[:12]
+        return os.path.join(self.diretorio, f"{url_key}_{self._credencial}_{resumo}")
+
+    def metadados(self, url_key, url):
+        """Metadados da entrada (ou None se não houver cache válido para a URL)."""
+        base = self._base(url_key, url)
+        try:
+            with open(base + ".meta.json", encoding='utf-8') as f:
+                meta = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if meta.get('url') != url or not os.path.exists(base + ".json"):
+            return None
+        return meta
+
+    def fresco(self, meta):
+        return meta is not None and time.time() - meta.get('salvo_em', 0) < self.ttl
+
+    def cabecalhos_condicionais(self, meta):
+        headers = {}
+        if meta and meta.get('etag'): headers['If-None-Match'] = meta['etag']
+        if meta and meta.get('last_modified'): headers['If-Modified-Since'] = meta['last_modified']
+        return headers
+
+    def ler(self, url_key, url):
+        """Gera o corpo guardado em blocos de bytes."""
+        with open(self._base(url_key, url) + ".json", 'rb') as f:
+            while True:
+                bloco = f.read(TAMANHO_BLOCO)
+                if not bloco: return
+                yield bloco
+
+    def _gravar_meta(self, url_key, url, meta):
+        caminho = self._base(url_key, url) + ".meta.json"
+        with open(caminho + ".tmp", 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(caminho + ".tmp", caminho)
+
+    def gravar(self, url_key, url, headers, links, blocos):
+        """
+        Repassa os blocos recebidos enquanto grava o corpo em disco. A entrada só é
+        publicada quando o corpo foi lido até o fim.
+        """
+        caminho = self._base(url_key, url) + ".json"
+        completo = False
+        try:
+            with open(caminho + ".tmp", 'wb') as f:
+                for bloco in blocos:
+                    f.write(bloco)
+                    yield bloco
+            os.replace(caminho + ".tmp", caminho)
+            completo = True
+            self._gravar_meta(url_key, url, {
+                'url': url, 'salvo_em': time.time(),
+                'etag': headers.get('ETag'), 'last_modified': headers.get('Last-Modified'),
+                'links': links or {},
+            })
+        finally:
+            if not completo and os.path.exists(caminho + ".tmp"):
+                os.remove(caminho + ".tmp")
+
+    def renovar(self, url_key, url, meta, headers):
+        """Após um 304, reinicia o TTL (e atualiza o ETag, se o servidor mandou um novo)."""
+        meta = dict(meta, salvo_em=time.time())
+        if headers.get('ETag'): meta['etag'] = headers['ETag']
+        if headers.get('Last-Modified'): meta['last_modified'] = headers['Last-Modified']
+        self._gravar_meta(url_key, url, meta)
@@ -0,0 +1,170 @@
+# app/api_client.py
+import json
+import os
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from .logic.perfil import PERFIL
+from .logic.json_stream import LeitorListaJson, proxima_pagina, CHAVES_LISTA
+
+# Tempo, tamanho e origem ('rede', 'cache' ou 'revalidado') de cada requisição feita pelo cliente
+Medicao = namedtuple('Medicao', ['url_key', 'segundos', 'bytes', 'status', 'origem'], defaults=('rede',))
+
+TAMANHO_BLOCO_DOWNLOAD = 1 << 16
+LIMITE_PAGINAS = 10000
+
+def extrair_lista(api_response):
+    """Extrai a lista de dados de uma resposta da API (lista pura ou dict com 'data'/'agents'/'teams')."""
+    if isinstance(api_response, list):
+        return api_response
+    if isinstance(api_response, dict):
+        for key in CHAVES_LISTA:
+            if key in api_response and isinstance(api_response[key], list):
+                return api_response[key]
+    return []
+
+class ApiClient:
+    """
+    Cliente HTTP reutilizável para as APIs da plataforma: lê o .env uma única vez,
+    reaproveita conexões com uma requests.Session e repete falhas transitórias
+    com backoff exponencial. Com um CacheApi, as leituras (buscar/iterar) usam o
+    cache em disco enquanto o TTL vale e depois revalidam com ETag/Last-Modified;
+    em modo offline, só o cache é usado.
+    """
+
+    def __init__(self, timeout=20, tentativas=3, backoff=0.5, conexoes=4, cache=None, offline=None):
+        load_dotenv()
+        self.token = os.getenv("TOKEN")
+        self.timeout = timeout
+        self.cache = cache
+        self.offline = offline if offline is not None else os.getenv("OFFLINE_MODE", "").lower() in ("1", "true", "sim")
+        self.medicoes = []
+
+        retry = Retry(total=tentativas, backoff_factor=backoff, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=frozenset(['GET']), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=conexoes, pool_maxsize=conexoes, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+    def url(self, url_key):
+        target_url = os.getenv(url_key)
+        if self.offline and target_url:
+            return target_url
+        if not target_url or not self.token:
+            raise ValueError(f"Variável {url_key} ou TOKEN não encontrada no .env")
+        return target_url
+
+    def headers(self):
+        return {'Authorization': f'Basic {self.token}'}
+
+    def sessao_envio(self, conexoes):
+        """
+        Sessão para as escritas (envio de usuários): 'conexoes' conexões por host
+        e sem repetição automática, porque o envio controla as próprias tentativas.
+        """
+        sessao = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=conexoes, max_retries=0)
+        sessao.mount('https://', adapter)
+        sessao.mount('http://', adapter)
+        sessao.headers.update(self.headers())
+        return sessao
+
+    def get(self, url_key, target_url=None, **kwargs):
+        """GET na URL configurada em 'url_key', registrando o tempo da requisição."""
+        target_url = target_url or self.url(url_key)
+        inicio = time.perf_counter()
+        response = self.session.get(target_url, headers=self.headers(), timeout=self.timeout, **kwargs)
+        if not kwargs.get('stream'):  # em streaming, quem consome o corpo registra a medição
+            self._registrar(Medicao(url_key, time.perf_counter() - inicio, len(response.content), response.status_code), inicio)
+        response.raise_for_status()
+        return response
+
+    def _blocos(self, url_key, target_url, forcar, info):
+        """
+        Gera o corpo da resposta em blocos de bytes, vindo do cache (se ainda fresco,
+        ou em modo offline), de uma revalidação 304 ou da rede. 'info' recebe os
+        links de paginação da resposta.
+        """
+        inicio, recebidos, response = time.perf_counter(), 0, None
+        meta = self.cache.metadados(url_key, target_url) if self.cache else None
+        status = 200
+        if meta and (self.offline or (not forcar and self.cache.fresco(meta))):
+            origem, fonte, info['links'] = 'cache', self.cache.ler(url_key, target_url), meta.get('links', {})
+        elif self.offline:
+            raise ValueError(f"Modo offline: não há dados em cache para {url_key}.")
+        else:
+            headers = self.headers()
+            if meta: headers.update(self.cache.cabecalhos_condicionais(meta))
+            response = self.session.get(target_url, headers=headers, timeout=self.timeout, stream=True)
+            status = response.status_code
+            if status == 304 and meta:
+                response.close()
+                self.cache.renovar(url_key, target_url, meta, response.headers)
+                origem, fonte, info['links'] = 'revalidado', self.cache.ler(url_key, target_url), meta.get('links', {})
+            else:
+                try:
+                    response.raise_for_status()
+                except Exception:
+                    response.close(); raise
+                origem, fonte, info['links'] = 'rede', response.iter_content(TAMANHO_BLOCO_DOWNLOAD), response.links
+                if self.cache:
+                    fonte = self.cache.gravar(url_key, target_url, response.headers, response.links, fonte)
+        try:
+            for bloco in fonte:
+                recebidos += len(bloco)
+                yield bloco
+        finally:
+            if response is not None: response.close()
+        self._registrar(Medicao(url_key, time.perf_counter() - inicio, recebidos, status, origem), inicio)
+
+    def _registrar(self, medicao, inicio):
+        self.medicoes.append(medicao)
+        PERFIL.registrar(medicao.url_key, inicio, medicao.segundos, itens=1, categoria='api',
+                         bytes=medicao.bytes, status=medicao.status, origem=medicao.origem)
+
+    def iterar(self, url_key, forcar=False):
+        """
+        Gera os itens de um endpoint com download em streaming e parse incremental,
+        seguindo a paginação (cabeçalho Link ou campo 'next' no corpo), se houver.
+        'forcar' ignora o TTL do cache e revalida com a plataforma.
+        """
+        target_url = self.url(url_key)
+        visitadas = set()
+        while target_url and target_url not in visitadas and len(visitadas) < LIMITE_PAGINAS:
+            visitadas.add(target_url)
+            info = {}
+            blocos = self._blocos(url_key, target_url, forcar, info)
+            leitor = LeitorListaJson(blocos)
+            yield from leitor.itens()
+            for _ in blocos: pass  # consome o restante para concluir o cache e a medição
+            target_url = proxima_pagina(target_url, leitor.metadados, info.get('links'))
+
+    def buscar(self, url_key, forcar=False):
+        """Busca a lista de dados de um endpoint."""
+        corpo = b"".join(self._blocos(url_key, self.url(url_key), forcar, {}))
+        return extrair_lista(json.loads(corpo))
+
+    def buscar_varios(self, url_keys, buscar=None):
+        """
+        Busca vários endpoints independentes em paralelo. Gera (url_key, dados, erro)
+        na ordem em que as respostas chegam. 'buscar' permite trocar a função usada
+        por endpoint (padrão: self.buscar).
+        """
+        buscar = buscar or self.buscar
+        with ThreadPoolExecutor(max_workers=max(len(url_keys), 1)) as executor:
+            tarefas = {executor.submit(buscar, url_key): url_key for url_key in url_keys}
+            for tarefa in as_completed(tarefas):
+                try:
+                    yield tarefas[tarefa], tarefa.result(), None
+                except Exception as e:
+                    yield tarefas[tarefa], None, e
+
+    def close(self):
+        self.session.close()
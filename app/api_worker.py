@@ -1,52 +1,102 @@
 # app/api_worker.py
-import os
-import requests
-from dotenv import load_dotenv
 from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
 
+from .logic.indice_times import construir_indice_times
+
 class ApiWorker(QObject):
     """Worker que vive em uma thread e executa chamadas de API sob demanda."""
     success = pyqtSignal(list, str)
     error = pyqtSignal(str)
+    request_timed = pyqtSignal(str, float, int)  # url_key, segundos, bytes
+    teams_indexed = pyqtSignal(object)  # IndiceTimes montado em streaming
+    cache_status = pyqtSignal(str, str)  # url_key, origem ('cache', 'revalidado' ou 'rede')
 
     def __init__(self):
         super().__init__()
+        self.client = None
+        self.offline = None
+
+    def _client(self):
+        # Criado na primeira chamada, já dentro da thread do worker (requests também é importado nela)
+        if self.client is None:
+            from .api_client import ApiClient
+            from .api_cache import CacheApi
+
+            self.client = ApiClient(cache=CacheApi(), offline=self.offline)
+        return self.client
+
+    @pyqtSlot(bool)
+    def set_offline(self, offline):
+        """Liga/desliga o modo offline (somente dados do cache local)."""
+        self.offline = offline
+        if self.client is not None:
+            self.client.offline = offline
+
+    def _emitir_medicoes(self, inicio, fim=None):
+        for medicao in self.client.medicoes[inicio:fim]:
+            self.request_timed.emit(medicao.url_key, medicao.segundos, medicao.bytes)
+            self.cache_status.emit(medicao.url_key, medicao.origem)
+
+    def _buscar(self, url_key, data_type, forcar=False):
+        # A lista de times pode ter centenas de MB: é indexada em streaming, sem guardar o payload
+        if data_type == 'teams':
+            return construir_indice_times(self.client.iterar(url_key, forcar=forcar))
+        return self.client.buscar(url_key, forcar=forcar)
+
+    def _entregar(self, url_key, data_type, data_list):
+        if data_type == 'teams':
+            self.teams_indexed.emit(data_list); return
+        if data_type == 'template' and not data_list:
+            raise ValueError("A resposta do template não é uma lista válida ou está vazia.")
+        self.success.emit(data_list, data_type)
+
+    def _emitir_erro(self, url_key, e):
+        import requests
+        if isinstance(e, requests.exceptions.Timeout):
+            self.error.emit(f"Erro de Timeout: A API ({url_key}) demorou muito para responder.")
+        elif isinstance(e, requests.exceptions.RequestException):
+            self.error.emit(f"Erro de rede ou na API ({url_key}): {e}")
+        else:
+            self.error.emit(f"Ocorreu um erro inesperado ({url_key}): {e}")
 
     @pyqtSlot(str, str)
     def start_job(self, url_key, data_type):
         """Este slot é chamado para iniciar uma nova chamada de API."""
         try:
-            load_dotenv()
-            target_url = os.getenv(url_key)
-            TOKEN = os.getenv("TOKEN")
-
-            if not target_url or not TOKEN:
-                raise ValueError(f"Variável {url_key} ou TOKEN não encontrada no .env")
-
-            headers = {'Authorization': f'Basic {TOKEN}'}
-            response = requests.get(target_url, headers=headers, timeout=20)
-            response.raise_for_status()
-            
-            api_response = response.json()
-            
-            data_list = []
-            if isinstance(api_response, list):
-                data_list = api_response
-            elif isinstance(api_response, dict):
-                possible_keys = ['data', 'agents', 'teams']
-                for key in possible_keys:
-                    if key in api_response and isinstance(api_response[key], list):
-                        data_list = api_response[key]
-                        break
-            
-            if data_type == 'template' and not data_list:
-                raise ValueError("A resposta do template não é uma lista válida ou está vazia.")
-
-            self.success.emit(data_list, data_type)
-
-        except requests.exceptions.Timeout:
-            self.error.emit(f"Erro de Timeout: A API ({url_key}) demorou muito para responder.")
-        except requests.exceptions.RequestException as e:
-            self.error.emit(f"Erro de rede ou na API ({url_key}): {e}")
+            client = self._client()
+            inicio = len(client.medicoes)
+            try:
+                data_list = self._buscar(url_key, data_type)
+            finally:
+                self._emitir_medicoes(inicio)
+            self._entregar(url_key, data_type, data_list)
+        except Exception as e:
+            self._emitir_erro(url_key, e)
+
+    @pyqtSlot(list)
+    def start_batch(self, jobs):
+        """Executa várias chamadas independentes em paralelo. 'jobs' é uma lista de (url_key, data_type)."""
+        self._executar_lote(jobs, forcar=False)
+
+    @pyqtSlot(list)
+    def start_refresh(self, jobs):
+        """Como start_batch, mas ignora o TTL do cache e revalida tudo com a plataforma."""
+        self._executar_lote(jobs, forcar=True)
+
+    def _executar_lote(self, jobs, forcar):
+        try:
+            client = self._client()
         except Exception as e:
-            self.error.emit(f"Ocorreu um erro inesperado ({url_key}): {e}")
\ No newline at end of file
+            self._emitir_erro(jobs[0][0] if jobs else "", e); return
+        tipos = dict(jobs)
+        inicio = len(client.medicoes)
+        buscar = lambda url_key: self._buscar(url_key, tipos[url_key], forcar)
+        for url_key, data_list, erro in client.buscar_varios(list(tipos), buscar):
+            fim = len(client.medicoes)
+            self._emitir_medicoes(inicio, fim)
+            inicio = fim
+            try:
+                if erro: raise erro
+                self._entregar(url_key, tipos[url_key], data_list)
+            except Exception as e:
+                self._emitir_erro(url_key, e)
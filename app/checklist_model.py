@@ -0,0 +1,118 @@
+# app/checklist_model.py
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, pyqtSignal
+
+from .logic.indice_plataforma import normalizar_nome
+
+
+class ChecklistModel(QAbstractListModel):
+    """
+    Lista marcável dos times ou cargos do template para o formulário, exibida
+    em uma QTreeView plana com linhas de altura uniforme (só as linhas visíveis
+    são desenhadas). Não use QListView: ela refaz o layout de todas as linhas
+    a cada dataChanged, o que trava a troca de usuário com milhares de times.
+
+    O estado é um bitset com um bit por nome (linha); ao trocar de usuário, só
+    as linhas do XOR entre o estado antigo e o novo são avisadas à view.
+
+    Nomes repetidos no template viram uma linha só, como no antigo mapa de
+    checkboxes. O filtro de texto (sem acentos e sem diferença de maiúsculas)
+    esconde linhas sem mudar o que está marcado.
+    """
+    marcados_alterados = pyqtSignal(int)
+
+    def __init__(self, molde, grupo, parent=None):
+        super().__init__(parent)
+        self.grupo = grupo
+        nomes_template = molde.nomes.get(grupo, ())
+        self._nomes = list(dict.fromkeys(nomes_template))
+        self._chaves = [normalizar_nome(nome) for nome in self._nomes]
+        # Sem nomes repetidos, o bit da linha é o mesmo da posição no template
+        self._direto = len(self._nomes) == len(nomes_template)
+        self._linha_do_nome = {nome: linha for linha, nome in enumerate(self._nomes)}
+        self._marcados = 0
+        self._visiveis = None
+        self._linha_visivel = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid(): return 0
+        return len(self._nomes) if self._visiveis is None else len(self._visiveis)
+
+    def _linha(self, indice):
+        return indice.row() if self._visiveis is None else self._visiveis[indice.row()]
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < self.rowCount():
+            return None
+        linha = self._linha(index)
+        if role == Qt.DisplayRole:
+            return str(self._nomes[linha])
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self._marcados >> linha & 1 else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        if not index.isValid(): return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable | Qt.ItemIsUserCheckable
+
+    def setData(self, index, value, role=Qt.EditRole):
+        if role != Qt.CheckStateRole or not index.isValid(): return False
+        linha = self._linha(index)
+        if value == Qt.Checked:
+            self._marcados |= 1 << linha
+        else:
+            self._marcados &= ~(1 << linha)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+        self.marcados_alterados.emit(self.total_marcados())
+        return True
+
+    # --- Estado ---
+
+    def _bits_do_usuario(self, usuario):
+        if self._direto:
+            return usuario.bits_ativos(self.grupo)
+        bits = 0
+        for nome in usuario.ativos(self.grupo):
+            bits |= 1 << self._linha_do_nome[nome]
+        return bits
+
+    def definir_marcados(self, bits):
+        """Troca o estado, avisando só as linhas (visíveis) que mudaram."""
+        diferenca, self._marcados = self._marcados ^ bits, bits
+        while diferenca:
+            linha = (diferenca & -diferenca).bit_length() - 1
+            diferenca &= diferenca - 1
+            linha_modelo = linha if self._linha_visivel is None else self._linha_visivel.get(linha)
+            if linha_modelo is not None:
+                indice = self.index(linha_modelo)
+                self.dataChanged.emit(indice, indice, [Qt.CheckStateRole])
+        self.marcados_alterados.emit(self.total_marcados())
+
+    def marcar_do_usuario(self, usuario):
+        self.definir_marcados(self._bits_do_usuario(usuario))
+
+    def limpar(self):
+        self.definir_marcados(0)
+
+    def total_marcados(self):
+        return bin(self._marcados).count('1')
+
+    def valores(self):
+        """{nome: marcado} de todos os nomes, no formato de RegistroUsuario.definir_itens."""
+        return {nome: bool(self._marcados >> linha & 1) for linha, nome in enumerate(self._nomes)}
+
+    def __len__(self):
+        return len(self._nomes)
+
+    # --- Filtro ---
+
+    def filtrar(self, texto):
+        """Mostra só os nomes que contêm o texto. Retorna quantos ficaram visíveis."""
+        chave = normalizar_nome(texto)
+        self.beginResetModel()
+        if chave:
+            self._visiveis = [linha for linha, nome in enumerate(self._chaves) if chave in nome]
+            self._linha_visivel = {linha: posicao for posicao, linha in enumerate(self._visiveis)}
+        else:
+            self._visiveis = self._linha_visivel = None
+        self.endResetModel()
+        return self.rowCount()
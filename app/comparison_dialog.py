@@ -0,0 +1,142 @@
+# app/comparison_dialog.py
+from PyQt5.QtCore import QAbstractTableModel, QModelIndex, Qt
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableView, QComboBox,
+                             QLineEdit, QHeaderView, QFileDialog, QMessageBox)
+
+from .logic.comparacao import ROTULOS_CAMPOS, contar_situacoes, salvar_diferencas_csv, texto_campo
+
+TAMANHO_PAGINA = 500
+ROTULOS_SITUACAO = {'alterado': "✏️ Alterado", 'adicionado': "➕ Adicionado", 'removido': "➖ Removido"}
+COLUNAS = ["Situação", "Email", "Nome", "Campos alterados", "Atual", "Nova planilha"]
+
+
+class DiferencasModel(QAbstractTableModel):
+    """Uma página das diferenças filtradas; o texto das colunas é montado só para as linhas visíveis."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._linhas = []
+
+    def definir_linhas(self, linhas):
+        self.beginResetModel()
+        self._linhas = linhas
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(COLUNAS)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return COLUNAS[section]
+        return super().headerData(section, orientation, role)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.ToolTipRole):
+            return None
+        diferenca = self._linhas[index.row()]
+        coluna = index.column()
+        if coluna == 0: return ROTULOS_SITUACAO[diferenca.situacao]
+        if coluna == 1: return diferenca.email
+        if coluna == 2: return diferenca.nome
+        if coluna == 3: return ", ".join(ROTULOS_CAMPOS[campo] for campo in diferenca.campos)
+        usuario = diferenca.atual if coluna == 4 else diferenca.novo
+        if usuario is None: return ""
+        return "; ".join(f"{ROTULOS_CAMPOS[campo]}: {texto_campo(usuario, campo)}" for campo in diferenca.campos)
+
+
+class ComparisonDialog(QDialog):
+    """Resultado da comparação com outra planilha: filtros por situação, campo e texto, em páginas."""
+
+    def __init__(self, resultado, parent=None):
+        super().__init__(parent)
+        self.resultado = resultado
+        self.filtradas = resultado.diferencas
+        self.pagina = 0
+        self.setWindowTitle("Relatório de Comparação")
+        self.resize(1000, 560)
+
+        layout = QVBoxLayout(self)
+        contagem = contar_situacoes(resultado)
+        resumo = (f"👥 Em comum: {resultado.em_comum}   ✏️ Alterados: {contagem['alterado']}   "
+                  f"➕ Adicionados: {contagem['adicionado']}   ➖ Removidos: {contagem['removido']}")
+        if resultado.duplicados: resumo += f"   ⚠️ Emails repetidos ignorados: {resultado.duplicados}"
+        layout.addWidget(QLabel(resumo))
+        if resultado.campos:
+            layout.addWidget(QLabel("Campos comparados: " + ", ".join(ROTULOS_CAMPOS[c] for c in resultado.campos)))
+
+        filtros = QHBoxLayout()
+        self.situacao_combo = QComboBox()
+        self.situacao_combo.addItem("Todas as situações", None)
+        for situacao, rotulo in ROTULOS_SITUACAO.items():
+            self.situacao_combo.addItem(rotulo, situacao)
+        self.campo_combo = QComboBox()
+        self.campo_combo.addItem("Qualquer campo", None)
+        for campo in resultado.campos:
+            self.campo_combo.addItem(ROTULOS_CAMPOS[campo], campo)
+        self.texto_filtro = QLineEdit(); self.texto_filtro.setPlaceholderText("Filtrar por email ou nome...")
+        filtros.addWidget(self.situacao_combo); filtros.addWidget(self.campo_combo); filtros.addWidget(self.texto_filtro)
+        layout.addLayout(filtros)
+
+        self.model = DiferencasModel(self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setWordWrap(False)
+        layout.addWidget(self.table)
+
+        navegacao = QHBoxLayout()
+        self.anterior_button = QPushButton("◀ Anterior")
+        self.pagina_label = QLabel()
+        self.proxima_button = QPushButton("Próxima ▶")
+        self.export_button = QPushButton("💾 Exportar CSV")
+        self.close_button = QPushButton("Fechar")
+        navegacao.addWidget(self.anterior_button); navegacao.addWidget(self.pagina_label); navegacao.addWidget(self.proxima_button)
+        navegacao.addStretch()
+        navegacao.addWidget(self.export_button); navegacao.addWidget(self.close_button)
+        layout.addLayout(navegacao)
+
+        self.situacao_combo.currentIndexChanged.connect(self.aplicar_filtros)
+        self.campo_combo.currentIndexChanged.connect(self.aplicar_filtros)
+        self.texto_filtro.textChanged.connect(self.aplicar_filtros)
+        self.anterior_button.clicked.connect(lambda: self.mostrar_pagina(self.pagina - 1))
+        self.proxima_button.clicked.connect(lambda: self.mostrar_pagina(self.pagina + 1))
+        self.export_button.clicked.connect(self.exportar_csv)
+        self.close_button.clicked.connect(self.accept)
+        self.mostrar_pagina(0)
+
+    def aplicar_filtros(self):
+        situacao = self.situacao_combo.currentData()
+        campo = self.campo_combo.currentData()
+        texto = self.texto_filtro.text().strip().casefold()
+        self.filtradas = [
+            d for d in self.resultado.diferencas
+            if (situacao is None or d.situacao == situacao) and (campo is None or campo in d.campos)
+            and (not texto or texto in d.email.casefold() or texto in d.nome.casefold())
+        ]
+        self.mostrar_pagina(0)
+
+    def total_paginas(self):
+        return max(-(-len(self.filtradas) // TAMANHO_PAGINA), 1)
+
+    def mostrar_pagina(self, pagina):
+        self.pagina = min(max(pagina, 0), self.total_paginas() - 1)
+        inicio = self.pagina * TAMANHO_PAGINA
+        self.model.definir_linhas(self.filtradas[inicio:inicio + TAMANHO_PAGINA])
+        self.pagina_label.setText(f"Página {self.pagina + 1} de {self.total_paginas()} ({len(self.filtradas)} diferenças)")
+        self.anterior_button.setEnabled(self.pagina > 0)
+        self.proxima_button.setEnabled(self.pagina < self.total_paginas() - 1)
+        self.export_button.setEnabled(bool(self.filtradas))
+
+    def exportar_csv(self):
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar Diferenças", "comparacao.csv", "CSV Files (*.csv)")
+        if not caminho: return
+        try:
+            total = salvar_diferencas_csv(self.filtradas, self.resultado.campos, caminho)
+            QMessageBox.information(self, "Diferenças Exportadas", f"{total} diferenças salvas em '{caminho}'.")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro ao Exportar", f"Não foi possível salvar o arquivo: {e}")
@@ -0,0 +1,66 @@
+# app/diagnostics_dialog.py
+from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QPushButton, QLabel, QTableWidget,
+                             QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox)
+
+COLUNAS = ["Etapa", "Tipo", "Chamadas", "Tempo (s)", "Itens", "Itens/s", "Bytes", "RSS no fim (MB)",
+           "Aumento do pico (MB)", "Pico do processo (MB)"]
+
+class DiagnosticsDialog(QDialog):
+    """Mostra o resumo das medições por etapa e permite exportar o trace completo."""
+
+    def __init__(self, perfil, parent=None):
+        super().__init__(parent)
+        self.perfil = perfil
+        self.setWindowTitle("Diagnóstico de Desempenho")
+        self.resize(1000, 420)
+
+        layout = QVBoxLayout(self)
+        self.info_label = QLabel()
+        layout.addWidget(self.info_label)
+        self.table = QTableWidget(0, len(COLUNAS))
+        self.table.setHorizontalHeaderLabels(COLUNAS)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        layout.addWidget(self.table)
+
+        buttons = QHBoxLayout()
+        self.export_button = QPushButton("💾 Exportar Trace (Chrome/Perfetto)")
+        self.clear_button = QPushButton("🧹 Limpar Medições")
+        self.close_button = QPushButton("Fechar")
+        for button in (self.export_button, self.clear_button, self.close_button):
+            buttons.addWidget(button)
+        layout.addLayout(buttons)
+
+        self.export_button.clicked.connect(self.exportar_trace)
+        self.clear_button.clicked.connect(self.limpar)
+        self.close_button.clicked.connect(self.accept)
+        self.atualizar()
+
+    def atualizar(self):
+        resumo = self.perfil.resumo()
+        estado = "ligada" if self.perfil.ativo else "desligada (marque 'Medir desempenho' para coletar)"
+        self.info_label.setText(f"Medição {estado}. {len(self.perfil.eventos())} eventos registrados.")
+        self.table.setRowCount(len(resumo))
+        for linha, etapa in enumerate(resumo):
+            valores = [
+                etapa['nome'], etapa['categoria'], str(etapa['chamadas']), f"{etapa['segundos']:.3f}",
+                str(etapa['itens']), f"{etapa['itens_por_segundo']:.0f}" if etapa['itens_por_segundo'] else "",
+                str(etapa['bytes']) if etapa['bytes'] else "",
+            ] + [f"{etapa[campo] / 2**20:.1f}" if etapa[campo] is not None else ""
+                 for campo in ('rss_fim', 'pico_aumento', 'rss_pico_processo')]
+            for coluna, valor in enumerate(valores):
+                self.table.setItem(linha, coluna, QTableWidgetItem(valor))
+        self.export_button.setEnabled(bool(resumo))
+
+    def exportar_trace(self):
+        caminho, _ = QFileDialog.getSaveFileName(self, "Exportar Trace", "trace_ccaip.json", "Trace JSON (*.json)")
+        if not caminho: return
+        try:
+            total = self.perfil.exportar_trace(caminho)
+            QMessageBox.information(self, "Trace Exportado", f"{total} eventos salvos em '{caminho}'.\nAbra em chrome://tracing ou ui.perfetto.dev.")
+        except Exception as e:
+            QMessageBox.critical(self, "Erro ao Exportar", f"Não foi possível salvar o trace: {e}")
+
+    def limpar(self):
+        self.perfil.limpar()
+        self.atualizar()
@@ -0,0 +1,30 @@
+# app/export_worker.py
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+class ExportWorker(QObject):
+    """Worker que vive em uma thread e grava as exportações em blocos, sem travar a interface."""
+    progress = pyqtSignal(int, int)     # usuários escritos, total
+    finished = pyqtSignal(str, object)  # caminho, ResumoExportacao
+    error = pyqtSignal(str)
+
+    @pyqtSlot(object, object, str)
+    def start_csv(self, usuarios, template_usuario, caminho):
+        """Este slot é chamado para salvar o CSV de importação."""
+        from .logic.exportacao import salvar_csv
+
+        try:
+            resumo = salvar_csv(usuarios, template_usuario, caminho, progresso=self.progress.emit)
+            self.finished.emit(caminho, resumo)
+        except Exception as e:
+            self.error.emit(f"Não foi possível salvar o arquivo:\n{e}")
+
+    @pyqtSlot(object, str, str)
+    def start_json(self, usuarios, caminho, formato):
+        """Este slot é chamado para salvar a sessão em JSON ('indentado', 'compacto' ou 'jsonl')."""
+        from .logic.exportacao import salvar_json
+
+        try:
+            resumo = salvar_json(usuarios, caminho, formato, progresso=self.progress.emit)
+            self.finished.emit(caminho, resumo)
+        except Exception as e:
+            self.error.emit(f"Não foi possível salvar o arquivo: {e}")
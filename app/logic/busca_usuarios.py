@@ -0,0 +1,171 @@
+# app/logic/busca_usuarios.py
+import re
+from bisect import bisect_left, insort
+from functools import lru_cache
+from itertools import chain
+
+from .indice_plataforma import normalizar_nome
+
+# Campo de busca -> código que prefixa os tokens do campo no índice ('time' é resolvido pela MatrizMembros)
+CAMPOS_BUSCA = {'nome': 'n', 'email': 'e', 'matricula': 'a', 'ramal': 'r', 'time': None}
+SITUACOES_BUSCA = ('novos', 'existentes')
+
+_TOKEN = re.compile(r'\w+')
+_FIM_PREFIXO = '\U0010ffff'
+# Acima disso, os tokens novos de um lote entram com uma nova ordenação em vez de um a um
+_LIMITE_INSERCAO = 256
+
+
+@lru_cache(maxsize=65536)
+def tokens_texto(texto):
+    """Tokens de busca de um texto: palavras sem acentos e sem diferença de maiúsculas."""
+    return tuple(_TOKEN.findall(normalizar_nome(texto)))
+
+@lru_cache(maxsize=65536)
+def _chaves_texto(codigo, texto):
+    # Nomes e times se repetem muito: o cache também faz os usuários compartilharem as mesmas strings de chave
+    return tuple(codigo + token for token in tokens_texto(texto))
+
+def _chaves_unicas(codigo, valor):
+    # Email, matrícula e ramal quase nunca se repetem: sem cache, com atalho para texto ASCII
+    if valor is None: return ()
+    texto = str(valor)
+    tokens = _TOKEN.findall(texto.lower()) if texto.isascii() else tokens_texto(texto)
+    return [codigo + token for token in tokens]
+
+def _texto(valor):
+    return "" if valor is None else str(valor)
+
+
+class IndiceBusca:
+    """
+    Índice invertido da lista de usuários para a busca da interface. Cada token
+    (de nome, email, matrícula e ramal) aponta para as posições dos usuários em
+    'dados_usuarios'; os tokens ficam também em uma lista ordenada, então a
+    busca por prefixo é um intervalo achado por bisseção. Os times não entram no
+    índice: o termo é casado com os nomes dos times do template e as posições
+    saem da MatrizMembros, que já acompanha as alterações em massa.
+
+    Cada termo da busca tem de ser prefixo de algum token do usuário (E entre os
+    termos). anexar/atualizar mantêm o índice em dia sem reconstruí-lo.
+    """
+
+    def __init__(self, usuarios=()):
+        self._postagens = {}
+        self._ordenados = []
+        self._por_linha = []
+        self._novos = bytearray()
+        self.anexar(usuarios)
+
+    def __len__(self):
+        return len(self._por_linha)
+
+    @staticmethod
+    def valores_usuario(usuario):
+        """Campos indexados do usuário (nome, sobrenome, email, matrícula, ramal)."""
+        return (usuario.get('first_name'), usuario.get('last_name'), usuario.get('email'),
+                usuario.get('agent_number'), usuario.get('extension_number'))
+
+    @staticmethod
+    def chaves(valores):
+        """Chaves (código do campo + token) pelas quais o usuário com esses valores é encontrado."""
+        nome, sobrenome, email, agente, ramal = valores
+        return set(chain(
+            _chaves_texto('n', _texto(nome)), _chaves_texto('n', _texto(sobrenome)),
+            _chaves_unicas('e', email), _chaves_unicas('a', agente), _chaves_unicas('r', ramal)))
+
+    def _incluir(self, chaves, posicao):
+        """Acrescenta a posição às postagens das chaves; devolve as chaves que ainda não existiam."""
+        novas = []
+        for chave in chaves:
+            postagem = self._postagens.get(chave)
+            if postagem is None:
+                # Chave de um usuário só (email, matrícula): guarda a posição sem lista
+                self._postagens[chave] = posicao
+                novas.append(chave)
+            elif type(postagem) is int:
+                self._postagens[chave] = [postagem, posicao]
+            else:
+                postagem.append(posicao)
+        return novas
+
+    def _retirar(self, chave, posicao):
+        postagem = self._postagens[chave]
+        if type(postagem) is int:
+            del self._postagens[chave]
+            del self._ordenados[bisect_left(self._ordenados, chave)]
+            return
+        postagem.remove(posicao)
+        if len(postagem) == 1:
+            self._postagens[chave] = postagem[0]
+
+    def _ordenar(self, novas):
+        if len(novas) > _LIMITE_INSERCAO:
+            # O Timsort aproveita a parte já ordenada e só intercala as chaves novas
+            self._ordenados += novas
+            self._ordenados.sort()
+        else:
+            for chave in novas:
+                insort(self._ordenados, chave)
+
+    def anexar(self, usuarios):
+        """Indexa usuários acrescentados ao fim da lista."""
+        novas = []
+        for usuario in usuarios:
+            # Guarda os valores (as mesmas strings do registro), não as chaves: as antigas são recalculadas em atualizar
+            posicao, valores = len(self._por_linha), self.valores_usuario(usuario)
+            self._por_linha.append(valores)
+            self._novos.append(bool(usuario.get('is_new', True)))
+            novas += self._incluir(self.chaves(valores), posicao)
+        self._ordenar(novas)
+
+    def atualizar(self, posicao, usuario):
+        """Reindexa um usuário alterado; só as chaves que mudaram são mexidas."""
+        valores = self.valores_usuario(usuario)
+        antigas, chaves = self.chaves(self._por_linha[posicao]), self.chaves(valores)
+        for chave in antigas - chaves:
+            self._retirar(chave, posicao)
+        self._ordenar(self._incluir(chaves - antigas, posicao))
+        self._por_linha[posicao] = valores
+        self._novos[posicao] = bool(usuario.get('is_new', True))
+
+    def _com_prefixo(self, termo, codigos, membros=None):
+        """Posições (ordenadas, sem repetição) com algum token começando por 'termo' nos campos dados."""
+        import numpy as np
+        avulsas, listas = [], []
+        if membros is not None:
+            times = {nome for nome in membros.molde.nomes.get(membros.grupo, ())
+                     if any(token.startswith(termo) for token in tokens_texto(_texto(nome)))}
+            if times: listas.append(membros.linhas_com(times))
+        for codigo in codigos:
+            inicio = bisect_left(self._ordenados, codigo + termo)
+            fim = bisect_left(self._ordenados, codigo + termo + _FIM_PREFIXO, inicio)
+            for chave in self._ordenados[inicio:fim]:
+                postagem = self._postagens[chave]
+                (avulsas.append if type(postagem) is int else listas.append)(postagem)
+        if not avulsas and len(listas) == 1:
+            return np.sort(np.asarray(listas[0], dtype=np.int64))
+        return np.unique(np.fromiter(chain(avulsas, chain.from_iterable(listas)), dtype=np.int64))
+
+    def buscar(self, texto="", campo=None, situacao=None, membros=None):
+        """
+        Posições (array ordenado) dos usuários que atendem à busca. 'campo' limita
+        os termos a um campo de CAMPOS_BUSCA; 'situacao' é 'novos', 'existentes' ou
+        None. Sem a MatrizMembros dos times em 'membros', os times não são buscados.
+        """
+        import numpy as np
+        campos = (campo,) if campo else tuple(CAMPOS_BUSCA)
+        codigos = tuple(CAMPOS_BUSCA[c] for c in campos if CAMPOS_BUSCA[c])
+        if 'time' not in campos: membros = None
+        resultado = None
+        # Termos mais longos primeiro: costumam casar com menos usuários e encurtam as interseções
+        for termo in sorted(set(tokens_texto(texto)), key=len, reverse=True):
+            posicoes = self._com_prefixo(termo, codigos, membros)
+            resultado = posicoes if resultado is None else np.intersect1d(resultado, posicoes, assume_unique=True)
+            if not len(resultado): break
+        if resultado is None:
+            resultado = np.arange(len(self._por_linha), dtype=np.int64)
+        if situacao is not None:
+            novos = np.frombuffer(bytes(self._novos), dtype=np.bool_)[resultado]
+            resultado = resultado[novos if situacao == 'novos' else ~novos]
+        return resultado
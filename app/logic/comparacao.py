@@ -0,0 +1,127 @@
+# app/logic/comparacao.py
+import csv
+from collections import namedtuple
+
+from .data_processor import processar_em_blocos
+from .indice_plataforma import normalizar_email
+from .leitor_xlsx import colunas_encontradas, ler_xlsx_em_blocos
+from .perfil import PERFIL
+
+# Campos comparados e as colunas da planilha de onde eles vêm
+COLUNAS_DOS_CAMPOS = {
+    'first_name': ('nome',),
+    'last_name': ('nome',),
+    'roles': ('cargo',),
+    'teams': ('time',),
+    'max_chat_limit': ('limite de chats',),
+}
+ROTULOS_CAMPOS = {
+    'first_name': "Nome", 'last_name': "Sobrenome", 'roles': "Cargos", 'teams': "Times", 'max_chat_limit': "Limite de chats",
+}
+GRUPOS = ('roles', 'teams')
+SITUACOES = ('alterado', 'adicionado', 'removido')
+
+Diferenca = namedtuple('Diferenca', ['situacao', 'email', 'nome', 'campos', 'atual', 'novo'])
+ResultadoComparacao = namedtuple('ResultadoComparacao', ['diferencas', 'em_comum', 'duplicados', 'campos'])
+
+
+def nome_exibicao(usuario):
+    return f"{usuario.get('first_name') or ''} {usuario.get('last_name') or ''}".strip()
+
+def _valor(usuario, campo, molde):
+    """Valor comparável do campo; times e cargos viram o bitset (mesmo molde) ou os nomes ativos."""
+    if campo in GRUPOS:
+        if molde is not None and getattr(usuario, 'molde', None) is molde:
+            return usuario.bits_ativos(campo)
+        return frozenset(_nomes_ativos(usuario, campo))
+    return str(usuario.get(campo) or "")
+
+def _nomes_ativos(usuario, campo):
+    if hasattr(usuario, 'ativos'):
+        return usuario.ativos(campo)
+    return [item.get('name') for item in usuario.get(campo) or [] if item.get('value') in (1, "1", True)]
+
+def texto_campo(usuario, campo):
+    """Texto do campo para exibição e para o CSV de diferenças."""
+    if campo in GRUPOS:
+        return ", ".join(_nomes_ativos(usuario, campo))
+    return str(usuario.get(campo) or "")
+
+def _impressao(usuario, campos, molde):
+    return hash(tuple(_valor(usuario, campo, molde) for campo in campos))
+
+
+def comparar_usuarios(atuais, novos, campos=tuple(COLUNAS_DOS_CAMPOS), molde=None):
+    """
+    Compara duas listas de usuários pela chave email normalizado. Em uma passada
+    pelos novos, compara a impressão (hash) dos 'campos' de cada par; só os pares
+    com impressões diferentes são detalhados campo a campo. Emails repetidos:
+    vale a última ocorrência entre os atuais e a primeira entre os novos.
+    """
+    indice = {}
+    for posicao, usuario in enumerate(atuais):
+        indice[normalizar_email(usuario.get('email'))] = posicao
+    duplicados = len(atuais) - len(indice)
+
+    diferencas, vistos, em_comum = [], set(), 0
+    for usuario in novos:
+        chave = normalizar_email(usuario.get('email'))
+        if chave in vistos:
+            duplicados += 1; continue
+        vistos.add(chave)
+        posicao = indice.get(chave)
+        if posicao is None:
+            diferencas.append(Diferenca('adicionado', usuario.get('email', ""), nome_exibicao(usuario), (), None, usuario))
+            continue
+        em_comum += 1
+        atual = atuais[posicao]
+        if _impressao(atual, campos, molde) == _impressao(usuario, campos, molde): continue
+        alterados = tuple(campo for campo in campos if _valor(atual, campo, molde) != _valor(usuario, campo, molde))
+        if alterados:
+            diferencas.append(Diferenca('alterado', usuario.get('email', ""), nome_exibicao(usuario), alterados, atual, usuario))
+
+    for chave, posicao in indice.items():
+        if chave not in vistos:
+            atual = atuais[posicao]
+            diferencas.append(Diferenca('removido', atual.get('email', ""), nome_exibicao(atual), (), atual, None))
+    return ResultadoComparacao(diferencas, em_comum, duplicados, tuple(campos))
+
+def comparar_com_planilha(usuarios, caminho, molde, usuarios_plataforma, team_id_map=None, processos=None):
+    """
+    Lê todas as abas da planilha (só as colunas usadas, em blocos), deriva os campos
+    como na carga e compara com os usuários carregados. Só 'Email' é obrigatória;
+    os campos cujas colunas não existem na planilha não são comparados.
+    """
+    cabecalhos = {}
+    blocos = ler_xlsx_em_blocos(caminho, processos=processos, obrigatorias=('email',), cabecalhos=cabecalhos)
+    novos = []
+    with PERFIL.etapa('comparar_planilha') as etapa:
+        for lote, _, _ in processar_em_blocos(blocos, molde, usuarios_plataforma, team_id_map=team_id_map):
+            novos.extend(lote)
+        presentes = colunas_encontradas(cabecalhos)
+        campos = tuple(campo for campo, colunas in COLUNAS_DOS_CAMPOS.items() if presentes.issuperset(colunas))
+        resultado = comparar_usuarios(usuarios, novos, campos, molde)
+        etapa.itens = len(novos)
+    return resultado
+
+def contar_situacoes(resultado):
+    contagem = dict.fromkeys(SITUACOES, 0)
+    for diferenca in resultado.diferencas:
+        contagem[diferenca.situacao] += 1
+    return contagem
+
+def salvar_diferencas_csv(diferencas, campos, caminho):
+    """Grava as diferenças em CSV: uma linha por usuário, com os valores atual e novo de cada campo."""
+    cabecalho = ["Situação", "Email", "Nome", "Campos alterados"]
+    for campo in campos:
+        cabecalho += [f"{ROTULOS_CAMPOS[campo]} (atual)", f"{ROTULOS_CAMPOS[campo]} (nova planilha)"]
+    with open(caminho, 'w', encoding='utf-8-sig', newline='') as f:
+        escritor = csv.writer(f)
+        escritor.writerow(cabecalho)
+        for diferenca in diferencas:
+            linha = [diferenca.situacao, diferenca.email, diferenca.nome, ", ".join(ROTULOS_CAMPOS[c] for c in diferenca.campos)]
+            for campo in campos:
+                linha.append(texto_campo(diferenca.atual, campo) if diferenca.atual is not None else "")
+                linha.append(texto_campo(diferenca.novo, campo) if diferenca.novo is not None else "")
+            escritor.writerow(linha)
+    return len(diferencas)
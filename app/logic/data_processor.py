@@ -1,8 +1,16 @@
 # app/logic/data_processor.py
 import pandas as pd
-import copy
+import numpy as np
 import random
 
+from .indice_plataforma import IndicePlataforma, normalizar_nome
+from .perfil import PERFIL
+from .ramais import AlocadorRamais
+from .registro_usuario import TemplateUsuario
+
+# Mapeamento de 'Cargo' da planilha para o nome da role ativa no template
+MAPA_CARGOS = {'Supervisor': 'Manager Atendente', 'Atendente': 'Agent'}
+
 def gerar_ramal_unico(prefixo, ramais_existentes):
     """Gera um ramal sequencial único para um dado prefixo."""
     sequencial = 1
@@ -21,23 +29,37 @@ def gerar_ramal_unico(prefixo, ramais_existentes):
         if sequencial >= 10**num_digitos_seq:
             return ""
 
-def processar_dataframe(df, template_usuario, platform_users_map, gerar_ramais=False, ramais_existentes=None, team_id_map=None):
-    if ramais_existentes is None: ramais_existentes = set()
+def _alocador_de(ramais_existentes):
+    """Aceita um AlocadorRamais ou um set de ramais (que continua sendo atualizado no lugar)."""
+    if isinstance(ramais_existentes, AlocadorRamais):
+        return ramais_existentes
+    return AlocadorRamais(ramais_existentes if ramais_existentes is not None else set())
+
+def _molde_de(template_usuario):
+    """Aceita um TemplateUsuario ou o dicionário de template vindo da API."""
+    if isinstance(template_usuario, TemplateUsuario):
+        return template_usuario
+    return TemplateUsuario(template_usuario)
+
+def _plataforma_de(usuarios_plataforma):
+    """Aceita um IndicePlataforma ou o antigo mapa {"nome sobrenome": [times]}."""
+    if isinstance(usuarios_plataforma, IndicePlataforma):
+        return usuarios_plataforma
+    return IndicePlataforma.de_mapa(usuarios_plataforma or {})
+
+def processar_dataframe(df, template_usuario, usuarios_plataforma, gerar_ramais=False, ramais_existentes=None, team_id_map=None, colunar=False):
+    if colunar:
+        return processar_dataframe_colunar(df, template_usuario, usuarios_plataforma, gerar_ramais=gerar_ramais,
+                                           ramais_existentes=ramais_existentes, team_id_map=team_id_map)
+    alocador = _alocador_de(ramais_existentes)
+    molde = _molde_de(template_usuario)
+    usuarios_plataforma = _plataforma_de(usuarios_plataforma)
     if team_id_map is None: team_id_map = {}
 
-    novos_usuarios, times_nao_encontrados, times_sem_id = [], set(), set()
+    novos_usuarios, times_nao_encontrados, times_sem_id, pedidos_ramal = [], set(), set(), []
 
-    # <<< INÍCIO DA NOVA LÓGICA DE COLUNAS FLEXÍVEIS >>>
-    # Mapeia os nomes das colunas originais para uma versão padronizada (minúscula)
-    column_map = {col.lower().strip(): col for col in df.columns}
-    
-    # Define as colunas necessárias em minúsculo
-    colunas_necessarias = ['email', 'nome', 'sobrenome', 'cargo', 'time', 'matricula']
-    
-    # Verifica se todas as colunas necessárias existem no mapa
-    for col_necessaria in colunas_necessarias:
-        if col_necessaria not in column_map:
-            raise ValueError(f"A planilha deve conter a coluna obrigatória: '{col_necessaria}' (a capitalização não importa).")
+    # Colunas em minúsculo -> nomes originais (a capitalização não importa)
+    column_map = _resolver_colunas(df)
 
     for _, row in df.iterrows():
         # Função auxiliar para pegar o valor da linha, ignorando a capitalização
@@ -49,7 +71,7 @@ def processar_dataframe(df, template_usuario, platform_users_map, gerar_ramais=F
 
         if pd.isna(get_value('Email')): continue
         
-        novo_usuario = copy.deepcopy(template_usuario)
+        novo_usuario = molde.novo_registro()
         email_excel = str(get_value('Email')).strip()
         time_excel = str(get_value('Time')).strip()
         
@@ -65,19 +87,22 @@ def processar_dataframe(df, template_usuario, platform_users_map, gerar_ramais=F
         else:
             first_name, last_name = str(get_value('Nome') or ''), str(sobrenome_excel)
         
-        lookup_key = f"{first_name} {last_name}".strip()
+        matricula_excel = get_value('matricula')
+        agent_number = str(matricula_excel) if pd.notna(matricula_excel) else None
+
+        # Busca por email, matrícula e nome normalizado (acentos, maiúsculas e espaços não importam)
+        times_existentes = usuarios_plataforma.times_de(f"{first_name} {last_name}", email_excel, agent_number)
         
         active_team_names = set()
-        if lookup_key in platform_users_map:
+        if times_existentes is not None:
             novo_usuario['is_new'] = False
-            active_team_names.update(team['name'] for team in platform_users_map[lookup_key])
+            active_team_names.update(usuarios_plataforma.nomes_dos_times(times_existentes))
         else:
             novo_usuario['is_new'] = True
         
         if pd.notna(time_excel) and time_excel:
             active_team_names.add(time_excel)
 
-        ramal_gerado = ""
         if gerar_ramais:
             time_de_maior_id_nome, maior_id = None, -1
             for team_name in active_team_names:
@@ -87,31 +112,24 @@ def processar_dataframe(df, template_usuario, platform_users_map, gerar_ramais=F
                         maior_id, time_de_maior_id_nome = current_id, team_name
             
             if time_de_maior_id_nome:
-                prefixo = str(maior_id)
-                ramal_gerado = gerar_ramal_unico(prefixo, ramais_existentes)
+                pedidos_ramal.append((novo_usuario, str(maior_id)))
             elif time_excel:
                 times_sem_id.add(time_excel)
-        
-        matricula_excel = get_value('matricula')
-        agent_number = str(matricula_excel) if pd.notna(matricula_excel) else None
 
         novo_usuario.update({
             'email': email_excel, 
             'first_name': first_name, 
             'last_name': last_name,
             'agent_number': agent_number,
-            'extension_number': ramal_gerado,
+            'extension_number': "",
             'location': "", 'alias': "", 'new_email': ""
         })
 
         cargo = str(get_value('Cargo')).strip()
-        for role in novo_usuario.get('roles') or []:
-            role['value'] = 1 if (cargo == 'Supervisor' and role['name'] == 'Manager Atendente') or (cargo == 'Atendente' and role['name'] == 'Agent') else 0
-        
-        for team in novo_usuario.get('teams') or []:
-            team['value'] = 1 if team['name'] in active_team_names else 0
+        novo_usuario.definir_ativos('roles', {MAPA_CARGOS[cargo]} if cargo in MAPA_CARGOS else set())
+        novo_usuario.definir_ativos('teams', active_team_names)
 
-        if time_excel and time_excel not in {t['name'] for t in template_usuario.get('teams', []) or []}:
+        if time_excel and time_excel not in molde.mascaras.get('teams', {}):
             times_nao_encontrados.add(time_excel)
         
         limite_chats_valor = get_value('limite de chats') # Também funciona com case-insensitive
@@ -121,5 +139,140 @@ def processar_dataframe(df, template_usuario, platform_users_map, gerar_ramais=F
             novo_usuario['max_chat_limit'], novo_usuario['max_chat_limit_enabled'] = "", "0"
         
         novos_usuarios.append(novo_usuario)
-        
-    return novos_usuarios, times_nao_encontrados, times_sem_id
\ No newline at end of file
+
+    # Ramais planejados e alocados depois do laço, como no motor colunar
+    alocador.alocar_pedidos(pedidos_ramal)
+    return novos_usuarios, times_nao_encontrados, times_sem_id
+
+def _resolver_colunas(df):
+    """Mapeia as colunas em minúsculo para os nomes originais e valida as obrigatórias."""
+    column_map = {col.lower().strip(): col for col in df.columns}
+    colunas_necessarias = ['email', 'nome', 'sobrenome', 'cargo', 'time', 'matricula']
+    for col_necessaria in colunas_necessarias:
+        if col_necessaria not in column_map:
+            raise ValueError(f"A planilha deve conter a coluna obrigatória: '{col_necessaria}' (a capitalização não importa).")
+    return column_map
+
+def _coluna(df, column_map, nome):
+    """Retorna a coluna como Series de objetos (ou uma coluna vazia se não existir)."""
+    original = column_map.get(nome)
+    if original is None:
+        return pd.Series([None] * len(df), index=df.index, dtype=object)
+    return df[original].astype(object)
+
+def _como_texto(serie):
+    """Equivalente colunar de str(valor), inclusive para valores nulos ('nan'/'None')."""
+    return serie.map(str)
+
+def processar_dataframe_colunar(df, template_usuario, usuarios_plataforma, gerar_ramais=False, ramais_existentes=None, team_id_map=None):
+    """
+    Versão colunar de processar_dataframe: resolve o mapa de colunas uma única vez e
+    faz as transformações com operações de coluna do pandas. O resultado é idêntico
+    ao do processamento linha a linha.
+    """
+    with PERFIL.etapa('processar_dataframe', itens=len(df)):
+        return _processar_colunar(df, template_usuario, usuarios_plataforma, gerar_ramais, ramais_existentes, team_id_map)
+
+def _processar_colunar(df, template_usuario, usuarios_plataforma, gerar_ramais, ramais_existentes, team_id_map):
+    alocador = _alocador_de(ramais_existentes)
+    molde = _molde_de(template_usuario)
+    usuarios_plataforma = _plataforma_de(usuarios_plataforma)
+    if team_id_map is None: team_id_map = {}
+
+    column_map = _resolver_colunas(df)
+    emails = _coluna(df, column_map, 'email')
+    df = df[emails.notna().to_numpy()]
+    if df.empty:
+        return [], set(), set()
+
+    emails = _como_texto(_coluna(df, column_map, 'email')).str.strip()
+    times = _como_texto(_coluna(df, column_map, 'time')).str.strip()
+
+    # Nome e sobrenome: quando o sobrenome está vazio, ele é extraído do nome completo
+    nomes = _coluna(df, column_map, 'nome')
+    nomes_texto = _como_texto(nomes).where(nomes.astype(bool), '')
+    sobrenomes = _coluna(df, column_map, 'sobrenome')
+    sem_sobrenome = sobrenomes.isna() | (_como_texto(sobrenomes).str.strip() == '')
+    partes_nome = nomes_texto.str.strip().str.split()
+    first_names = nomes_texto.where(~sem_sobrenome, partes_nome.str[0].fillna(''))
+    last_names = _como_texto(sobrenomes).where(~sem_sobrenome, partes_nome.str[1:].str.join(' '))
+    chaves_emails = emails.str.casefold()
+
+    roles_ativas = _como_texto(_coluna(df, column_map, 'cargo')).str.strip().map(MAPA_CARGOS)
+
+    matriculas = _coluna(df, column_map, 'matricula')
+    agent_numbers = _como_texto(matriculas).astype(object)
+    agent_numbers[matriculas.isna().to_numpy()] = None
+
+    limites = _coluna(df, column_map, 'limite de chats')
+    tem_limite = (limites.notna() & (_como_texto(limites).str.strip() != '')).to_numpy()
+    limites_texto = pd.Series("", index=df.index, dtype=object)
+    if tem_limite.any():
+        valores = limites[tem_limite].map(float).to_numpy(dtype='float64')
+        if not np.isfinite(valores).all():
+            raise ValueError("Valor inválido na coluna 'limite de chats'.")
+        # int() de Python, como no linha a linha: astype('int64') estouraria acima de 2**63
+        limites_texto[tem_limite] = [str(int(valor)) for valor in valores.tolist()]
+
+    nomes_times_template = set(molde.mascaras.get('teams', {}))
+    times_preenchidos = times[times != '']
+    times_nao_encontrados = set(times_preenchidos[~times_preenchidos.isin(nomes_times_template)])
+    times_sem_id = set()
+
+    novos_usuarios, pedidos_ramal = [], []
+    for email, time_excel, first_name, last_name, chave_email, role_ativa, agent_number, limite, com_limite in zip(
+            emails.tolist(), times.tolist(), first_names.tolist(), last_names.tolist(), chaves_emails.tolist(),
+            roles_ativas.tolist(), agent_numbers.tolist(), limites_texto.tolist(), tem_limite.tolist()):
+        novo_usuario = molde.novo_registro()
+
+        active_team_names = set()
+        times_existentes = usuarios_plataforma.times_por_chaves(normalizar_nome(f"{first_name} {last_name}"), chave_email,
+                                                                agent_number.strip() if agent_number else None)
+        if times_existentes is not None:
+            novo_usuario['is_new'] = False
+            active_team_names.update(usuarios_plataforma.nomes_dos_times(times_existentes))
+        else:
+            novo_usuario['is_new'] = True
+        if time_excel:
+            active_team_names.add(time_excel)
+
+        if gerar_ramais:
+            ids_ativos = [team_id_map[nome] for nome in active_team_names if nome in team_id_map]
+            if ids_ativos:
+                pedidos_ramal.append((novo_usuario, str(max(ids_ativos))))
+            elif time_excel:
+                times_sem_id.add(time_excel)
+
+        novo_usuario.update({
+            'email': email,
+            'first_name': first_name,
+            'last_name': last_name,
+            'agent_number': agent_number,
+            'extension_number': "",
+            'location': "", 'alias': "", 'new_email': ""
+        })
+
+        novo_usuario.definir_ativos('roles', (role_ativa,))
+        novo_usuario.definir_ativos('teams', active_team_names)
+
+        novo_usuario['max_chat_limit'], novo_usuario['max_chat_limit_enabled'] = (limite, "1") if com_limite else ("", "0")
+        novos_usuarios.append(novo_usuario)
+
+    # Ramais alocados depois, planejados e em um bloco por prefixo (na ordem das linhas dentro de cada prefixo)
+    with PERFIL.etapa('gerar_ramais', itens=len(pedidos_ramal)):
+        alocador.alocar_pedidos(pedidos_ramal)
+
+    return novos_usuarios, times_nao_encontrados, times_sem_id
+
+def processar_em_blocos(blocos, template_usuario, usuarios_plataforma, gerar_ramais=False, ramais_existentes=None, team_id_map=None):
+    """
+    Processa uma sequência de DataFrames (ex.: ler_xlsx_em_blocos) com o motor colunar,
+    gerando (novos_usuarios, times_nao_encontrados, times_sem_id) a cada bloco.
+    O template e o alocador de ramais são compartilhados entre os blocos.
+    """
+    molde = _molde_de(template_usuario)
+    alocador = _alocador_de(ramais_existentes)
+    usuarios_plataforma = _plataforma_de(usuarios_plataforma)
+    for bloco in blocos:
+        yield processar_dataframe_colunar(bloco, molde, usuarios_plataforma, gerar_ramais=gerar_ramais,
+                                          ramais_existentes=alocador, team_id_map=team_id_map)
@@ -0,0 +1,247 @@
+# app/logic/envio.py
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from datetime import datetime
+from email.utils import parsedate_to_datetime
+from urllib.parse import quote
+
+from .exportacao import dados_para_salvar
+
+CONEXOES_PADRAO = 8
+TAXA_PADRAO = 20.0          # requisições por segundo, somando todas as conexões
+TENTATIVAS_PADRAO = 5
+BACKOFF_PADRAO = 0.5        # segundos; dobra a cada tentativa (com jitter)
+BACKOFF_MAXIMO = 30.0
+TIMEOUT_PADRAO = 30
+STATUS_REPETIR = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+PedidoEnvio = namedtuple('PedidoEnvio', ['posicao', 'email', 'metodo', 'url', 'corpo', 'chave'])
+ResultadoEnvio = namedtuple('ResultadoEnvio', ['posicao', 'email', 'chave', 'metodo', 'ok', 'status', 'tentativas', 'segundos', 'erro'])
+ResumoEnvio = namedtuple('ResumoEnvio', ['enviados', 'falhas', 'pulados', 'segundos', 'cancelado'])
+
+
+class BaldeTokens:
+    """
+    Limitador de taxa (token bucket) compartilhado pelas threads do envio: os
+    tokens são repostos a 'taxa' por segundo, até 'capacidade' (a rajada
+    permitida). pausar() esvazia o balde, e todas as threads esperam juntas
+    quando a plataforma responde 429.
+    """
+
+    def __init__(self, taxa, capacidade=None, relogio=time.monotonic):
+        if taxa <= 0:
+            raise ValueError("A taxa do envio deve ser maior que zero.")
+        self.taxa = float(taxa)
+        self.capacidade = float(capacidade if capacidade is not None else max(1.0, self.taxa))
+        self._relogio = relogio
+        self._tokens = self.capacidade
+        self._ultimo = relogio()
+        self._trava = threading.Lock()
+
+    def _repor(self):
+        agora = self._relogio()
+        self._tokens = min(self.capacidade, self._tokens + (agora - self._ultimo) * self.taxa)
+        self._ultimo = agora
+
+    def tentar(self):
+        """Consome um token se houver; senão, retorna quantos segundos faltam para o próximo (0.0 = consumido)."""
+        with self._trava:
+            self._repor()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.taxa
+
+    def consumir(self, cancelado=None):
+        """Espera um token. Retorna False se 'cancelado' (threading.Event) for sinalizado antes."""
+        while True:
+            espera = self.tentar()
+            if not espera: return True
+            if cancelado is not None:
+                if cancelado.wait(espera): return False
+            else:
+                time.sleep(espera)
+
+    def pausar(self, segundos):
+        """
+        Nenhum token novo pelos próximos 'segundos' (saldo negativo). Pausas
+        simultâneas não se somam: vale a mais longa.
+        """
+        with self._trava:
+            self._repor()
+            self._tokens = min(self._tokens, -segundos * self.taxa)
+
+
+def a_enviar(usuarios, url_existentes=None):
+    """(novos, existentes) que montar_pedidos vai enviar; sem 'url_existentes', nenhum existente."""
+    novos = sum(1 for usuario in usuarios if usuario.get('is_new', True))
+    return novos, (len(usuarios) - novos if url_existentes else 0)
+
+class _CamposUrl(dict):
+    def __missing__(self, chave):
+        raise ValueError(f"A URL de atualização usa '{{{chave}}}', mas o usuário não tem esse campo.")
+
+def montar_pedidos(usuarios, url_novos, url_existentes=None):
+    """
+    Gera um PedidoEnvio por usuário. Os novos (is_new) vão por POST em
+    'url_novos'; os existentes, por PATCH em 'url_existentes', formatada com os
+    campos do usuário (ex.: '.../agents/{email}'). Sem 'url_existentes', os
+    existentes são pulados (ver a_enviar): um POST criaria agentes duplicados.
+    A chave de idempotência é o SHA-256 do método, da URL e do corpo: muda só
+    se o que será enviado mudar.
+    """
+    for posicao, usuario in enumerate(usuarios):
+        if not usuario.get('is_new', True) and not url_existentes: continue
+        dados = dados_para_salvar(usuario)
+        if usuario.get('is_new', True):
+            metodo, url = 'POST', url_novos
+        else:
+            metodo = 'PATCH'
+            url = url_existentes.format_map(_CamposUrl({k: quote(str(v), safe='') for k, v in dados.items() if v is not None}))
+        corpo = json.dumps(dados, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+        chave = hashlib.sha256(f"{metodo} {url}\n".encode('utf-8') + corpo).hexdigest()
+        yield PedidoEnvio(posicao, dados.get('email') or "", metodo, url, corpo, chave)
+
+
+class RegistroEnvio:
+    """
+    Log do envio em JSON Lines, uma linha por usuário concluído (sucesso ou
+    falha definitiva), gravada assim que a resposta chega. Ao abrir um log que
+    já existe, as chaves enviadas com sucesso ficam em 'concluidas' e são
+    puladas: depois de uma queda, o mesmo envio continua de onde parou. Uma
+    última linha cortada pela queda é ignorada.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.concluidas = set()
+        self.linhas_invalidas = 0
+        termina_sem_quebra = False
+        if os.path.exists(caminho):
+            with open(caminho, encoding='utf-8') as f:
+                for linha in f:
+                    termina_sem_quebra = not linha.endswith("\n")
+                    try:
+                        entrada = json.loads(linha)
+                    except ValueError:
+                        self.linhas_invalidas += 1; continue
+                    if entrada.get('ok'): self.concluidas.add(entrada.get('chave'))
+        self._arquivo = open(caminho, 'a', encoding='utf-8')
+        if termina_sem_quebra: self._arquivo.write("\n")
+
+    def registrar(self, resultado):
+        entrada = resultado._asdict()
+        entrada['quando'] = datetime.now().isoformat(timespec='seconds')
+        self._arquivo.write(json.dumps(entrada, ensure_ascii=False) + "\n")
+        self._arquivo.flush()
+        if resultado.ok: self.concluidas.add(resultado.chave)
+
+    def close(self):
+        self._arquivo.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def _segundos_retry_after(valor):
+    """Segundos pedidos no cabeçalho Retry-After (número ou data HTTP), ou None."""
+    if not valor: return None
+    try:
+        return max(float(valor), 0.0)
+    except ValueError:
+        pass
+    try:
+        return max((parsedate_to_datetime(valor) - datetime.now().astimezone()).total_seconds(), 0.0)
+    except (TypeError, ValueError):
+        return None
+
+def _enviar_um(sessao, pedido, balde, cabecalhos, tentativas, backoff, timeout, cancelado):
+    """Envia um pedido com novas tentativas; None se o envio foi cancelado antes de uma resposta definitiva."""
+    headers = dict(cabecalhos or {})
+    headers.update({'Content-Type': 'application/json', 'Idempotency-Key': pedido.chave})
+    inicio, status, erro = time.perf_counter(), None, ""
+    for tentativa in range(1, tentativas + 1):
+        if not balde.consumir(cancelado): return None
+        espera = None
+        try:
+            resposta = sessao.request(pedido.metodo, pedido.url, data=pedido.corpo, headers=headers, timeout=timeout)
+        except Exception as e:  # rede: conexão recusada, timeout, etc.
+            status, erro = None, f"{type(e).__name__}: {e}"
+        else:
+            status = resposta.status_code
+            if status < 400:
+                return ResultadoEnvio(pedido.posicao, pedido.email, pedido.chave, pedido.metodo, True, status,
+                                      tentativa, time.perf_counter() - inicio, "")
+            erro = resposta.text[:300]
+            if status not in STATUS_REPETIR: break
+            espera = _segundos_retry_after(resposta.headers.get('Retry-After'))
+            if status == 429: balde.pausar(espera if espera is not None else backoff)
+        if tentativa < tentativas:
+            if espera is None:
+                espera = random.uniform(0.5, 1.0) * min(BACKOFF_MAXIMO, backoff * 2 ** (tentativa - 1))
+            if cancelado.wait(espera): return None
+    return ResultadoEnvio(pedido.posicao, pedido.email, pedido.chave, pedido.metodo, False, status,
+                          tentativa, time.perf_counter() - inicio, erro)
+
+def enviar_usuarios(pedidos, total, sessao, registro, cabecalhos=None, conexoes=CONEXOES_PADRAO, taxa=TAXA_PADRAO,
+                    tentativas=TENTATIVAS_PADRAO, backoff=BACKOFF_PADRAO, timeout=TIMEOUT_PADRAO,
+                    progresso=None, falha=None, cancelado=None):
+    """
+    Envia os pedidos com até 'conexoes' requisições simultâneas e no máximo
+    'taxa' requisições por segundo. Só uma janela de 2x 'conexoes' pedidos fica
+    em andamento, então a memória não cresce com o total. Status 408/425/429/5xx
+    e erros de rede são repetidos com backoff exponencial (respeitando
+    Retry-After); os demais 4xx são falhas definitivas.
+
+    Cada resultado vai para o 'registro' (RegistroEnvio); pedidos cujas chaves
+    já estão concluídas no registro são pulados. 'progresso(concluidos, total,
+    usuarios_por_segundo, falhas)' e 'falha(ResultadoEnvio)' são chamados da
+    thread que chamou esta função. Retorna um ResumoEnvio.
+    """
+    cancelado = cancelado or threading.Event()
+    balde = BaldeTokens(taxa, capacidade=max(1.0, min(taxa, conexoes)))
+    inicio = time.perf_counter()
+    enviados = falhas = pulados = 0
+
+    def avisar():
+        if progresso:
+            decorrido = time.perf_counter() - inicio
+            progresso(enviados + falhas + pulados, total, (enviados + falhas) / decorrido if decorrido > 0 else 0.0, falhas)
+
+    def contabilizar(tarefas):
+        nonlocal enviados, falhas
+        for tarefa in tarefas:
+            resultado = tarefa.result()
+            if resultado is None: continue  # cancelado: fica para a retomada
+            registro.registrar(resultado)
+            if resultado.ok:
+                enviados += 1
+            else:
+                falhas += 1
+                if falha: falha(resultado)
+        avisar()
+
+    pendentes = set()
+    with ThreadPoolExecutor(max_workers=conexoes) as executor:
+        for pedido in pedidos:
+            if cancelado.is_set(): break
+            if pedido.chave in registro.concluidas:
+                pulados += 1; continue
+            if len(pendentes) >= 2 * conexoes:
+                prontas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+                contabilizar(prontas)
+            pendentes.add(executor.submit(_enviar_um, sessao, pedido, balde, cabecalhos, tentativas, backoff, timeout, cancelado))
+        while pendentes:
+            prontas, pendentes = wait(pendentes, return_when=FIRST_COMPLETED)
+            contabilizar(prontas)
+    avisar()
+    return ResumoEnvio(enviados, falhas, pulados, time.perf_counter() - inicio, cancelado.is_set())
@@ -0,0 +1,163 @@
+# app/logic/exportacao.py
+import json
+import time
+import tracemalloc
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+from .perfil import PERFIL
+from .json_stream import LeitorListaJson, ler_blocos_arquivo
+from .matriz_membros import empacotar
+from .registro_usuario import RegistroUsuario, TemplateUsuario
+
+# Cabeçalho do CSV de importação da plataforma -> chave no JSON do usuário
+JSON_KEY_MAP = {
+    'Email': 'email', 'New email': 'new_email', 'Agent ID': 'agent_number', 'First name': 'first_name',
+    'Last name': 'last_name', 'Alias': 'alias', 'Status': 'status', 'Location': 'location',
+    'Chat concurrency': 'max_chat_limit', 'Chat concurrency status': 'max_chat_limit_enabled',
+    'Non-restricted international calling': 'unrestricted_international_calling',
+    'External User': 'external_user', 'External SIP URI': 'ucaas_sip_uri',
+    'UCaaS username': 'ucaas_user_name', 'Agent Extensions': 'extension_number',
+    'Availability Filter Name': 'availability_filter',
+    'Direct Inbound Number: 1': 'direct_inbound_number1', 'Direct Inbound Number: 2': 'direct_inbound_number2',
+    'Direct Inbound Number: 3': 'direct_inbound_number3', 'Direct Inbound Number: 4': 'direct_inbound_number4',
+    'Direct Inbound Number: 5': 'direct_inbound_number5'
+}
+
+# Colunas de participação, na ordem em que aparecem depois dos campos fixos
+GRUPOS_CSV = (('roles', "Role: "), ('teams', "Team: "))
+TAMANHO_BLOCO_CSV = 10000
+
+# Linhas escritas, duração em segundos, memória do maior bloco montado e pico de
+# memória alocada durante a exportação (só com medir_memoria; None caso contrário), em bytes
+ResumoExportacao = namedtuple('ResumoExportacao', ['linhas', 'segundos', 'memoria_bloco', 'memoria_pico'])
+
+def _bits_de(usuario, grupo, molde):
+    if isinstance(usuario, RegistroUsuario) and usuario.molde.template is molde.template:
+        return usuario.bits_exportacao(grupo)
+    # Dicionário comum (ou registro de outro template): ativo = nome com value == 1
+    itens = usuario.get(grupo, []) or []
+    return molde.mascara(grupo, {item['name'] for item in itens if item.get('value') == 1})
+
+def _matriz_grupo(usuarios, molde, grupo, repetidos):
+    """Matriz 0/1 (usuários x itens do template) montada direto dos bitsets."""
+    total = len(molde.nomes.get(grupo, ()))
+    if not total:
+        return np.zeros((len(usuarios), 0), dtype=np.uint8)
+    num_bytes = (total + 7) // 8
+    bytes_bits = empacotar((_bits_de(u, grupo, molde) for u in usuarios), len(usuarios), num_bytes)
+    matriz = np.unpackbits(bytes_bits, axis=1, count=total, bitorder='little')
+    # Nome repetido no template: todas as colunas com o nome valem 1 se qualquer uma estiver ativa
+    for posicoes in repetidos:
+        matriz[:, posicoes] = matriz[:, posicoes].max(axis=1, keepdims=True)
+    return matriz
+
+def _posicoes_repetidas(nomes):
+    posicoes = {}
+    for posicao, nome in enumerate(nomes):
+        posicoes.setdefault(nome, []).append(posicao)
+    return [lista for lista in posicoes.values() if len(lista) > 1]
+
+def salvar_csv(usuarios, template_usuario, caminho, progresso=None, tamanho_bloco=TAMANHO_BLOCO_CSV, medir_memoria=False):
+    """
+    Salva os usuários no CSV de importação da plataforma (separador vírgula, utf-8-sig).
+
+    As colunas de times e cargos saem de uma matriz NumPy montada a partir dos
+    bitsets, e o arquivo é escrito em blocos de 'tamanho_bloco' usuários.
+    'progresso(escritos, total)' é chamado após cada bloco. Só o bloco atual fica
+    montado em memória; as colunas fixas não passam por inferência de tipos
+    (dtype=object), então a saída não depende de como os usuários caem nos
+    blocos. 'medir_memoria' liga o tracemalloc para
+    medir o pico real (deixa a exportação bem mais lenta). Retorna um ResumoExportacao.
+    """
+    with PERFIL.etapa('exportar_csv', itens=len(usuarios)):
+        return _salvar_csv(usuarios, template_usuario, caminho, progresso, tamanho_bloco, medir_memoria)
+
+def _salvar_csv(usuarios, template_usuario, caminho, progresso, tamanho_bloco, medir_memoria):
+    inicio = time.perf_counter()
+    medindo = medir_memoria and not tracemalloc.is_tracing()
+    if medindo: tracemalloc.start()
+    try:
+        molde = template_usuario if isinstance(template_usuario, TemplateUsuario) else TemplateUsuario(template_usuario)
+        grupos = [(grupo, prefixo, _posicoes_repetidas(molde.nomes.get(grupo, ()))) for grupo, prefixo in GRUPOS_CSV]
+        cabecalhos_grupo = {grupo: [f"{prefixo}{item['name']}" for item in molde.itens.get(grupo, ())]
+                            for grupo, prefixo, _ in grupos}
+
+        total, memoria_bloco = len(usuarios), 0
+        with open(caminho, 'w', encoding='utf-8-sig', newline='') as f:
+            for comeco in range(0, max(total, 1), tamanho_bloco):
+                fim = min(comeco + tamanho_bloco, total)
+                bloco_usuarios = usuarios[comeco:fim]
+                partes = [pd.DataFrame({header: [u.get(json_key, "") for u in bloco_usuarios]
+                                        for header, json_key in JSON_KEY_MAP.items()}, dtype=object)]
+                for grupo, _, repetidos in grupos:
+                    partes.append(pd.DataFrame(_matriz_grupo(bloco_usuarios, molde, grupo, repetidos),
+                                               columns=cabecalhos_grupo[grupo]))
+                bloco = pd.concat(partes, axis=1)
+                memoria_bloco = max(memoria_bloco, int(bloco.memory_usage(index=False).sum()))
+                bloco.to_csv(f, index=False, sep=',', header=(comeco == 0))
+                if progresso: progresso(fim, total)
+        memoria_pico = tracemalloc.get_traced_memory()[1] if medir_memoria and tracemalloc.is_tracing() else None
+    finally:
+        if medindo: tracemalloc.stop()
+    return ResumoExportacao(total, time.perf_counter() - inicio, memoria_bloco, memoria_pico)
+
+# Formatos de salvar_json: 'indentado' (idêntico ao json.dump com indent=4),
+# 'compacto' (lista sem espaços) e 'jsonl' (um usuário por linha)
+FORMATOS_JSON = ('indentado', 'compacto', 'jsonl')
+
+def dados_para_salvar(usuario):
+    """Dicionário do usuário como é salvo e enviado à plataforma (sem o campo interno 'is_new')."""
+    dados = usuario.para_dict() if hasattr(usuario, 'para_dict') else dict(usuario)
+    dados.pop('is_new', None)
+    return dados
+
+def salvar_json(usuarios, caminho, formato='indentado', progresso=None, intervalo_progresso=TAMANHO_BLOCO_CSV):
+    """
+    Salva os usuários como JSON (sem o campo interno 'is_new'), serializando um
+    usuário por vez direto no arquivo, sem montar a lista completa em memória.
+    Retorna um ResumoExportacao.
+    """
+    if formato not in FORMATOS_JSON:
+        raise ValueError(f"Formato de JSON desconhecido: '{formato}'.")
+    with PERFIL.etapa('exportar_json', itens=len(usuarios), formato=formato):
+        return _salvar_json(usuarios, caminho, formato, progresso, intervalo_progresso)
+
+def _salvar_json(usuarios, caminho, formato, progresso, intervalo_progresso):
+    inicio, total = time.perf_counter(), len(usuarios)
+    with open(caminho, 'w', encoding='utf-8') as f:
+        if formato != 'jsonl':
+            f.write("[" if formato == 'compacto' or not total else "[\n")
+        for posicao, usuario in enumerate(usuarios):
+            dados = dados_para_salvar(usuario)
+            if formato == 'indentado':
+                texto = json.dumps(dados, indent=4, ensure_ascii=False).replace("\n", "\n    ")
+                f.write(("    " if posicao == 0 else ",\n    ") + texto)
+            elif formato == 'compacto':
+                f.write(("" if posicao == 0 else ",") + json.dumps(dados, ensure_ascii=False, separators=(',', ':')))
+            else:
+                f.write(json.dumps(dados, ensure_ascii=False) + "\n")
+            if progresso and (posicao + 1) % intervalo_progresso == 0:
+                progresso(posicao + 1, total)
+        if formato != 'jsonl':
+            f.write("]" if formato == 'compacto' or not total else "\n]")
+    if progresso: progresso(total, total)
+    return ResumoExportacao(total, time.perf_counter() - inicio, None, None)
+
+def ler_json_usuarios(caminho):
+    """
+    Gera os usuários (dicionários) de um arquivo salvo por salvar_json, em qualquer
+    formato, lendo em streaming. Arquivos .jsonl são lidos linha a linha.
+    """
+    if caminho.lower().endswith('.jsonl'):
+        with open(caminho, encoding='utf-8') as f:
+            for linha in f:
+                if linha.strip():
+                    yield json.loads(linha)
+        return
+    for usuario in LeitorListaJson(ler_blocos_arquivo(caminho)).itens():
+        if not isinstance(usuario, dict):
+            raise ValueError("O arquivo não contém uma lista de usuários.")
+        yield usuario
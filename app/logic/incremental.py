@@ -0,0 +1,140 @@
+# app/logic/incremental.py
+import numpy as np
+import pandas as pd
+
+from .data_processor import processar_dataframe_colunar
+from .indice_plataforma import normalizar_email
+from .perfil import PERFIL
+from .ramais import DIGITOS_RAMAL, AlocadorAdiado, RamalPendente, resolver_pendentes
+
+
+def impressoes_linhas(bloco):
+    """
+    Impressão (hash de 64 bits) do conteúdo de cada linha do bloco. Os blocos de
+    ler_xlsx_em_blocos têm sempre as mesmas colunas, na mesma ordem, e células já
+    normalizadas, então a impressão não depende da aba nem da posição do bloco.
+    """
+    return pd.util.hash_pandas_object(bloco, index=False).to_numpy()
+
+def _coluna_email(bloco):
+    for coluna in bloco.columns:
+        if str(coluna).lower().strip() == 'email':
+            return coluna
+    raise ValueError("A planilha deve conter a coluna obrigatória: 'email' (a capitalização não importa).")
+
+
+class CacheProcessamento:
+    """
+    Registros de uma carga indexados pela impressão da linha de origem, para a
+    próxima carga da mesma planilha reaproveitar os usuários de linhas que não
+    mudaram (com as edições feitas no formulário e os ramais). Só vale enquanto o
+    template, os dados da plataforma e a opção de gerar ramais forem os mesmos.
+    """
+
+    def __init__(self, molde, usuarios_plataforma, team_id_map, gerar_ramais):
+        self._contexto = (molde, usuarios_plataforma, team_id_map)
+        self.gerar_ramais = gerar_ramais
+        self._por_impressao = {}
+        self.reaproveitados = self.reprocessados = 0
+
+    def __len__(self):
+        return sum(len(registros) for registros in self._por_impressao.values())
+
+    def compativel(self, molde, usuarios_plataforma, team_id_map, gerar_ramais):
+        atual = (molde, usuarios_plataforma, team_id_map)
+        return self.gerar_ramais == gerar_ramais and all(a is b for a, b in zip(self._contexto, atual))
+
+    def adicionar(self, impressao, registro):
+        self._por_impressao.setdefault(impressao, []).append(registro)
+
+    def itens(self):
+        """Pares (impressão, registro) ainda no cache."""
+        for impressao, registros in self._por_impressao.items():
+            for registro in registros:
+                yield impressao, registro
+
+    def retirar(self, impressao):
+        """Retira um registro com a impressão dada (linhas repetidas saem na ordem), ou None."""
+        registros = self._por_impressao.get(impressao)
+        if not registros: return None
+        registro = registros.pop(0)
+        if not registros: del self._por_impressao[impressao]
+        return registro
+
+    def remover(self, impressao, registro):
+        """Remove um registro específico; False se ele já foi retirado."""
+        registros = self._por_impressao.get(impressao, [])
+        for posicao, existente in enumerate(registros):
+            if existente is registro:
+                del registros[posicao]
+                if not registros: del self._por_impressao[impressao]
+                return True
+        return False
+
+
+def _manter_ramal(registro, anterior):
+    """
+    Mantém na linha reprocessada o ramal anterior do mesmo email se o prefixo não
+    mudou. Retorna False se o RamalPendente continua para ser alocado.
+    """
+    pendente = registro.get('extension_number')
+    if not isinstance(pendente, RamalPendente): return True
+    ramal_anterior = anterior.get('extension_number') if anterior is not None else None
+    if ramal_anterior and len(ramal_anterior) == DIGITOS_RAMAL and ramal_anterior.startswith(pendente.prefixo):
+        registro['extension_number'] = ramal_anterior
+        return True
+    return False
+
+def processar_em_blocos_incremental(blocos, molde, usuarios_plataforma, gerar_ramais, alocador, team_id_map, anterior, novo):
+    """
+    Como processar_em_blocos, mas as linhas cuja impressão está no cache 'anterior'
+    reaproveitam o registro já processado; só as linhas novas ou alteradas passam
+    pelo motor colunar. Os ramais dos registros anteriores são reservados antes
+    de tudo, e uma linha alterada mantém o ramal do mesmo email se o prefixo não
+    mudou. O cache 'novo' recebe as impressões de todas as linhas processadas.
+    """
+    por_email, em_uso, cedidos = {}, set(), []
+    if anterior is not None:
+        for impressao, registro in list(anterior.itens()):
+            por_email.setdefault(normalizar_email(registro.get('email')), (impressao, registro))
+            if registro.get('extension_number'): alocador.reservar(registro['extension_number'])
+
+    for bloco in blocos:
+        with PERFIL.etapa('impressoes_linhas', itens=len(bloco)):
+            validas = bloco[_coluna_email(bloco)].notna().to_numpy()
+            impressoes = impressoes_linhas(bloco)[validas].tolist()
+        registros = [anterior.retirar(impressao) if anterior is not None else None for impressao in impressoes]
+        pendentes = np.fromiter((registro is None for registro in registros), dtype=bool, count=len(registros))
+
+        nao_encontrados, sem_id, sem_ramal = set(), set(), []
+        if pendentes.any():
+            processados, nao_encontrados, sem_id = processar_dataframe_colunar(
+                bloco[validas][pendentes], molde, usuarios_plataforma, gerar_ramais=gerar_ramais,
+                ramais_existentes=AlocadorAdiado(), team_id_map=team_id_map)
+            processados = iter(processados)
+        for posicao, registro in enumerate(registros):
+            if registro is None:
+                registro = next(processados)
+                if gerar_ramais:
+                    # O registro anterior do mesmo email só cede o ramal se a linha dele não foi (nem será) reaproveitada
+                    doador = por_email.pop(normalizar_email(registro.get('email')), None)
+                    if doador is not None and not anterior.remover(*doador): doador = None
+                    if not _manter_ramal(registro, doador[1] if doador else None): sem_ramal.append(registro)
+                    # Saiu do cache sem passar o ramal adiante (o prefixo mudou): é liberado no fim, como os demais
+                    if doador is not None and registro.get('extension_number') != doador[1].get('extension_number'):
+                        cedidos.append(doador[1])
+                registros[posicao] = registro
+        # Os ramais que faltam são alocados de uma vez para o bloco, depois dos mantidos
+        resolver_pendentes(sem_ramal, alocador)
+        for posicao, registro in enumerate(registros):
+            novo.adicionar(impressoes[posicao], registro)
+            if anterior is not None: em_uso.add(registro.get('extension_number'))
+        novo.reaproveitados += len(registros) - int(pendentes.sum())
+        novo.reprocessados += int(pendentes.sum())
+        yield registros, nao_encontrados, sem_id
+
+    # Ramais dos registros anteriores que não foram reaproveitados nem mantidos voltam a ficar livres
+    if anterior is not None:
+        for registro in [registro for _, registro in anterior.itens()] + cedidos:
+            ramal = registro.get('extension_number')
+            if ramal and ramal not in em_uso: alocador.liberar(ramal)
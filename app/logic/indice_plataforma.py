@@ -0,0 +1,152 @@
+# app/logic/indice_plataforma.py
+import re
+import sys
+import unicodedata
+
+_DIACRITICOS = re.compile('[\u0300-\u036f]')
+
+
+def normalizar_nome(texto):
+    """Chave de nome sem acentos, sem diferença de maiúsculas e com espaços simples."""
+    texto = str(texto or "")
+    if not texto.isascii():
+        texto = _DIACRITICOS.sub('', unicodedata.normalize('NFKD', texto))
+    return ' '.join(texto.casefold().split())
+
+def normalizar_email(email):
+    return str(email or "").strip().casefold()
+
+def _texto(valor):
+    return str(valor).strip() if valor is not None else ""
+
+
+class UsuarioPlataforma:
+    """Um usuário da plataforma e as chaves dos times em que está (ID, ou o nome se o time não tem ID)."""
+    __slots__ = ('first_name', 'last_name', 'email', 'agent_number', 'times')
+
+    def __init__(self, first_name, last_name, email, agent_number):
+        self.first_name, self.last_name = first_name, last_name
+        self.email, self.agent_number = email, agent_number
+        self.times = ()
+
+    def __repr__(self):
+        return f"UsuarioPlataforma({self.first_name!r}, {self.last_name!r}, times={self.times!r})"
+
+
+class IndicePlataforma:
+    """
+    Usuários da plataforma indexados por nome normalizado, email e matrícula
+    (agent number), montado em uma única passada pelos times. Um mesmo usuário em
+    vários times vira um só registro; nomes de times são internados e os
+    registros guardam só as chaves dos times.
+
+    Nomes normalizados compartilhados por usuários diferentes (emails ou
+    matrículas distintas) ficam em 'ambiguos'; a busca só pelo nome devolve a
+    união dos times deles, como o mapa por nome fazia.
+    """
+
+    def __init__(self):
+        self.por_nome = {}
+        self.por_email = {}
+        self.por_agente = {}
+        self.ambiguos = {}
+        self.nomes_times = {}
+        self._so_nome = {}  # usuários sem email nem matrícula, identificados pelo nome
+        self._total = 0
+        self._times_por_nome = None
+
+    def __len__(self):
+        return self._total
+
+    def adicionar(self, assignee, chave_time, nome_time):
+        """Registra um 'assignee' da API como membro do time 'chave_time'."""
+        first_name = assignee.get('first_name')
+        if not first_name: return None
+        last_name = assignee.get('last_name', '')
+        email = assignee.get('email')
+        email = str(email).strip().casefold() if email else ""
+        agente = assignee.get('agent_number')
+        agente = str(agente).strip() if agente is not None else ""
+
+        # Identidade do usuário: email, senão matrícula, senão o nome normalizado.
+        # Um registro visto antes só com a matrícula ganha o email quando ele aparece.
+        usuario = self.por_email.get(email) if email else None
+        if usuario is None and agente:
+            usuario = self.por_agente.get(agente)
+            if usuario is not None and email:
+                if usuario.email is None:
+                    usuario.email = email
+                    self.por_email[email] = usuario
+                else:
+                    usuario = None  # mesma matrícula com outro email: outro usuário
+        elif usuario is not None and agente and usuario.agent_number is None:
+            usuario.agent_number = agente
+            self.por_agente.setdefault(agente, usuario)
+        chave_nome = None
+        if usuario is None and not email and not agente:
+            chave_nome = normalizar_nome(f"{first_name} {last_name}")
+            usuario = self._so_nome.get(chave_nome)
+        if usuario is None:
+            usuario = UsuarioPlataforma(first_name, last_name, email or None, agente or None)
+            self._total += 1
+            if chave_nome is None:
+                chave_nome = normalizar_nome(f"{first_name} {last_name}")
+            else:
+                self._so_nome[chave_nome] = usuario
+            if email: self.por_email[email] = usuario
+            if agente: self.por_agente.setdefault(agente, usuario)
+            existente = self.por_nome.setdefault(chave_nome, usuario)
+            if existente is not usuario:
+                self.ambiguos.setdefault(chave_nome, [existente]).append(usuario)
+        if chave_time not in self.nomes_times:
+            self.nomes_times[chave_time] = sys.intern(nome_time) if isinstance(nome_time, str) else nome_time
+        if chave_time not in usuario.times:
+            usuario.times += (chave_time,)
+        self._times_por_nome = None
+        return usuario
+
+    def _tabela_nomes(self):
+        """Nome normalizado -> tupla de chaves de times (união para os nomes ambíguos), montada sob demanda."""
+        if self._times_por_nome is None:
+            tabela = {chave: usuario.times for chave, usuario in self.por_nome.items()}
+            for chave, usuarios in self.ambiguos.items():
+                tabela[chave] = tuple(dict.fromkeys(t for usuario in usuarios for t in usuario.times))
+            self._times_por_nome = tabela
+        return self._times_por_nome
+
+    def times_por_chaves(self, chave_nome, email=None, agente=None):
+        """
+        Chaves dos times do usuário, procurando por email, depois matrícula e por
+        fim nome (chaves já normalizadas). None se não for usuário da plataforma.
+        """
+        if email:
+            usuario = self.por_email.get(email)
+            if usuario is not None: return usuario.times
+        if agente:
+            usuario = self.por_agente.get(agente)
+            if usuario is not None: return usuario.times
+        return self._tabela_nomes().get(chave_nome)
+
+    def times_de(self, nome_completo, email=None, agente=None):
+        """Como times_por_chaves, normalizando os valores da planilha."""
+        return self.times_por_chaves(normalizar_nome(nome_completo), normalizar_email(email), _texto(agente))
+
+    def nomes_dos_times(self, chaves_times):
+        return [self.nomes_times[chave] for chave in chaves_times]
+
+    def relatorio_ambiguos(self, limite=10):
+        """Texto curto com os nomes ambíguos (para avisos na interface e na CLI)."""
+        nomes = [f"{usuarios[0].first_name} {usuarios[0].last_name}".strip() + f" ({len(usuarios)})"
+                 for usuarios in list(self.ambiguos.values())[:limite]]
+        extra = len(self.ambiguos) - len(nomes)
+        return ", ".join(nomes) + (f" e mais {extra}" if extra > 0 else "")
+
+    @classmethod
+    def de_mapa(cls, platform_users_map):
+        """Converte o antigo mapa {"nome sobrenome": [{'name': time}, ...]} em um índice."""
+        indice = cls()
+        for lookup_key, times in platform_users_map.items():
+            first_name, _, last_name = lookup_key.partition(' ')
+            for team_info in times:
+                indice.adicionar({'first_name': first_name, 'last_name': last_name}, team_info.get('name'), team_info.get('name'))
+        return indice
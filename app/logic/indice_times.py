@@ -0,0 +1,35 @@
+# app/logic/indice_times.py
+from .indice_plataforma import IndicePlataforma
+
+class IndiceTimes:
+    """
+    Índices derivados da lista de times da plataforma, montados em uma única
+    passada: mapa nome do time -> ID, usuários da plataforma (IndicePlataforma)
+    e o conjunto de ramais já existentes.
+    """
+
+    def __init__(self):
+        self.team_id_map = {}
+        self.usuarios_plataforma = IndicePlataforma()
+        self.ramais_existentes = set()
+        self.total_times = 0
+
+    def adicionar_time(self, team):
+        """Indexa um time (com seus 'assignees'); o dicionário do time não é guardado."""
+        self.total_times += 1
+        if 'id' in team and 'name' in team:
+            self.team_id_map[team['name']] = team['id']
+        nome_time = team.get('name')
+        chave_time = team['id'] if team.get('id') is not None else nome_time
+        for assignee in team.get('assignees', []):
+            if self.usuarios_plataforma.adicionar(assignee, chave_time, nome_time) is None: continue
+            ramal = assignee.get('extension_number')
+            if ramal:
+                self.ramais_existentes.add(str(ramal))
+
+def construir_indice_times(teams):
+    """Monta um IndiceTimes a partir de qualquer iterável de times (lista ou streaming)."""
+    indice = IndiceTimes()
+    for team in teams:
+        indice.adicionar_time(team)
+    return indice
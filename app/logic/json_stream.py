@@ -0,0 +1,157 @@
+# app/logic/json_stream.py
+import codecs
+import json
+from urllib.parse import urljoin
+
+CHAVES_LISTA = ('data', 'agents', 'teams')
+_ESPACOS = ' \t\r\n'
+_LIMPAR_BUFFER = 1 << 16
+
+
+def ler_blocos_arquivo(caminho, tamanho=_LIMPAR_BUFFER):
+    """Gera o conteúdo de um arquivo em blocos de bytes (para o LeitorListaJson)."""
+    with open(caminho, 'rb') as f:
+        while True:
+            bloco = f.read(tamanho)
+            if not bloco: return
+            yield bloco
+
+
+class LeitorListaJson:
+    """
+    Lê incrementalmente uma resposta JSON que é uma lista, ou um objeto com a lista
+    em 'data'/'agents'/'teams', gerando um item por vez. Só o item corrente fica em
+    memória; os demais campos do objeto (ex.: paginação) vão para 'metadados'.
+    """
+
+    def __init__(self, blocos, chaves_lista=CHAVES_LISTA):
+        self._blocos = iter(blocos)
+        self._decodificador = codecs.getincrementaldecoder('utf-8')()
+        self._json = json.JSONDecoder()
+        self._buf = ""
+        self._pos = 0
+        self._pendentes = []
+        self._tamanho_pendente = 0
+        self._fim = False
+        self.chaves_lista = chaves_lista
+        self.metadados = {}
+
+    # --- Buffer ---
+
+    def _ler_bloco(self):
+        """Lê o próximo bloco para a lista de pendentes. Retorna False no fim dos dados."""
+        for bloco in self._blocos:
+            if not bloco: continue
+            texto = self._decodificador.decode(bloco) if isinstance(bloco, bytes) else bloco
+            self._pendentes.append(texto)
+            self._tamanho_pendente += len(texto)
+            return True
+        if not self._fim:
+            self._pendentes.append(self._decodificador.decode(b"", final=True))
+            self._fim = True
+        return False
+
+    def _consolidar(self):
+        """Junta os blocos pendentes ao buffer, descartando o trecho já consumido."""
+        if not self._pendentes: return
+        if self._pos > _LIMPAR_BUFFER or self._pos == len(self._buf):
+            self._buf, self._pos = self._buf[self._pos:], 0
+        self._buf += "".join(self._pendentes)
+        self._pendentes, self._tamanho_pendente = [], 0
+
+    def _ler_mais(self):
+        lido = self._ler_bloco()
+        self._consolidar()
+        return lido
+
+    def _proximo_caractere(self):
+        """Pula espaços e retorna o próximo caractere sem consumi-lo ('' no fim)."""
+        while True:
+            while self._pos < len(self._buf) and self._buf[self._pos] in _ESPACOS:
+                self._pos += 1
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._ler_mais() and not self._pendentes and self._pos >= len(self._buf):
+                return ""
+
+    def _esperar(self, caractere):
+        if self._proximo_caractere() != caractere:
+            raise ValueError(f"JSON inválido: esperado '{caractere}' na posição {self._pos}.")
+        self._pos += 1
+
+    def _valor(self):
+        """Decodifica o próximo valor completo, lendo mais dados enquanto estiver incompleto."""
+        self._proximo_caractere()
+        while True:
+            try:
+                valor, fim = self._json.raw_decode(self._buf, self._pos)
+                # Um número no fim do buffer pode continuar no próximo bloco
+                if fim < len(self._buf) or self._fim:
+                    self._pos = fim
+                    return valor
+            except json.JSONDecodeError:
+                if self._fim: raise
+            # Só tenta de novo quando o trecho pendente dobrar, para não decodificar
+            # o mesmo item grande O(n²) vezes
+            necessario = max(len(self._buf) - self._pos, 1)
+            while self._tamanho_pendente < necessario and self._ler_bloco():
+                pass
+            self._consolidar()
+
+    # --- Estrutura ---
+
+    def _itens_da_lista(self):
+        self._esperar('[')
+        if self._proximo_caractere() == ']':
+            self._pos += 1
+            return
+        while True:
+            yield self._valor()
+            separador = self._proximo_caractere()
+            self._pos += 1
+            if separador == ']': return
+            if separador != ',':
+                raise ValueError(f"JSON inválido: esperado ',' ou ']' na posição {self._pos - 1}.")
+
+    def itens(self):
+        """Gera os itens da lista principal da resposta."""
+        inicio = self._proximo_caractere()
+        if inicio == '[':
+            yield from self._itens_da_lista()
+            return
+        if inicio != '{':
+            if inicio: self.metadados['valor'] = self._valor()
+            return
+        self._pos += 1
+        lista_lida = False
+        while True:
+            caractere = self._proximo_caractere()
+            if caractere == '}':
+                self._pos += 1
+                return
+            if caractere == ',':
+                self._pos += 1
+                continue
+            chave = self._valor()
+            self._esperar(':')
+            if chave in self.chaves_lista and not lista_lida and self._proximo_caractere() == '[':
+                lista_lida = True
+                yield from self._itens_da_lista()
+            else:
+                self.metadados[chave] = self._valor()
+
+
+def proxima_pagina(url_atual, metadados, links=None):
+    """
+    URL da próxima página, se a API paginar: cabeçalho Link (rel="next") ou
+    campos 'next'/'next_page'/'links.next' no corpo da resposta.
+    """
+    candidato = (links or {}).get('next', {}).get('url')
+    if not candidato:
+        for chave in ('next', 'next_page', 'nextPage'):
+            if isinstance(metadados.get(chave), str):
+                candidato = metadados[chave]
+                break
+    if not candidato and isinstance(metadados.get('links'), dict):
+        candidato = metadados['links'].get('next')
+    return urljoin(url_atual, candidato) if isinstance(candidato, str) and candidato else None
@@ -0,0 +1,208 @@
+# app/logic/leitor_xlsx.py
+import math
+import os
+import re
+import queue
+import multiprocessing
+import zipfile
+import xml.etree.ElementTree as ET
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+from openpyxl import load_workbook
+
+from .perfil import PERFIL
+
+# Colunas lidas da planilha (em minúsculo); as demais são ignoradas
+COLUNAS_LEITURA = ('email', 'nome', 'sobrenome', 'cargo', 'time', 'matricula', 'limite de chats')
+COLUNAS_OBRIGATORIAS = ('email', 'nome', 'sobrenome', 'cargo', 'time', 'matricula')
+LINHA_CABECALHO = 3  # equivalente ao header=2 do pandas
+TAMANHO_BLOCO = 5000
+TAMANHO_FILA = 4  # blocos em espera por aba antes de o processo leitor pausar
+
+
+def _abrir(caminho):
+    return load_workbook(caminho, read_only=True, data_only=True)
+
+def listar_abas(caminho):
+    """Nomes das abas, lidos direto do workbook.xml (sem carregar células nem textos)."""
+    with zipfile.ZipFile(caminho) as pacote:
+        raiz = ET.fromstring(pacote.read('xl/workbook.xml'))
+    return [folha.get('name') for folha in raiz.iter() if folha.tag.endswith('}sheet')]
+
+def estimar_linhas(caminho):
+    """
+    Estimativa do total de linhas de dados, pela tag <dimension> de cada aba.
+    Retorna 0 quando a planilha não informa as dimensões.
+    """
+    total = 0
+    with zipfile.ZipFile(caminho) as pacote:
+        for nome in pacote.namelist():
+            if not (nome.startswith('xl/worksheets/') and nome.endswith('.xml')): continue
+            with pacote.open(nome) as arquivo:
+                inicio = arquivo.read(4096).decode('utf-8', errors='ignore')
+            encontrado = re.search(r'<(?:\w+:)?dimension ref="[A-Z]*\d*:?[A-Z]+(\d+)"', inicio)
+            if encontrado:
+                total += max(int(encontrado.group(1)) - LINHA_CABECALHO, 0)
+    return total
+
+def _normalizar_celula(valor):
+    """Converte a célula como o pd.read_excel faria (vazio -> NaN, float inteiro -> int)."""
+    if valor is None:
+        return math.nan
+    if isinstance(valor, float) and valor.is_integer():
+        return int(valor)
+    return valor
+
+def _mapear_cabecalho(cabecalho):
+    """Retorna {coluna_minuscula: (posição, nome_original)} para as colunas de interesse."""
+    colunas = {}
+    for posicao, nome in enumerate(cabecalho or ()):
+        if nome is None: continue
+        chave = str(nome).lower().strip()
+        if chave in COLUNAS_LEITURA and chave not in colunas:
+            colunas[chave] = (posicao, str(nome))
+    return colunas
+
+def _cabecalhos_da_pasta(wb):
+    cabecalhos = {}
+    for ws in wb.worksheets:
+        ws.reset_dimensions()
+        linha = next(ws.iter_rows(min_row=LINHA_CABECALHO, max_row=LINHA_CABECALHO, values_only=True), None)
+        cabecalhos[ws.title] = _mapear_cabecalho(linha)
+    return cabecalhos
+
+def ler_cabecalhos(caminho):
+    """Lê apenas a linha de cabeçalho de cada aba: {nome_aba: {coluna: (posição, nome)}}."""
+    wb = _abrir(caminho)
+    try:
+        return _cabecalhos_da_pasta(wb)
+    finally:
+        wb.close()
+
+def colunas_encontradas(cabecalhos):
+    """Colunas de interesse presentes em ao menos uma aba."""
+    encontradas = set()
+    for colunas in cabecalhos.values():
+        encontradas.update(colunas)
+    return encontradas
+
+def validar_cabecalhos(cabecalhos, obrigatorias=COLUNAS_OBRIGATORIAS):
+    """Garante que as colunas obrigatórias existem em ao menos uma aba."""
+    encontradas = colunas_encontradas(cabecalhos)
+    for col_necessaria in obrigatorias:
+        if col_necessaria not in encontradas:
+            raise ValueError(f"A planilha deve conter a coluna obrigatória: '{col_necessaria}' (a capitalização não importa).")
+
+def _blocos_da_aba(ws, tamanho_bloco):
+    ws.reset_dimensions()
+    linhas = ws.iter_rows(min_row=LINHA_CABECALHO, values_only=True)
+    colunas = _mapear_cabecalho(next(linhas, None))
+    if 'email' not in colunas:
+        return
+    posicoes = [colunas[chave][0] if chave in colunas else None for chave in COLUNAS_LEITURA]
+    nomes = [colunas[chave][1] if chave in colunas else chave for chave in COLUNAS_LEITURA]
+
+    bloco, numeros = [], []
+    for numero, linha in enumerate(linhas, start=LINHA_CABECALHO + 1):
+        valores = tuple(linha[p] if p is not None and p < len(linha) else None for p in posicoes)
+        if all(v is None for v in valores): continue
+        bloco.append(tuple(_normalizar_celula(v) for v in valores))
+        numeros.append(numero)
+        if len(bloco) >= tamanho_bloco:
+            yield nomes, bloco, numeros, ws.title
+            bloco, numeros = [], []
+    if bloco:
+        yield nomes, bloco, numeros, ws.title
+
+def ler_blocos_aba(caminho, nome_aba, tamanho_bloco=TAMANHO_BLOCO):
+    """
+    Gera blocos (colunas, linhas, números das linhas na planilha, aba) de uma aba
+    em modo somente leitura, com apenas as colunas de COLUNAS_LEITURA. Abas sem
+    coluna de email são ignoradas.
+    """
+    wb = _abrir(caminho)
+    try:
+        yield from _blocos_da_aba(wb[nome_aba], tamanho_bloco)
+    finally:
+        wb.close()
+
+def _bloco_para_dataframe(nomes, linhas, numeros, aba):
+    with PERFIL.etapa('montar_dataframe', itens=len(linhas)):
+        bloco = pd.DataFrame(linhas, columns=nomes, index=pd.Index(numeros, name='linha'), dtype=object)
+        bloco.attrs['aba'] = aba
+        return bloco
+
+def _produzir_aba(caminho, nome_aba, tamanho_bloco, fila, cancelado):
+    """Executado no processo leitor: envia os blocos da aba pela fila, terminando com None."""
+    def enviar(item):
+        while not cancelado.is_set():
+            try:
+                fila.put(item, timeout=0.5)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    try:
+        for bloco in ler_blocos_aba(caminho, nome_aba, tamanho_bloco):
+            if not enviar(bloco): return
+    except Exception as e:
+        enviar(ValueError(f"Erro ao ler a aba '{nome_aba}': {e}"))
+        return
+    enviar(None)
+
+def ler_xlsx_em_blocos(caminho, tamanho_bloco=TAMANHO_BLOCO, processos=None, obrigatorias=COLUNAS_OBRIGATORIAS, cabecalhos=None):
+    """
+    Lê todas as abas da planilha e gera DataFrames de até 'tamanho_bloco' linhas,
+    na ordem das abas. Com mais de uma aba, cada aba é lida em um processo
+    separado; a fila limitada por aba mantém a memória constante.
+
+    Os blocos sempre têm todas as COLUNAS_LEITURA (as ausentes vêm vazias); o
+    índice é o número da linha na planilha e attrs['aba'], o nome da aba. Se
+    'cabecalhos' for um dicionário, recebe os cabeçalhos lidos de cada aba.
+    """
+    processos = processos or os.cpu_count() or 1
+    if processos > 1:
+        abas = listar_abas(caminho)
+        processos = min(processos, len(abas))
+
+    if processos <= 1:
+        wb = _abrir(caminho)
+        try:
+            cabecalhos_lidos = _cabecalhos_da_pasta(wb)
+            if cabecalhos is not None: cabecalhos.update(cabecalhos_lidos)
+            validar_cabecalhos(cabecalhos_lidos, obrigatorias)
+            for ws in wb.worksheets:
+                for item in _blocos_da_aba(ws, tamanho_bloco):
+                    yield _bloco_para_dataframe(*item)
+        finally:
+            wb.close()
+        return
+
+    with multiprocessing.Manager() as gerenciador:
+        cancelado = gerenciador.Event()
+        filas = [gerenciador.Queue(TAMANHO_FILA) for _ in abas]
+        executor = ProcessPoolExecutor(max_workers=processos)
+        try:
+            tarefas = [executor.submit(_produzir_aba, caminho, aba, tamanho_bloco, fila, cancelado)
+                       for aba, fila in zip(abas, filas)]
+            # Valida os cabeçalhos enquanto os processos já começam a ler
+            cabecalhos_lidos = ler_cabecalhos(caminho)
+            if cabecalhos is not None: cabecalhos.update(cabecalhos_lidos)
+            validar_cabecalhos(cabecalhos_lidos, obrigatorias)
+            for fila, tarefa in zip(filas, tarefas):
+                while True:
+                    try:
+                        item = fila.get(timeout=0.5)
+                    except queue.Empty:
+                        if tarefa.done():
+                            tarefa.result()  # propaga falhas do processo leitor
+                            raise ValueError("O processo de leitura terminou sem concluir a aba.")
+                        continue
+                    if item is None: break
+                    if isinstance(item, Exception): raise item
+                    yield _bloco_para_dataframe(*item)
+        finally:
+            cancelado.set()
+            executor.shutdown(wait=True, cancel_futures=True)
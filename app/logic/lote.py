@@ -0,0 +1,73 @@
+# app/logic/lote.py
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from .data_processor import processar_em_blocos, _molde_de
+from .leitor_xlsx import ler_xlsx_em_blocos
+from .ramais import AlocadorAdiado, AlocadorRamais, resolver_pendentes
+from .validacao import RelatorioValidacao, ValidadorPlanilha
+
+
+def processar_arquivo(caminho, molde, usuarios_plataforma, team_id_map, gerar_ramais=False):
+    """
+    Valida e processa todas as abas de uma planilha. Retorna (usuarios,
+    times_nao_encontrados, times_sem_id, RelatorioValidacao). Os ramais ficam
+    pendentes (AlocadorAdiado) até resolver_pendentes.
+    """
+    usuarios, nao_encontrados, times_sem_id = [], set(), set()
+    validador = ValidadorPlanilha(molde)
+    blocos = ler_xlsx_em_blocos(caminho, processos=1)  # o paralelismo fica entre arquivos
+    for novos, nao_encontrados_bloco, sem_id_bloco in processar_em_blocos(
+            validador.filtrar(blocos), molde, usuarios_plataforma, gerar_ramais=gerar_ramais,
+            ramais_existentes=AlocadorAdiado(), team_id_map=team_id_map):
+        usuarios.extend(novos)
+        nao_encontrados.update(nao_encontrados_bloco)
+        times_sem_id.update(sem_id_bloco)
+    return usuarios, nao_encontrados, times_sem_id, validador.relatorio
+
+
+def processar_arquivos(caminhos, template_usuario, usuarios_plataforma, team_id_map, gerar_ramais=False,
+                       ramais_existentes=None, processos=None, ao_concluir=None, relatorio=None):
+    """
+    Processa várias planilhas em paralelo (um processo por arquivo) e junta os
+    usuários na ordem de 'caminhos'. Os ramais são pedidos com um AlocadorAdiado
+    nos processos e alocados aqui, na ordem dos arquivos, então o resultado não
+    depende de qual processo termina primeiro. 'ao_concluir(caminho, quantidade)'
+    é chamado assim que cada arquivo termina, na ordem em que terminam. Os problemas da validação de cada
+    arquivo vão para 'relatorio' (RelatorioValidacao), e um email que já veio
+    em um arquivo anterior é descartado nos seguintes.
+
+    Retorna (usuarios, times_nao_encontrados, times_sem_id, alocador).
+    """
+    molde = _molde_de(template_usuario)
+    relatorio = relatorio if relatorio is not None else RelatorioValidacao()
+    alocador = ramais_existentes if isinstance(ramais_existentes, AlocadorRamais) else AlocadorRamais(ramais_existentes)
+    processos = max(1, min(processos or os.cpu_count() or 1, len(caminhos)))
+
+    if processos == 1:
+        resultados = []
+        for caminho in caminhos:
+            resultados.append(processar_arquivo(caminho, molde, usuarios_plataforma, team_id_map, gerar_ramais))
+            if ao_concluir: ao_concluir(caminho, len(resultados[-1][0]))
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            tarefas = {executor.submit(processar_arquivo, caminho, molde, usuarios_plataforma, team_id_map, gerar_ramais): i
+                       for i, caminho in enumerate(caminhos)}
+            resultados = [None] * len(caminhos)
+            for tarefa in as_completed(tarefas):
+                i = tarefas[tarefa]
+                resultados[i] = tarefa.result()
+                molde.adotar(resultados[i][0])
+                if ao_concluir: ao_concluir(caminhos[i], len(resultados[i][0]))
+
+    usuarios, nao_encontrados, times_sem_id = [], set(), set()
+    entre_arquivos = ValidadorPlanilha(molde, relatorio)
+    for caminho, (novos, nao_encontrados_arquivo, sem_id_arquivo, relatorio_arquivo) in zip(caminhos, resultados):
+        nome = os.path.basename(caminho)
+        relatorio.juntar(relatorio_arquivo, prefixo=f"{nome} / ")
+        usuarios.extend(entre_arquivos.aceitar_usuarios(novos, nome))
+        nao_encontrados.update(nao_encontrados_arquivo)
+        times_sem_id.update(sem_id_arquivo)
+    if gerar_ramais:
+        resolver_pendentes(usuarios, alocador)
+    return usuarios, nao_encontrados, times_sem_id, alocador
@@ -0,0 +1,138 @@
+# app/logic/matriz_membros.py
+CAPACIDADE_INICIAL = 1024
+
+
+def empacotar(bitsets, quantidade, num_bytes):
+    """Matriz uint8 (quantidade x num_bytes) com os bitsets em little-endian, o layout de np.packbits(bitorder='little')."""
+    import numpy as np
+    dados = b"".join(bits.to_bytes(num_bytes, 'little') for bits in bitsets)
+    return np.frombuffer(dados, dtype=np.uint8).reshape(quantidade, num_bytes)
+
+
+class MatrizMembros:
+    """
+    Participação dos usuários em um grupo ('teams' ou 'roles') como matriz
+    booleana usuários x itens do template, guardada com 1 bit por célula no mesmo
+    layout dos bitsets dos registros. Operações em massa e contagens são
+    vetorizadas; só as linhas que mudam são gravadas de volta nos registros, que
+    continuam sendo a fonte para o formulário e as exportações.
+
+    As linhas acompanham a lista de usuários: quem altera a lista deve chamar
+    anexar/atualizar/reconstruir (o UserListModel faz isso).
+    """
+
+    def __init__(self, molde, grupo, usuarios=()):
+        self.molde = molde
+        self.grupo = grupo
+        self.total = len(molde.nomes.get(grupo, ()))
+        self.num_bytes = max((self.total + 7) // 8, 1)
+        self.reconstruir(usuarios)
+
+    def __len__(self):
+        return self._linhas
+
+    @property
+    def dados(self):
+        """Matriz empacotada (usuários x bytes) das linhas em uso."""
+        return self._dados[:self._linhas]
+
+    def booleana(self, linhas=None):
+        """Matriz booleana usuários x itens (desempacotada) das linhas pedidas."""
+        import numpy as np
+        dados = self.dados if linhas is None else self.dados[linhas]
+        return np.unpackbits(dados, axis=1, count=self.total, bitorder='little').view(bool)
+
+    # --- Sincronização com a lista ---
+
+    def reconstruir(self, usuarios):
+        import numpy as np
+        self._dados = np.zeros((max(len(usuarios), CAPACIDADE_INICIAL), self.num_bytes), dtype=np.uint8)
+        self._linhas = 0
+        self.anexar(usuarios)
+
+    def anexar(self, usuarios):
+        if not usuarios: return
+        import numpy as np
+        novas = empacotar((u.bits_ativos(self.grupo) for u in usuarios), len(usuarios), self.num_bytes)
+        fim = self._linhas + len(usuarios)
+        if fim > len(self._dados):
+            maior = np.zeros((max(fim, 2 * len(self._dados)), self.num_bytes), dtype=np.uint8)
+            maior[:self._linhas] = self.dados
+            self._dados = maior
+        self._dados[self._linhas:fim] = novas
+        self._linhas = fim
+
+    def atualizar(self, posicao, usuario):
+        """Relê a linha de um usuário alterado individualmente (ex.: pelo formulário)."""
+        self._dados[posicao] = empacotar((usuario.bits_ativos(self.grupo),), 1, self.num_bytes)[0]
+
+    # --- Operações em massa ---
+
+    def _mascara(self, nomes):
+        return empacotar((self.molde.mascara(self.grupo, nomes),), 1, self.num_bytes)[0]
+
+    def _linhas_alvo(self, linhas):
+        import numpy as np
+        if linhas is None:
+            return np.arange(self._linhas)
+        return np.asarray(linhas, dtype=np.intp)
+
+    def _gravar(self, usuarios, linhas, novos):
+        """Grava 'novos' nas linhas que mudaram e nos registros correspondentes."""
+        alteradas = (self._dados[linhas] != novos).any(axis=1)
+        linhas, novos = linhas[alteradas], novos[alteradas]
+        self._dados[linhas] = novos
+        for posicao, linha in zip(linhas.tolist(), novos):
+            usuarios[posicao].definir_bits(self.grupo, int.from_bytes(linha.tobytes(), 'little'))
+        return len(linhas)
+
+    def definir(self, usuarios, nomes, linhas=None):
+        """
+        Os usuários passam a ter exatamente os itens 'nomes'. Como definir_ativos,
+        grava todas as linhas (todas as posições passam a ser do registro).
+        """
+        linhas = self._linhas_alvo(linhas)
+        mascara = self._mascara(nomes)
+        self._dados[linhas] = mascara
+        bits = int.from_bytes(mascara.tobytes(), 'little')
+        for posicao in linhas.tolist():
+            usuarios[posicao].definir_bits(self.grupo, bits)
+        return len(linhas)
+
+    def adicionar(self, usuarios, nomes, linhas=None):
+        """Acrescenta os itens 'nomes', mantendo os outros. Retorna quantos usuários mudaram."""
+        linhas = self._linhas_alvo(linhas)
+        return self._gravar(usuarios, linhas, self._dados[linhas] | self._mascara(nomes))
+
+    def remover(self, usuarios, nomes, linhas=None):
+        """Retira os itens 'nomes'. Retorna quantos usuários mudaram."""
+        linhas = self._linhas_alvo(linhas)
+        return self._gravar(usuarios, linhas, self._dados[linhas] & ~self._mascara(nomes))
+
+    # --- Consultas ---
+
+    def contagens(self, linhas=None):
+        """Quantidade de usuários em cada item do template (array na ordem do template)."""
+        import numpy as np
+        dados = self.dados if linhas is None else self.dados[linhas]
+        contagem = np.zeros(self.num_bytes * 8, dtype=np.int64)
+        for bit in range(8):
+            contagem[bit::8] = ((dados >> bit) & 1).sum(axis=0, dtype=np.int64)
+        return contagem[:self.total]
+
+    def contagem_por_nome(self, linhas=None):
+        """{nome: usuários}; nomes repetidos no template contam uma vez por usuário."""
+        contagem, booleana = {}, None
+        por_posicao = self.contagens(linhas)
+        for nome, posicoes in self.molde.posicoes.get(self.grupo, {}).items():
+            if len(posicoes) == 1:
+                contagem[nome] = int(por_posicao[posicoes[0]])
+                continue
+            if booleana is None: booleana = self.booleana(linhas)
+            contagem[nome] = int(booleana[:, posicoes].any(axis=1).sum())
+        return contagem
+
+    def linhas_com(self, nomes):
+        """Posições dos usuários que têm algum dos itens 'nomes'."""
+        import numpy as np
+        return np.flatnonzero((self.dados & self._mascara(nomes)).any(axis=1))
@@ -0,0 +1,198 @@
+# app/logic/perfil.py
+import json
+import os
+import sys
+import threading
+import time
+
+
+def memoria_processo():
+    """
+    (RSS atual, pico de RSS desde o início do processo) em bytes; cada valor é
+    None se não for possível medi-lo nesta plataforma.
+    """
+    try:
+        import resource
+    except ImportError:
+        return _memoria_windows()
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    pico = pico if sys.platform == 'darwin' else pico * 1024  # Linux informa em KB
+    return _rss_atual_proc(), pico
+
+def _rss_atual_proc():
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+def _memoria_windows():
+    try:
+        import ctypes
+        from ctypes import wintypes
+
+        class PROCESS_MEMORY_COUNTERS(ctypes.Structure):
+            _fields_ = [('cb', wintypes.DWORD), ('PageFaultCount', wintypes.DWORD),
+                        ('PeakWorkingSetSize', ctypes.c_size_t), ('WorkingSetSize', ctypes.c_size_t),
+                        ('QuotaPeakPagedPoolUsage', ctypes.c_size_t), ('QuotaPagedPoolUsage', ctypes.c_size_t),
+                        ('QuotaPeakNonPagedPoolUsage', ctypes.c_size_t), ('QuotaNonPagedPoolUsage', ctypes.c_size_t),
+                        ('PagefileUsage', ctypes.c_size_t), ('PeakPagefileUsage', ctypes.c_size_t)]
+
+        contadores = PROCESS_MEMORY_COUNTERS()
+        contadores.cb = ctypes.sizeof(contadores)
+        processo = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(processo, ctypes.byref(contadores), contadores.cb):
+            return contadores.WorkingSetSize, contadores.PeakWorkingSetSize
+    except Exception:
+        pass
+    return None, None
+
+def _diferenca(fim, inicio):
+    return fim - inicio if fim is not None and inicio is not None else None
+
+
+class _Etapa:
+    """Contexto de uma etapa medida; 'itens' pode ser preenchido dentro do bloco."""
+    __slots__ = ('perfil', 'nome', 'categoria', 'itens', 'args', 'inicio', 'memoria')
+
+    def __init__(self, perfil, nome, categoria, itens, args):
+        self.perfil, self.nome, self.categoria, self.itens, self.args = perfil, nome, categoria, itens, args
+
+    def __enter__(self):
+        self.memoria = memoria_processo()
+        self.inicio = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.perfil.registrar(self.nome, self.inicio, time.perf_counter() - self.inicio, itens=self.itens,
+                              categoria=self.categoria, memoria_inicio=self.memoria, **self.args)
+        return False
+
+
+class _EtapaInativa:
+    __slots__ = ('itens',)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class Perfilador:
+    """
+    Medição opcional das etapas da aplicação (leitura, processamento, ramais,
+    lista, exportações e chamadas de API): duração, itens/s e memória. Desligado,
+    cada etapa custa só uma checagem. Os eventos podem ser exportados no formato
+    de trace do Chrome (chrome://tracing, Perfetto).
+
+    A memória de cada evento é o RSS no início e no fim da etapa e quanto o pico
+    de RSS do processo subiu durante ela ('pico_aumento': 0 se a etapa ficou
+    abaixo de um pico anterior). 'rss_pico_processo' é o pico desde o início do
+    processo, não da etapa.
+    """
+
+    def __init__(self, ativo=False):
+        self.ativo = ativo
+        self._eventos = []
+        self._lock = threading.Lock()
+        self._origem = time.perf_counter()
+
+    def etapa(self, nome, itens=0, categoria='etapa', **args):
+        """Contexto que mede um trecho: 'with PERFIL.etapa("processar_dataframe", itens=n): ...'"""
+        if not self.ativo:
+            return _EtapaInativa()
+        return _Etapa(self, nome, categoria, itens, args)
+
+    def registrar(self, nome, inicio, duracao, itens=0, categoria='etapa', memoria_inicio=None, **args):
+        """
+        Registra um evento já medido ('inicio' em time.perf_counter()).
+        'memoria_inicio' é o memoria_processo() do início da etapa; sem ele, só
+        o RSS do fim e o pico do processo são anotados.
+        """
+        if not self.ativo: return
+        rss_inicio, pico_inicio = memoria_inicio or (None, None)
+        rss_fim, pico_fim = memoria_processo()
+        thread = threading.current_thread()
+        evento = {'nome': nome, 'categoria': categoria, 'inicio': inicio - self._origem, 'duracao': duracao,
+                  'itens': itens or 0, 'rss_inicio': rss_inicio, 'rss_fim': rss_fim,
+                  'pico_aumento': _diferenca(pico_fim, pico_inicio), 'rss_pico_processo': pico_fim,
+                  'thread': thread.ident, 'nome_thread': thread.name, 'args': args}
+        with self._lock:
+            self._eventos.append(evento)
+
+    def medir_gerador(self, nome, gerador, contar=len):
+        """Mede o tempo gasto para produzir cada item do gerador (ex.: blocos lidos da planilha)."""
+        if not self.ativo:
+            return gerador
+        return self._gerador_medido(nome, iter(gerador), contar)
+
+    def _gerador_medido(self, nome, iterador, contar):
+        try:
+            while True:
+                memoria, inicio = memoria_processo(), time.perf_counter()
+                try:
+                    item = next(iterador)
+                except StopIteration:
+                    return
+                self.registrar(nome, inicio, time.perf_counter() - inicio, itens=contar(item), memoria_inicio=memoria)
+                yield item
+        finally:
+            fechar = getattr(iterador, 'close', None)
+            if fechar: fechar()
+
+    def eventos(self):
+        with self._lock:
+            return list(self._eventos)
+
+    def limpar(self):
+        with self._lock:
+            self._eventos.clear()
+
+    def resumo(self):
+        """
+        Totais por etapa, na ordem da primeira ocorrência. 'rss_fim' e
+        'pico_aumento' são os maiores entre as chamadas da etapa.
+        """
+        etapas = {}
+        for evento in self.eventos():
+            chave = (evento['categoria'], evento['nome'])
+            total = etapas.setdefault(chave, {'nome': evento['nome'], 'categoria': evento['categoria'], 'chamadas': 0,
+                                              'segundos': 0.0, 'itens': 0, 'bytes': 0,
+                                              'rss_fim': None, 'pico_aumento': None, 'rss_pico_processo': None})
+            total['chamadas'] += 1
+            total['segundos'] += evento['duracao']
+            total['itens'] += evento['itens']
+            total['bytes'] += evento['args'].get('bytes', 0) or 0
+            # O maior valor entre as chamadas da etapa
+            for campo in ('rss_fim', 'pico_aumento', 'rss_pico_processo'):
+                if evento[campo] is not None:
+                    total[campo] = max(total[campo] or 0, evento[campo])
+        for total in etapas.values():
+            total['itens_por_segundo'] = total['itens'] / total['segundos'] if total['segundos'] > 0 and total['itens'] else None
+        return list(etapas.values())
+
+    def resumo_texto(self, categoria='etapa', limite=4):
+        """Resumo curto para a barra de status: as etapas mais demoradas."""
+        etapas = sorted((e for e in self.resumo() if e['categoria'] == categoria), key=lambda e: -e['segundos'])
+        return ", ".join(f"{e['nome']} {e['segundos']:.2f}s" for e in etapas[:limite])
+
+    def exportar_trace(self, caminho):
+        """Grava os eventos no formato Trace Event do Chrome (JSON), com tempos em microssegundos."""
+        pid = os.getpid()
+        eventos = self.eventos()
+        trace = [{'name': 'thread_name', 'ph': 'M', 'pid': pid, 'tid': tid, 'args': {'name': nome}}
+                 for tid, nome in {e['thread']: e['nome_thread'] for e in eventos}.items()]
+        for evento in eventos:
+            args = dict(evento['args'], itens=evento['itens'])
+            for campo in ('rss_inicio', 'rss_fim', 'pico_aumento', 'rss_pico_processo'):
+                if evento[campo] is not None: args[campo] = evento[campo]
+            trace.append({'name': evento['nome'], 'cat': evento['categoria'], 'ph': 'X', 'pid': pid, 'tid': evento['thread'],
+                          'ts': round(evento['inicio'] * 1e6, 3), 'dur': round(evento['duracao'] * 1e6, 3), 'args': args})
+        with open(caminho, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': trace, 'displayTimeUnit': 'ms'}, f, ensure_ascii=False)
+        return len(eventos)
+
+
+# Instância usada por toda a aplicação; ligada pela variável PROFILING ou pela interface
+PERFIL = Perfilador(ativo=os.getenv("PROFILING", "").lower() in ("1", "true", "sim"))
@@ -0,0 +1,354 @@
+# app/logic/ramais.py
+import os
+
+DIGITOS_RAMAL = 4
+
+
+def faixa_reserva(texto):
+    """Converte "9000-9999" na faixa (range) de ramais reserva; None se 'texto' estiver vazio."""
+    if not texto or not texto.strip(): return None
+    inicio, _, fim = texto.strip().partition('-')
+    if not (inicio.strip().isdigit() and fim.strip().isdigit()) or int(inicio) > int(fim) or int(fim) >= 10 ** DIGITOS_RAMAL:
+        raise ValueError(f"Faixa de ramais reserva inválida: '{texto}' (use, por exemplo, 9000-9999).")
+    return range(int(inicio), int(fim) + 1)
+
+def reserva_configurada():
+    """Faixa reserva definida em RAMAIS_RESERVA (ex.: "9000-9999"), ou None."""
+    return faixa_reserva(os.getenv("RAMAIS_RESERVA"))
+
+
+class PrefixoEsgotadoError(ValueError):
+    """Levantada quando não há mais ramais livres para um prefixo."""
+
+    def __init__(self, prefixo):
+        super().__init__(f"Não há ramais livres para o prefixo '{prefixo}'.")
+        self.prefixo = prefixo
+
+
+class CapacidadePrefixo:
+    """Pedidos de ramal de um prefixo frente aos ramais livres dele e o destino dos que não couberam."""
+
+    def __init__(self, demanda, livres, na_reserva=0, sem_ramal=0):
+        self.demanda = demanda
+        self.livres = livres
+        self.na_reserva = na_reserva
+        self.sem_ramal = sem_ramal
+
+    @property
+    def excedente(self):
+        return max(self.demanda - self.livres, 0)
+
+
+class PlanoRamais:
+    """
+    Capacidade de cada prefixo (ID do time de maior ID) frente aos usuários que
+    pedem ramal nele, calculada antes da alocação. Depois de alocar, cada
+    prefixo também diz quantos usuários foram para a faixa reserva e quantos
+    ficaram sem ramal.
+    """
+
+    def __init__(self):
+        self.prefixos = {}
+
+    @property
+    def excedentes(self):
+        return {prefixo: c for prefixo, c in sorted(self.prefixos.items()) if c.excedente}
+
+    @property
+    def sem_ramal(self):
+        return sum(c.sem_ramal for c in self.prefixos.values())
+
+    def juntar(self, outro):
+        """Soma os pedidos de outro plano (ex.: do próximo bloco); os livres são os do primeiro plano de cada prefixo."""
+        for prefixo, c in outro.prefixos.items():
+            atual = self.prefixos.get(prefixo)
+            if atual is None:
+                self.prefixos[prefixo] = CapacidadePrefixo(c.demanda, c.livres, c.na_reserva, c.sem_ramal)
+            else:
+                atual.demanda += c.demanda
+                atual.na_reserva += c.na_reserva
+                atual.sem_ramal += c.sem_ramal
+
+    def resumo_texto(self, todos=False):
+        """Uma linha por prefixo com excedente (ou por prefixo, com 'todos')."""
+        linhas = []
+        for prefixo, c in (sorted(self.prefixos.items()) if todos else self.excedentes.items()):
+            destino = [f"{c.na_reserva} na faixa reserva" if c.na_reserva else "", f"{c.sem_ramal} sem ramal" if c.sem_ramal else ""]
+            linhas.append(f"Prefixo {prefixo}: {c.demanda} usuários para {c.livres} ramais livres"
+                          + (f" ({', '.join(filter(None, destino))})" if any(destino) else ""))
+        return "\n".join(linhas)
+
+
+class AlocadorRamais:
+    """
+    Alocador de ramais de 4 dígitos por prefixo (ID do time).
+
+    Para cada prefixo mantém um bitmap de posições livres e um cursor para a
+    primeira posição possivelmente livre, então cada alocação é O(1) amortizado.
+    A ordem é determinística: sempre o menor sequencial livre, como em
+    gerar_ramal_unico. Cargas grandes usam alocar_pedidos, que planeja a
+    capacidade de todos os prefixos e aloca cada um em bloco. Com uma faixa
+    'reserva' (range de ramais, ver reserva_configurada), quem não cabe no
+    próprio prefixo recebe o menor ramal livre da faixa.
+    """
+
+    def __init__(self, ramais_existentes=None, reserva=None):
+        # Conjunto de ramais ocupados; se um set for passado ele é atualizado no lugar
+        self.ramais = ramais_existentes if ramais_existentes is not None else set()
+        self.reserva = reserva
+        self.esgotados = set()
+        self.plano = PlanoRamais()  # acumulado de todas as chamadas de alocar_pedidos
+        self._livres = {}
+        self._cursores = {}
+        self._ocupados_por_prefixo = {}
+        self._livres_reserva = None
+        self._cursor_reserva = 0
+        for ramal in self.ramais:
+            self._indexar_ocupado(str(ramal))
+
+    def _indexar_ocupado(self, ramal):
+        if len(ramal) != DIGITOS_RAMAL or not ramal.isdigit():
+            return
+        for tamanho in range(1, DIGITOS_RAMAL):
+            self._ocupados_por_prefixo.setdefault(ramal[:tamanho], []).append(int(ramal[tamanho:]))
+
+    def _bitmap(self, prefixo):
+        """Retorna (criando sob demanda) o bitmap de posições livres do prefixo."""
+        livres = self._livres.get(prefixo)
+        if livres is None:
+            capacidade = 10 ** (DIGITOS_RAMAL - len(prefixo))
+            livres = bytearray(b'\x01') * capacidade
+            livres[0] = 0  # o sequencial 0 nunca é usado
+            for sequencial in self._ocupados_por_prefixo.pop(prefixo, []):
+                livres[sequencial] = 0
+            self._livres[prefixo] = livres
+            self._cursores[prefixo] = 1
+        return livres
+
+    def _localizar(self, ramal):
+        """Retorna os pares (prefixo, sequencial) aos quais o ramal pertence."""
+        ramal = str(ramal)
+        if len(ramal) != DIGITOS_RAMAL or not ramal.isdigit():
+            return []
+        return [(ramal[:tamanho], int(ramal[tamanho:])) for tamanho in range(1, DIGITOS_RAMAL)]
+
+    def _bitmap_reserva(self):
+        """Bitmap (criado sob demanda) dos ramais livres da faixa reserva."""
+        if self._livres_reserva is None:
+            livres = bytearray(b'\x01') * len(self.reserva)
+            for ramal in self.ramais:
+                ramal = str(ramal)
+                if len(ramal) == DIGITOS_RAMAL and ramal.isdigit() and int(ramal) in self.reserva:
+                    livres[int(ramal) - self.reserva.start] = 0
+            self._livres_reserva = livres
+        return self._livres_reserva
+
+    def _ocupar_numeros(self, numeros):
+        """Marca de uma vez os ramais 'numeros' (array numpy dos valores de 4 dígitos) em todos os bitmaps."""
+        import numpy as np
+        for tamanho in range(1, DIGITOS_RAMAL):
+            escala = 10 ** (DIGITOS_RAMAL - tamanho)
+            pais, sequenciais = numeros // escala, numeros % escala
+            for pai in set(pais.tolist()):
+                prefixo = f"{pai:0{tamanho}d}"
+                do_pai = sequenciais[pais == pai]
+                livres = self._livres.get(prefixo)
+                if livres is not None:
+                    np.frombuffer(livres, dtype=np.uint8)[do_pai] = 0
+                else:
+                    self._ocupados_por_prefixo.setdefault(prefixo, []).extend(do_pai.tolist())
+        if self._livres_reserva is not None:
+            na_faixa = numeros[(numeros >= self.reserva.start) & (numeros < self.reserva.stop)]
+            np.frombuffer(self._livres_reserva, dtype=np.uint8)[na_faixa - self.reserva.start] = 0
+
+    def alocar(self, prefixo):
+        """
+        Aloca o próximo ramal livre do prefixo (ou da faixa reserva, se o prefixo
+        esgotou). Levanta PrefixoEsgotadoError se não houver.
+        """
+        prefixo = str(prefixo)
+        num_digitos_seq = DIGITOS_RAMAL - len(prefixo)
+        if num_digitos_seq < 1: return prefixo[:DIGITOS_RAMAL]
+
+        livres = self._bitmap(prefixo)
+        sequencial = livres.find(1, self._cursores[prefixo])
+        if sequencial == -1:
+            self._cursores[prefixo] = len(livres)
+            self.esgotados.add(prefixo)
+            reserva = self.alocar_reserva(1)
+            if not reserva: raise PrefixoEsgotadoError(prefixo)
+            return reserva[0]
+        ramal = f"{prefixo}{sequencial:0{num_digitos_seq}d}"
+        self.reservar(ramal)
+        self._cursores[prefixo] = sequencial + 1
+        return ramal
+
+    def alocar_bloco(self, prefixo, quantidade):
+        """
+        Aloca de uma vez os 'quantidade' menores ramais livres do prefixo, na ordem
+        (o mesmo que 'quantidade' chamadas de alocar, sem a faixa reserva). Retorna
+        menos ramais se o prefixo esgotar.
+        """
+        prefixo = str(prefixo)
+        num_digitos_seq = DIGITOS_RAMAL - len(prefixo)
+        if quantidade <= 0: return []
+        if num_digitos_seq < 1: return [prefixo[:DIGITOS_RAMAL]] * quantidade
+
+        import numpy as np
+        livres = self._bitmap(prefixo)
+        cursor = self._cursores[prefixo]
+        sequenciais = np.flatnonzero(np.frombuffer(livres, dtype=np.uint8)[cursor:])[:quantidade] + cursor
+        if len(sequenciais) < quantidade:
+            self._cursores[prefixo] = len(livres)
+            self.esgotados.add(prefixo)
+        elif len(sequenciais):
+            self._cursores[prefixo] = int(sequenciais[-1]) + 1
+        return self._ocupar_bloco(int(prefixo) * 10 ** num_digitos_seq + sequenciais)
+
+    def alocar_reserva(self, quantidade):
+        """Aloca de uma vez até 'quantidade' ramais da faixa reserva (os menores livres, na ordem)."""
+        if self.reserva is None or quantidade <= 0: return []
+        import numpy as np
+        livres = self._bitmap_reserva()
+        cursor = self._cursor_reserva
+        posicoes = np.flatnonzero(np.frombuffer(livres, dtype=np.uint8)[cursor:])[:quantidade] + cursor
+        self._cursor_reserva = int(posicoes[-1]) + 1 if len(posicoes) == quantidade else len(livres)
+        return self._ocupar_bloco(posicoes + self.reserva.start)
+
+    def _ocupar_bloco(self, numeros):
+        ramais = [f"{numero:0{DIGITOS_RAMAL}d}" for numero in numeros.tolist()]
+        self.ramais.update(ramais)
+        self._ocupar_numeros(numeros)
+        return ramais
+
+    def planejar(self, demanda):
+        """
+        PlanoRamais para 'demanda' ({prefixo: usuários que pedem ramal nele}), sem
+        alocar nada. Os prefixos mais longos (com menos ramais) vêm primeiro, e o
+        que eles vão ocupar dentro de um prefixo mais curto já sai dos livres dele.
+        """
+        plano, alocados = PlanoRamais(), {}
+        for prefixo in sorted(demanda, key=lambda p: (-len(p), p)):
+            if len(prefixo) >= DIGITOS_RAMAL:
+                livres = demanda[prefixo]
+            else:
+                livres = self.livres(prefixo) - sum(n for outro, n in alocados.items() if outro.startswith(prefixo))
+            plano.prefixos[prefixo] = CapacidadePrefixo(demanda[prefixo], livres)
+            alocados[prefixo] = min(demanda[prefixo], livres)
+        return plano
+
+    def alocar_pedidos(self, pedidos):
+        """
+        Planeja e aloca os ramais de 'pedidos', pares (usuario, prefixo): um bloco
+        por prefixo, na ordem de planejar, com os usuários de cada prefixo na
+        ordem da lista. Quem não couber vai para a faixa reserva (se houver) ou
+        fica sem ramal. Retorna o PlanoRamais, também somado a self.plano.
+        """
+        por_prefixo = {}
+        for usuario, prefixo in pedidos:
+            por_prefixo.setdefault(str(prefixo), []).append(usuario)
+        plano = self.planejar({prefixo: len(usuarios) for prefixo, usuarios in por_prefixo.items()})
+        transbordados = []
+        for prefixo, capacidade in plano.prefixos.items():
+            usuarios = por_prefixo[prefixo]
+            ramais = self.alocar_bloco(prefixo, len(usuarios))
+            for usuario, ramal in zip(usuarios, ramais):
+                usuario['extension_number'] = ramal
+            transbordados.extend((usuario, capacidade) for usuario in usuarios[len(ramais):])
+        reserva = self.alocar_reserva(len(transbordados))
+        for posicao, (usuario, capacidade) in enumerate(transbordados):
+            if posicao < len(reserva):
+                usuario['extension_number'] = reserva[posicao]
+                capacidade.na_reserva += 1
+            else:
+                usuario['extension_number'] = ""
+                capacidade.sem_ramal += 1
+        self.plano.juntar(plano)
+        return plano
+
+    def reservar(self, ramal):
+        """Marca um ramal como ocupado (ex.: definido manualmente no formulário)."""
+        ramal = str(ramal)
+        if not ramal or ramal in self.ramais: return
+        self.ramais.add(ramal)
+        if self._livres_reserva is not None and ramal.isdigit() and int(ramal) in self.reserva:
+            self._livres_reserva[int(ramal) - self.reserva.start] = 0
+        for prefixo, sequencial in self._localizar(ramal):
+            livres = self._livres.get(prefixo)
+            if livres is not None:
+                livres[sequencial] = 0
+            else:
+                self._ocupados_por_prefixo.setdefault(prefixo, []).append(sequencial)
+
+    def liberar(self, ramal):
+        """Devolve um ramal ao conjunto de livres (ex.: usuário editado ou removido)."""
+        ramal = str(ramal)
+        if ramal not in self.ramais: return
+        self.ramais.discard(ramal)
+        if self._livres_reserva is not None and len(ramal) == DIGITOS_RAMAL and ramal.isdigit() and int(ramal) in self.reserva:
+            self._livres_reserva[int(ramal) - self.reserva.start] = 1
+            self._cursor_reserva = min(self._cursor_reserva, int(ramal) - self.reserva.start)
+        for prefixo, sequencial in self._localizar(ramal):
+            livres = self._livres.get(prefixo)
+            if livres is not None:
+                if sequencial > 0:
+                    livres[sequencial] = 1
+                    self._cursores[prefixo] = min(self._cursores[prefixo], sequencial)
+                    self.esgotados.discard(prefixo)
+            else:
+                ocupados = self._ocupados_por_prefixo.get(prefixo)
+                if ocupados and sequencial in ocupados:
+                    ocupados.remove(sequencial)
+
+    def livres(self, prefixo):
+        """Quantidade de ramais ainda disponíveis para o prefixo."""
+        prefixo = str(prefixo)
+        if len(prefixo) >= DIGITOS_RAMAL: return 0
+        return self._bitmap(prefixo).count(1)
+
+    def copia(self):
+        """Cópia independente do alocador (e do conjunto de ramais)."""
+        return AlocadorRamais(set(self.ramais), reserva=self.reserva)
+
+
+class RamalPendente(str):
+    """
+    Ramal ainda não alocado (vale "" como texto). Guarda o prefixo pedido até a
+    alocação real em resolver_pendentes.
+    """
+
+    def __new__(cls, prefixo):
+        ramal = super().__new__(cls, "")
+        ramal.prefixo = prefixo
+        return ramal
+
+    def __reduce__(self):
+        return (RamalPendente, (self.prefixo,))
+
+
+class AlocadorAdiado(AlocadorRamais):
+    """
+    Alocador para processos paralelos: não escolhe o ramal, apenas marca o usuário
+    com um RamalPendente. Resolvendo os pendentes na ordem dos arquivos, o
+    resultado é o mesmo de um processamento sequencial, qualquer que seja a
+    ordem em que os processos terminam.
+    """
+
+    def alocar(self, prefixo):
+        return RamalPendente(str(prefixo))
+
+    def alocar_pedidos(self, pedidos):
+        for usuario, prefixo in pedidos:
+            usuario['extension_number'] = RamalPendente(str(prefixo))
+        return PlanoRamais()
+
+
+def resolver_pendentes(usuarios, alocador):
+    """
+    Aloca com alocador.alocar_pedidos os ramais marcados por um AlocadorAdiado
+    (na ordem da lista, dentro de cada prefixo). Retorna quantos foram alocados.
+    """
+    pedidos = [(usuario, usuario['extension_number']) for usuario in usuarios
+               if isinstance(usuario.get('extension_number'), RamalPendente)]
+    plano = alocador.alocar_pedidos([(usuario, pendente.prefixo) for usuario, pendente in pedidos])
+    return len(pedidos) - plano.sem_ramal
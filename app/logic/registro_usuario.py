@@ -0,0 +1,322 @@
+# app/logic/registro_usuario.py
+import copy
+from collections.abc import MutableMapping
+
+# Listas do template que viram bitsets no registro compacto
+GRUPOS = ('teams', 'roles')
+VALORES_ATIVOS = (1, "1", True)
+
+
+class _Ausente:
+    """Marca uma chave do template removida do registro (preservada ao serializar)."""
+    def __reduce__(self):
+        return '_AUSENTE'
+
+
+_AUSENTE = _Ausente()
+
+
+def _imutavel(self, *args, **kwargs):
+    raise TypeError("Altere os times e cargos pelo registro: registro[grupo] = lista ou definir_itens/definir_ativos.")
+
+
+class _ItemGrupo(dict):
+    """
+    Item de 'teams'/'roles' devolvido por RegistroUsuario[grupo]: atribuir 'value'
+    altera o registro (user['teams'][0]['value'] = 1); as outras chaves não mudam.
+    Cópias e pickle viram dicionários comuns.
+    """
+    __slots__ = ('_registro', '_grupo', '_posicao')
+
+    def __init__(self, registro, grupo, posicao, item):
+        super().__init__(item)
+        self._registro, self._grupo, self._posicao = registro, grupo, posicao
+
+    def __setitem__(self, chave, valor):
+        if chave != 'value': _imutavel(self)
+        ativo = valor in VALORES_ATIVOS
+        self._registro._definir_posicao(self._grupo, self._posicao, ativo)
+        super().__setitem__('value', int(ativo))
+
+    def update(self, *args, **kwargs):
+        for chave, valor in dict(*args, **kwargs).items():
+            self[chave] = valor
+
+    __delitem__ = pop = popitem = setdefault = clear = __ior__ = _imutavel
+
+    def __reduce__(self):
+        return dict, (dict(self),)
+
+
+class _ListaGrupo(list):
+    """Lista de _ItemGrupo: a lista em si não pode ser alterada no lugar (a mudança se perderia)."""
+    __slots__ = ()
+
+    def __init__(self, registro, grupo, itens):
+        super().__init__(_ItemGrupo(registro, grupo, posicao, item) for posicao, item in enumerate(itens))
+
+    __setitem__ = __delitem__ = append = extend = insert = pop = remove = clear = sort = reverse = _imutavel
+    __iadd__ = __imul__ = _imutavel
+
+    def __reduce__(self):
+        return list, ([dict(item) for item in self],)
+
+
+class TemplateUsuario:
+    """
+    Template de usuário compartilhado por todos os registros.
+
+    Guarda a ordem das chaves, os itens de 'teams'/'roles' e, para cada nome,
+    a máscara de bits e a lista das posições correspondentes no template.
+    """
+
+    def __init__(self, template):
+        self.template = template
+        self.itens, self.nomes, self.mascaras, self.posicoes, self.padrao = {}, {}, {}, {}, {}
+        self.padrao_exportacao = {}
+        for grupo in GRUPOS:
+            itens = template.get(grupo)
+            if not isinstance(itens, list):
+                continue
+            self.itens[grupo] = itens
+            self.nomes[grupo] = [item.get('name') for item in itens]
+            mascaras, posicoes, padrao = {}, {}, 0
+            for posicao, item in enumerate(itens):
+                bit = 1 << posicao
+                mascaras[item.get('name')] = mascaras.get(item.get('name'), 0) | bit
+                posicoes.setdefault(item.get('name'), []).append(posicao)
+                if item.get('value') in VALORES_ATIVOS:
+                    padrao |= bit
+            self.mascaras[grupo] = mascaras
+            self.posicoes[grupo] = posicoes
+            self.padrao[grupo] = padrao
+            # Nas exportações só conta como ativo o item com value == 1 (o "1" em texto não)
+            self.padrao_exportacao[grupo] = sum(1 << posicao for posicao, item in enumerate(itens) if item.get('value') == 1)
+
+    def novo_registro(self):
+        """Cria um registro vazio (equivalente a um deepcopy do template)."""
+        return RegistroUsuario(self)
+
+    def registro_de_dict(self, dados):
+        """Converte um dicionário de usuário completo em um registro compacto."""
+        registro = RegistroUsuario(self)
+        for chave, valor in dados.items():
+            registro[chave] = valor
+        for chave in self.template:
+            if chave not in dados:
+                del registro[chave]
+        return registro
+
+    def adotar(self, registros):
+        """
+        Faz registros vindos de outro processo (cada lote chega com sua própria cópia
+        do template) voltarem a compartilhar este molde. O template deve ser o mesmo.
+        """
+        conferidos = {id(self)}
+        for registro in registros:
+            if id(registro.molde) not in conferidos:
+                if registro.molde.template != self.template:
+                    raise ValueError("O registro foi criado com um template diferente.")
+                conferidos.add(id(registro.molde))
+            registro.molde = self
+        return registros
+
+    def registro_de_estado(self, campos, removidas, times, times_definidos, cargos, cargos_definidos):
+        """Recria um registro a partir de RegistroUsuario.estado() (gravado com este mesmo template)."""
+        registro = RegistroUsuario(self)
+        registro._campos = campos
+        for chave in removidas:
+            registro._campos[chave] = _AUSENTE
+        registro._times, registro._times_definidos = times, times_definidos
+        registro._cargos, registro._cargos_definidos = cargos, cargos_definidos
+        return registro
+
+    def mascara(self, grupo, nomes):
+        """Máscara de bits das posições cujos nomes estão em 'nomes'."""
+        mascaras = self.mascaras.get(grupo, {})
+        bits = 0
+        for nome in nomes:
+            bits |= mascaras.get(nome, 0)
+        return bits
+
+    def total(self, grupo):
+        """Máscara com todas as posições do grupo."""
+        return (1 << len(self.itens.get(grupo, ()))) - 1
+
+
+class RegistroUsuario(MutableMapping):
+    """
+    Usuário compacto: aponta para o TemplateUsuario compartilhado e guarda só os
+    campos que diferem dele. A participação em times e cargos é um bitset
+    indexado pela posição no template; o dicionário completo só é montado sob
+    demanda (para_dict) para o formulário e as exportações.
+
+    registro['teams'] (e 'roles') monta a lista a cada acesso: atribuir 'value' a
+    um item altera o registro, mas acrescentar, remover ou trocar itens da lista
+    levanta TypeError em vez de se perder; para isso, atribua a lista inteira.
+    para_dict devolve listas comuns, desligadas do registro.
+    """
+    __slots__ = ('molde', '_campos', '_times', '_cargos', '_times_definidos', '_cargos_definidos')
+
+    _SLOTS_GRUPO = {'teams': ('_times', '_times_definidos'), 'roles': ('_cargos', '_cargos_definidos')}
+
+    def __init__(self, molde):
+        self.molde = molde
+        self._campos = {}
+        self._times = self._cargos = 0
+        self._times_definidos = self._cargos_definidos = 0
+
+    # --- Participação em times e cargos ---
+
+    def _bits(self, grupo):
+        slot_bits, slot_definidos = self._SLOTS_GRUPO[grupo]
+        return getattr(self, slot_bits), getattr(self, slot_definidos)
+
+    def _definir_bits(self, grupo, bits, definidos):
+        slot_bits, slot_definidos = self._SLOTS_GRUPO[grupo]
+        setattr(self, slot_bits, bits)
+        setattr(self, slot_definidos, definidos)
+
+    def bits_ativos(self, grupo):
+        """Bitset efetivo do grupo (posições definidas no registro ou, senão, no template)."""
+        bits, definidos = self._bits(grupo)
+        return (bits & definidos) | (self.molde.padrao.get(grupo, 0) & ~definidos)
+
+    def bits_exportacao(self, grupo):
+        """
+        Bitset das posições com value == 1 no dicionário materializado, a regra usada
+        pelo CSV. Zero se o grupo foi removido ou substituído por algo que não é lista.
+        """
+        if grupo not in self.molde.itens or grupo in self._campos: return 0
+        bits, definidos = self._bits(grupo)
+        return (bits & definidos) | (self.molde.padrao_exportacao.get(grupo, 0) & ~definidos)
+
+    def ativos(self, grupo):
+        """Nomes dos itens ativos do grupo, na ordem do template."""
+        bits = self.bits_ativos(grupo)
+        return [nome for posicao, nome in enumerate(self.molde.nomes.get(grupo, ())) if bits >> posicao & 1]
+
+    def definir_ativos(self, grupo, nomes):
+        """Ativa exatamente os itens com os nomes dados e desativa todos os outros."""
+        if grupo not in self.molde.itens: return
+        self._definir_bits(grupo, self.molde.mascara(grupo, nomes), self.molde.total(grupo))
+
+    def definir_bits(self, grupo, bits):
+        """Define o bitset efetivo do grupo (todas as posições passam a ser do registro)."""
+        if grupo not in self.molde.itens: return
+        total = self.molde.total(grupo)
+        self._definir_bits(grupo, bits & total, total)
+
+    def definir_itens(self, grupo, valores):
+        """Define itens individuais a partir de um dicionário {nome: ativo}."""
+        if grupo not in self.molde.itens: return
+        bits, definidos = self._bits(grupo)
+        for nome, ativo in valores.items():
+            mascara = self.molde.mascaras[grupo].get(nome, 0)
+            bits = (bits | mascara) if ativo else (bits & ~mascara)
+            definidos |= mascara
+        self._definir_bits(grupo, bits, definidos)
+
+    def _definir_posicao(self, grupo, posicao, ativo):
+        bits, definidos = self._bits(grupo)
+        bit = 1 << posicao
+        self._definir_bits(grupo, (bits | bit) if ativo else (bits & ~bit), definidos | bit)
+
+    def _materializar_grupo(self, grupo):
+        bits, definidos = self._bits(grupo)
+        itens = []
+        for posicao, item in enumerate(self.molde.itens[grupo]):
+            novo_item = dict(item)
+            if definidos >> posicao & 1:
+                novo_item['value'] = bits >> posicao & 1
+            itens.append(novo_item)
+        return itens
+
+    def _carregar_grupo(self, grupo, itens):
+        valores = {}
+        for item in itens or []:
+            valores[item.get('name')] = item.get('value') in VALORES_ATIVOS
+        self._definir_bits(grupo, 0, 0)
+        self.definir_itens(grupo, valores)
+
+    # --- Interface de dicionário ---
+
+    def __getitem__(self, chave):
+        valor = self._campos.get(chave, _AUSENTE)
+        if valor is not _AUSENTE:
+            return valor
+        if chave in self.molde.template and chave not in self._campos:
+            if chave in self.molde.itens:
+                return _ListaGrupo(self, chave, self._materializar_grupo(chave))
+            valor = self.molde.template[chave]
+            return copy.deepcopy(valor) if isinstance(valor, (dict, list)) else valor
+        raise KeyError(chave)
+
+    def get(self, chave, default=None):
+        try:
+            return self[chave]
+        except KeyError:
+            return default
+
+    def __setitem__(self, chave, valor):
+        if chave in self.molde.itens and isinstance(valor, list):
+            self._campos.pop(chave, None)
+            self._carregar_grupo(chave, valor)
+            return
+        original = self.molde.template.get(chave, _AUSENTE)
+        if original is not _AUSENTE and type(original) is type(valor) and original == valor \
+                and not isinstance(valor, (dict, list)):
+            self._campos.pop(chave, None)
+        else:
+            self._campos[chave] = valor
+
+    def __delitem__(self, chave):
+        if chave in self.molde.template:
+            if self._campos.get(chave, None) is _AUSENTE:
+                raise KeyError(chave)
+            self._campos[chave] = _AUSENTE
+        else:
+            del self._campos[chave]
+
+    def __contains__(self, chave):
+        if chave in self._campos:
+            return self._campos[chave] is not _AUSENTE
+        return chave in self.molde.template
+
+    def __iter__(self):
+        for chave in self.molde.template:
+            if self._campos.get(chave, None) is not _AUSENTE:
+                yield chave
+        for chave, valor in self._campos.items():
+            if chave not in self.molde.template and valor is not _AUSENTE:
+                yield chave
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def para_dict(self):
+        """Monta o dicionário completo do usuário (mesmo formato do template), sem ligação com o registro."""
+        return {chave: self._materializar_grupo(chave) if chave in self.molde.itens and chave not in self._campos
+                else self[chave] for chave in self}
+
+    def estado(self):
+        """
+        Estado compacto para gravar fora da memória (sessão SQLite): os campos que
+        diferem do template, as chaves do template removidas e os bitsets de times
+        e cargos. O inverso é TemplateUsuario.registro_de_estado.
+        """
+        campos, removidas = dict(self._campos), []
+        if _AUSENTE in campos.values():
+            removidas = [chave for chave, valor in self._campos.items() if valor is _AUSENTE]
+            for chave in removidas: del campos[chave]
+        return campos, removidas, self._times, self._times_definidos, self._cargos, self._cargos_definidos
+
+    def copy(self):
+        registro = RegistroUsuario(self.molde)
+        registro._campos = dict(self._campos)
+        registro._times, registro._cargos = self._times, self._cargos
+        registro._times_definidos, registro._cargos_definidos = self._times_definidos, self._cargos_definidos
+        return registro
+
+    def __repr__(self):
+        return f"RegistroUsuario({self.get('email')!r})"
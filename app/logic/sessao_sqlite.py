@@ -0,0 +1,243 @@
+# app/logic/sessao_sqlite.py
+import json
+import os
+import queue
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+from datetime import datetime
+
+from .registro_usuario import TemplateUsuario
+
+VERSAO_ESQUEMA = 1
+TAMANHO_LEITURA = 5000
+_CABECALHO_SQLITE = b"SQLite format 3\x00"
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS usuarios (
+    posicao INTEGER PRIMARY KEY,
+    email TEXT,
+    campos TEXT NOT NULL,
+    removidas TEXT,
+    times BLOB, times_definidos BLOB,
+    cargos BLOB, cargos_definidos BLOB
+);
+CREATE INDEX IF NOT EXISTS usuarios_email ON usuarios (email);
+CREATE TABLE IF NOT EXISTS ramais (ramal TEXT PRIMARY KEY);
+"""
+
+ResumoSessao = namedtuple('ResumoSessao', ['usuarios', 'salvo_em', 'template'])
+
+
+def caminho_padrao():
+    return os.getenv("SESSION_DB") or os.path.join(os.path.expanduser("~"), ".ccaip_user_manager", "sessao.sqlite3")
+
+def eh_sessao_sqlite(caminho):
+    """Se o arquivo é um banco SQLite (pelo cabeçalho, qualquer que seja a extensão)."""
+    try:
+        with open(caminho, 'rb') as f:
+            return f.read(len(_CABECALHO_SQLITE)) == _CABECALHO_SQLITE
+    except OSError:
+        return False
+
+def _bytes(bits):
+    return bits.to_bytes((bits.bit_length() + 7) // 8, 'little') if bits else None
+
+def _int(dados):
+    return int.from_bytes(dados, 'little') if dados else 0
+
+def _linha(posicao, estado):
+    campos, removidas, times, times_definidos, cargos, cargos_definidos = estado
+    return (posicao, campos.get('email'), json.dumps(campos, ensure_ascii=False, separators=(',', ':')),
+            json.dumps(removidas) if removidas else None,
+            _bytes(times), _bytes(times_definidos), _bytes(cargos), _bytes(cargos_definidos))
+
+
+class SessaoSqlite:
+    """
+    Sessão de trabalho em um arquivo SQLite: os usuários no formato compacto do
+    RegistroUsuario (uma linha por posição em 'dados_usuarios'), os ramais
+    alocados na sessão e o template e o mapa de times com que ela foi montada.
+    Cada gravação mexe só nas linhas informadas; a transação é confirmada por
+    commit() (ou ao sair do 'with').
+    """
+
+    def __init__(self, caminho):
+        pasta = os.path.dirname(caminho)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        self.caminho = caminho
+        self.conexao = sqlite3.connect(caminho, timeout=30)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        versao = self.conexao.execute("PRAGMA user_version").fetchone()[0]
+        if versao not in (0, VERSAO_ESQUEMA):
+            self.conexao.close()
+            raise ValueError(f"A sessão '{caminho}' foi gravada por uma versão diferente da aplicação.")
+        self.conexao.executescript(_ESQUEMA)
+        self.conexao.execute(f"PRAGMA user_version={VERSAO_ESQUEMA}")
+
+    @classmethod
+    def resumo(cls, caminho):
+        """ResumoSessao do arquivo (None se ele não existe ou não tem usuários)."""
+        if not os.path.exists(caminho): return None
+        with cls(caminho) as sessao:
+            usuarios = sessao.conexao.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+            if not usuarios: return None
+            return ResumoSessao(usuarios, sessao._meta('salvo_em'), sessao.template())
+
+    # --- Metadados ---
+
+    def _meta(self, chave):
+        linha = self.conexao.execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return json.loads(linha[0]) if linha else None
+
+    def _definir_meta(self, **valores):
+        self.conexao.executemany("INSERT OR REPLACE INTO meta (chave, valor) VALUES (?, ?)",
+                                 [(chave, json.dumps(valor, ensure_ascii=False)) for chave, valor in valores.items()])
+
+    def template(self):
+        return self._meta('template')
+
+    def team_id_map(self):
+        return self._meta('team_id_map') or {}
+
+    # --- Gravação ---
+
+    def limpar(self, template, team_id_map):
+        """Começa uma sessão nova (outra planilha, outro template): apaga usuários e ramais."""
+        self.conexao.execute("DELETE FROM usuarios")
+        self.conexao.execute("DELETE FROM ramais")
+        self._definir_meta(template=template, team_id_map=team_id_map,
+                           salvo_em=datetime.now().isoformat(timespec='seconds'))
+
+    def gravar_usuarios(self, itens):
+        """Grava (inclui ou substitui) os usuários de 'itens', pares (posição, RegistroUsuario.estado())."""
+        self.conexao.executemany(
+            "INSERT OR REPLACE INTO usuarios (posicao, email, campos, removidas, times, times_definidos, cargos, cargos_definidos) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (_linha(posicao, estado) for posicao, estado in itens))
+        self._definir_meta(salvo_em=datetime.now().isoformat(timespec='seconds'))
+
+    def truncar(self, quantidade):
+        """Apaga os usuários a partir da posição 'quantidade' (lista que encolheu)."""
+        self.conexao.execute("DELETE FROM usuarios WHERE posicao >= ?", (quantidade,))
+
+    def definir_ramais(self, ramais):
+        """Os ramais alocados na sessão passam a ser 'ramais' (só as diferenças são gravadas)."""
+        atuais = self.ramais()
+        self.conexao.executemany("DELETE FROM ramais WHERE ramal = ?", ((r,) for r in atuais - ramais))
+        self.conexao.executemany("INSERT INTO ramais (ramal) VALUES (?)", ((r,) for r in ramais - atuais))
+
+    def commit(self):
+        self.conexao.commit()
+
+    # --- Leitura ---
+
+    def ramais(self):
+        return {ramal for ramal, in self.conexao.execute("SELECT ramal FROM ramais")}
+
+    def __len__(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    def ler_usuarios(self, molde):
+        """
+        Gera os usuários na ordem das posições. Gravados com outro template, são
+        convertidos para o de 'molde', como ao trocar o template da plataforma.
+        """
+        salvo = self.template()
+        molde_salvo = molde if salvo is None or salvo == molde.template else TemplateUsuario(salvo)
+        cursor = self.conexao.execute(
+            "SELECT campos, removidas, times, times_definidos, cargos, cargos_definidos FROM usuarios ORDER BY posicao")
+        while True:
+            linhas = cursor.fetchmany(TAMANHO_LEITURA)
+            if not linhas: return
+            for campos, removidas, times, times_definidos, cargos, cargos_definidos in linhas:
+                registro = molde_salvo.registro_de_estado(json.loads(campos), json.loads(removidas) if removidas else (),
+                                                         _int(times), _int(times_definidos), _int(cargos), _int(cargos_definidos))
+                yield registro if molde_salvo is molde else molde.registro_de_dict(registro.para_dict())
+
+    def close(self):
+        self.conexao.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, tipo, *args):
+        if tipo is None: self.commit()
+        self.close()
+
+
+class GravadorSessao:
+    """
+    Grava uma SessaoSqlite em segundo plano. Os pedidos vão para uma fila e uma
+    thread própria (dona da conexão) aplica tudo o que estiver na fila em uma
+    única transação, então várias edições seguidas viram um commit só. Um erro
+    de gravação fica em 'erro' e não interrompe os pedidos seguintes.
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        self.erro = None
+        self.transacoes = 0
+        self.segundos = 0.0
+        self._fila = queue.Queue()
+        self._pronta = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name="GravadorSessao", daemon=True)
+        self._thread.start()
+        self._pronta.wait()
+
+    def limpar(self, template, team_id_map):
+        self._fila.put(('limpar', (template, team_id_map)))
+
+    def gravar_usuarios(self, itens):
+        self._fila.put(('gravar_usuarios', (itens,)))
+
+    def truncar(self, quantidade):
+        self._fila.put(('truncar', (quantidade,)))
+
+    def definir_ramais(self, ramais):
+        self._fila.put(('definir_ramais', (ramais,)))
+
+    def esperar(self):
+        """Bloqueia até a fila ser gravada."""
+        self._fila.join()
+
+    def close(self):
+        """Grava o que falta e encerra a thread."""
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+
+    def _executar(self):
+        try:
+            sessao = SessaoSqlite(self.caminho)
+        except Exception as e:
+            sessao, self.erro = None, e
+        self._pronta.set()
+        encerrar = False
+        while not encerrar:
+            pedidos = [self._fila.get()]
+            while True:
+                try:
+                    pedidos.append(self._fila.get_nowait())
+                except queue.Empty:
+                    break
+            encerrar = None in pedidos
+            try:
+                if sessao is not None:
+                    inicio = time.perf_counter()
+                    for operacao, args in filter(None, pedidos):
+                        getattr(sessao, operacao)(*args)
+                    sessao.commit()
+                    self.transacoes += 1
+                    self.segundos += time.perf_counter() - inicio
+            except Exception as e:
+                self.erro = e
+                try:
+                    sessao.conexao.rollback()
+                except Exception:
+                    pass  # conexão já sem transação ou inutilizável: o erro original fica em 'erro'
+            finally:
+                for _ in pedidos: self._fila.task_done()
+        if sessao is not None: sessao.close()
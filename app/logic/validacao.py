@@ -0,0 +1,276 @@
+# app/logic/validacao.py
+import csv
+from collections import namedtuple
+from itertools import chain
+from operator import itemgetter
+
+import numpy as np
+import pandas as pd
+
+from .data_processor import MAPA_CARGOS, _coluna, _como_texto
+from .perfil import PERFIL
+
+# Um '@', sem espaços, e um domínio com ponto e terminação de 2+ caracteres
+PADRAO_EMAIL = r"[^@\s,;<>]+@[^@\s,;<>]+\.[^@\s,;<>.]{2,}"
+LIMITE_RELATORIO_TEXTO = 20
+_PRIMEIRA = np.iinfo(np.int64).max  # marca de "primeira ocorrência" em _repetidos
+
+ProblemaLinha = namedtuple('ProblemaLinha', ['aba', 'linha', 'email', 'campo', 'mensagem', 'descartada'])
+
+
+class RelatorioValidacao:
+    """
+    Problemas encontrados pela validação, um por linha e campo, na ordem da
+    planilha. Linhas 'descartadas' não seguem para o processamento; as demais
+    (avisos) seguem como antes (ex.: cargo desconhecido vira usuário sem cargo).
+    """
+
+    def __init__(self):
+        self.problemas = []
+        self.linhas = 0
+        self.descartadas = 0
+
+    def __len__(self):
+        return len(self.problemas)
+
+    @property
+    def avisos(self):
+        return sum(1 for problema in self.problemas if not problema.descartada)
+
+    def juntar(self, outro, prefixo=""):
+        """Acrescenta os problemas de outro relatório (ex.: de outro arquivo), com 'prefixo' antes da aba."""
+        self.linhas += outro.linhas
+        self.descartadas += outro.descartadas
+        for problema in outro.problemas:
+            self.problemas.append(problema._replace(aba=f"{prefixo}{problema.aba}") if prefixo else problema)
+
+    def resumo_texto(self, limite=LIMITE_RELATORIO_TEXTO):
+        linhas = [f"{self.descartadas} de {self.linhas} linhas descartadas, {self.avisos} avisos."]
+        for p in self.problemas[:limite]:
+            onde = f"{p.aba} linha {p.linha}" if p.linha is not None else p.aba
+            linhas.append(f"{'✖' if p.descartada else '⚠'} {onde}: {p.mensagem}")
+        if len(self.problemas) > limite: linhas.append(f"... e mais {len(self.problemas) - limite}")
+        return "\n".join(linhas)
+
+    def salvar_csv(self, caminho):
+        with open(caminho, 'w', newline='', encoding='utf-8-sig') as f:
+            escritor = csv.writer(f)
+            escritor.writerow(['Aba', 'Linha', 'Email', 'Campo', 'Problema', 'Descartada'])
+            for p in self.problemas:
+                escritor.writerow([p.aba, "" if p.linha is None else p.linha, p.email, p.campo, p.mensagem,
+                                   "sim" if p.descartada else "não"])
+
+
+def _por_valor(brutos):
+    """
+    Códigos (pd.factorize, -1 para nulo) e textos sem espaços dos valores distintos de
+    uma coluna: as regras de cargo, time e limite rodam uma vez por valor, não por linha.
+    """
+    codigos, unicos = pd.factorize(brutos.to_numpy(dtype=object))
+    return codigos, _como_texto(pd.Series(unicos, dtype=object)).str.strip()
+
+def _por_linha(codigos, mascara_valores):
+    """Espalha uma máscara dos valores distintos para as linhas (False nas nulas)."""
+    return np.append(np.asarray(mascara_valores, dtype=bool), False)[codigos]
+
+
+def _normalizar_emails(emails):
+    """Emails sem diferença de maiúsculas e de espaços nas pontas (array de objetos)."""
+    return pd.Series(emails, dtype=object).map(str).str.strip().str.casefold().to_numpy(dtype=object)
+
+def chaves_emails(normalizados):
+    """Chave (hash de 64 bits) de cada email já normalizado por _normalizar_emails."""
+    return pd.util.hash_array(normalizados)
+
+
+class ValidadorPlanilha:
+    """
+    Etapa de validação antes do processamento, com operações de coluna sobre
+    cada bloco: email vazio ou malformado (regex), email repetido e limite de
+    chats não numérico descartam a linha; cargo ou time fora do template são
+    avisos. As linhas válidas seguem mesmo quando outras do bloco não.
+
+    Os emails aceitos ficam como hashes de 64 bits em um array ordenado (com a
+    aba, a linha de origem e o email normalizado), então um email repetido em
+    outro bloco ou aba também é achado por bisseção. Hashes iguais só contam
+    como repetição se os emails também forem: uma colisão não descarta a linha.
+    """
+
+    def __init__(self, molde, relatorio=None):
+        self.relatorio = relatorio if relatorio is not None else RelatorioValidacao()
+        self._times_template = list(molde.mascaras.get('teams', {}))
+        roles = molde.mascaras.get('roles', {})
+        self._cargos_validos = [cargo for cargo, role in MAPA_CARGOS.items() if role in roles]
+        self._chaves = np.empty(0, dtype=np.uint64)
+        self._emails = np.empty(0, dtype=object)
+        self._abas = np.empty(0, dtype=np.int32)
+        self._linhas = np.empty(0, dtype=np.int64)
+        self._nomes_abas = []
+
+    # --- Emails repetidos ---
+
+    def _repetidos(self, chaves, emails):
+        """
+        Para cada email (normalizado, com sua chave): a posição em self._chaves da
+        ocorrência já aceita, -1 - i se ele repete o email i do próprio lote, ou
+        _PRIMEIRA se é a primeira ocorrência.
+        """
+        origem = np.full(len(chaves), _PRIMEIRA, dtype=np.int64)
+        if not len(chaves): return origem
+        if len(self._chaves):
+            posicoes = np.searchsorted(self._chaves, chaves)
+            achadas = posicoes < len(self._chaves)
+            achadas[achadas] = self._chaves[posicoes[achadas]] == chaves[achadas]
+            origem[achadas] = posicoes[achadas]
+        # Dentro do lote (ordenação estável): a primeira ocorrência fica, as seguintes apontam para ela
+        ordem = np.argsort(chaves, kind='stable')
+        ordenadas = chaves[ordem]
+        novo_grupo = np.r_[True, ordenadas[1:] != ordenadas[:-1]]
+        primeira = ordem[np.maximum.accumulate(np.where(novo_grupo, np.arange(len(chaves)), 0))]
+        seguintes = ordem[~novo_grupo]
+        internas = origem[seguintes] == _PRIMEIRA
+        origem[seguintes[internas]] = -1 - primeira[~novo_grupo][internas]
+        return self._confirmar(chaves, emails, origem)
+
+    def _confirmar(self, chaves, emails, origem):
+        """Confere pelos textos as repetições achadas pela chave; as chaves com colisão são refeitas uma a uma."""
+        externas = np.flatnonzero(origem != _PRIMEIRA)
+        if not len(externas): return origem
+        apontados = origem[externas]
+        internas = apontados < 0
+        iguais = np.empty(len(externas), dtype=bool)
+        iguais[internas] = emails[-1 - apontados[internas]] == emails[externas[internas]]
+        iguais[~internas] = self._emails[apontados[~internas]] == emails[externas[~internas]]
+        if iguais.all(): return origem
+        for chave in np.unique(chaves[externas[~iguais]]):
+            inicio = int(np.searchsorted(self._chaves, chave, side='left'))
+            fim = int(np.searchsorted(self._chaves, chave, side='right'))
+            aceitos = {}
+            for posicao in range(fim - 1, inicio - 1, -1):
+                aceitos[self._emails[posicao]] = posicao  # a primeira ocorrência prevalece
+            vistos = {}
+            for i in np.flatnonzero(chaves == chave).tolist():
+                if emails[i] in aceitos:
+                    origem[i] = aceitos[emails[i]]
+                elif emails[i] in vistos:
+                    origem[i] = -1 - vistos[emails[i]]
+                else:
+                    vistos[emails[i]] = i
+                    origem[i] = _PRIMEIRA
+        return origem
+
+    def _aceitar(self, chaves, emails, aba, linhas):
+        if aba not in self._nomes_abas: self._nomes_abas.append(aba)
+        todas = np.concatenate([self._chaves, chaves])
+        ordem = np.argsort(todas, kind='stable')
+        self._chaves = todas[ordem]
+        self._emails = np.concatenate([self._emails, emails])[ordem]
+        self._abas = np.concatenate([self._abas, np.full(len(chaves), self._nomes_abas.index(aba), dtype=np.int32)])[ordem]
+        self._linhas = np.concatenate([self._linhas, linhas])[ordem]
+
+    def _onde(self, origem, aba, linhas_lote):
+        if origem < 0:
+            aba_origem, linha = aba, linhas_lote[-1 - origem]
+        else:
+            aba_origem, linha = self._nomes_abas[self._abas[origem]], self._linhas[origem]
+        if linha < 0: return f"'{aba_origem}'"
+        return f"linha {linha}" + (f" da aba '{aba_origem}'" if aba_origem else "")
+
+    # --- Validação ---
+
+    @staticmethod
+    def _problemas(mascara, aba, linhas, emails, campo, mensagem, descartada):
+        for i in np.flatnonzero(mascara).tolist():
+            linha = int(linhas[i])
+            yield i, ProblemaLinha(aba, linha if linha >= 0 else None, emails[i], campo, mensagem(i), descartada)
+
+    def validar(self, bloco, aba=None):
+        """
+        Valida um bloco com as colunas da planilha (o índice, se inteiro, é o número
+        da linha; a aba vem de attrs['aba']). Retorna só as linhas que seguem.
+        """
+        with PERFIL.etapa('validar_planilha', itens=len(bloco)):
+            return self._validar(bloco, bloco.attrs.get('aba', "") if aba is None else aba)
+
+    def _validar(self, bloco, aba):
+        column_map = {str(coluna).lower().strip(): coluna for coluna in bloco.columns}
+        linhas = bloco.index.to_numpy(dtype=np.int64) if pd.api.types.is_integer_dtype(bloco.index) \
+            else np.full(len(bloco), -1, dtype=np.int64)
+
+        brutos = _coluna(bloco, column_map, 'email')
+        emails = _como_texto(brutos).str.strip().where(brutos.notna(), "")
+        vazio = (emails == "").to_numpy()
+        malformado = ~vazio & ~emails.str.fullmatch(PADRAO_EMAIL).to_numpy(dtype=bool)
+
+        codigos_limite, textos_limite = _por_valor(_coluna(bloco, column_map, 'limite de chats'))
+        numeros = pd.to_numeric(textos_limite, errors='coerce').to_numpy(dtype='float64')
+        limite_invalido = _por_linha(codigos_limite, (textos_limite != "").to_numpy() & ~np.isfinite(numeros))
+
+        # Repetidos só entre as linhas que passaram nas outras regras (uma linha descartada não "ocupa" o email)
+        descartar = vazio | malformado | limite_invalido
+        candidatas = np.flatnonzero(~descartar)
+        normalizados = _normalizar_emails(emails.to_numpy()[candidatas])
+        chaves = chaves_emails(normalizados)
+        origem = self._repetidos(chaves, normalizados)
+        aceitas = origem == _PRIMEIRA
+        repetido = np.zeros(len(bloco), dtype=bool)
+        repetido[candidatas[~aceitas]] = True
+        origem_da_linha = np.full(len(bloco), _PRIMEIRA, dtype=np.int64)
+        origem_da_linha[candidatas] = origem
+        descartar |= repetido
+
+        codigos_cargo, cargos = _por_valor(_coluna(bloco, column_map, 'cargo'))
+        cargo_desconhecido = ~descartar & _por_linha(codigos_cargo, (cargos != "") & ~cargos.isin(self._cargos_validos))
+        codigos_time, times = _por_valor(_coluna(bloco, column_map, 'time'))
+        time_desconhecido = ~descartar & _por_linha(codigos_time, (times != "") & ~times.isin(self._times_template))
+
+        # Só as linhas com problema viram objetos Python
+        lista_emails = emails.tolist()
+        textos_limite, cargos, times = textos_limite.tolist(), cargos.tolist(), times.tolist()
+        linhas_candidatas = linhas[candidatas]
+        problemas = chain(
+            self._problemas(vazio, aba, linhas, lista_emails, 'email', lambda i: "Email vazio.", True),
+            self._problemas(malformado, aba, linhas, lista_emails, 'email',
+                            lambda i: f"Email inválido: '{lista_emails[i]}'.", True),
+            self._problemas(limite_invalido, aba, linhas, lista_emails, 'limite de chats',
+                            lambda i: f"Limite de chats não numérico: '{textos_limite[codigos_limite[i]]}'.", True),
+            self._problemas(repetido, aba, linhas, lista_emails, 'email',
+                            lambda i: f"Email repetido (já aparece na {self._onde(origem_da_linha[i], aba, linhas_candidatas)}).", True),
+            self._problemas(cargo_desconhecido, aba, linhas, lista_emails, 'cargo',
+                            lambda i: f"Cargo '{cargos[codigos_cargo[i]]}' desconhecido (esperado: {' ou '.join(self._cargos_validos)}); "
+                                      f"o usuário fica sem cargo.", False),
+            self._problemas(time_desconhecido, aba, linhas, lista_emails, 'time',
+                            lambda i: f"Time '{times[codigos_time[i]]}' não existe no template (ignorado).", False))
+        self.relatorio.problemas.extend(problema for _, problema in sorted(problemas, key=itemgetter(0)))
+        # Só depois das mensagens: _aceitar reordena as chaves e muda as posições de 'origem'
+        self._aceitar(chaves[aceitas], normalizados[aceitas], aba, linhas[candidatas[aceitas]])
+
+        self.relatorio.linhas += len(bloco)
+        self.relatorio.descartadas += int(descartar.sum())
+        return bloco[~descartar] if descartar.any() else bloco
+
+    def filtrar(self, blocos):
+        """Gera os blocos só com as linhas válidas (blocos sem nenhuma são pulados)."""
+        for bloco in blocos:
+            validos = self.validar(bloco)
+            if len(validos): yield validos
+
+    def aceitar_usuarios(self, usuarios, origem):
+        """
+        Para juntar resultados validados em separado (ex.: um processo por arquivo):
+        retorna os usuários cujo email ainda não foi aceito e registra os outros
+        como repetidos, com 'origem' no lugar da aba.
+        """
+        if not usuarios: return usuarios
+        emails = [usuario.get('email') or "" for usuario in usuarios]
+        normalizados = _normalizar_emails(emails)
+        chaves = chaves_emails(normalizados)
+        origem_chaves = self._repetidos(chaves, normalizados)
+        aceitos = origem_chaves == _PRIMEIRA
+        sem_linha = np.full(len(usuarios), -1, dtype=np.int64)
+        self.relatorio.problemas.extend(problema for _, problema in self._problemas(
+            ~aceitos, origem, sem_linha, emails, 'email',
+            lambda i: f"Email repetido (já aparece em {self._onde(origem_chaves[i], origem, sem_linha)}).", True))
+        self._aceitar(chaves[aceitos], normalizados[aceitos], origem, sem_linha[aceitos])
+        self.relatorio.descartadas += int((~aceitos).sum())
+        return [usuario for usuario, aceito in zip(usuarios, aceitos.tolist()) if aceito]
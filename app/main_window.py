@@ -1,37 +1,82 @@
 # app/main_window.py
+import os
 import sys
-import json
 import copy
-import pandas as pd
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QMessageBox, QFileDialog, 
                              QLineEdit, QLabel, QGroupBox, QVBoxLayout, QFormLayout, 
-                             QCheckBox, QComboBox, QInputDialog)
-from PyQt5.QtCore import QThread, Qt, QTimer, pyqtSignal
+                             QCheckBox, QComboBox, QInputDialog, QTreeView)
+from PyQt5.QtCore import QThread, Qt, QTimer, QModelIndex, pyqtSignal
 
 from .api_worker import ApiWorker
-from .logic.data_processor import processar_dataframe
+from .checklist_model import ChecklistModel
+from .diagnostics_dialog import DiagnosticsDialog
+from .export_worker import ExportWorker
+from .processing_worker import ProcessingWorker
+from .push_worker import PushWorker
+from .session_autosave import SessionAutosave
+from .logic.perfil import PERFIL
+from .logic.indice_plataforma import IndicePlataforma
+from .logic.indice_times import IndiceTimes, construir_indice_times
+from .logic.ramais import AlocadorRamais, reserva_configurada
+from .logic.registro_usuario import TemplateUsuario
+from .logic.sessao_sqlite import SessaoSqlite, caminho_padrao
 from .ui_setup import setup_ui
+from .user_list_model import UserListModel
 
 class UserEditorApp(QMainWindow):
+    JOBS_INICIAIS = [("TEMPLATE_API_URL", 'template'), ("TEAMS_API_URL", 'teams')]
+    FILTROS_JSON = {"JSON Files (*.json)": 'indentado', "JSON compacto (*.json)": 'compacto', "JSON Lines (*.jsonl)": 'jsonl'}
+    OPERACOES_MEMBROS = {"Definir (substitui os times atuais)": 'definir', "Adicionar aos times atuais": 'adicionar', "Remover dos times atuais": 'remover'}
     trigger_api_call = pyqtSignal(str, str)
+    trigger_api_batch = pyqtSignal(list)
+    trigger_api_refresh = pyqtSignal(list)
+    trigger_offline = pyqtSignal(bool)
+    trigger_processing = pyqtSignal(str, object, object, bool, object, object, object, object)
+    trigger_export_csv = pyqtSignal(object, object, str)
+    trigger_export_json = pyqtSignal(object, str, str)
+    trigger_push = pyqtSignal(object, str)
+    trigger_reload = pyqtSignal(str, object, object, object)
+    trigger_compare = pyqtSignal(str, object, object, object, object)
+    trigger_preload = pyqtSignal()
+    etapa_inicio = pyqtSignal(str)  # 'template', 'times', 'pronta' e 'modulos', conforme cada parte fica disponível
 
     def __init__(self):
         super().__init__()
         
         self.dados_usuarios = []
         self.template_usuario = None
+        self.molde_usuario = None
         self.team_id_map = {}
-        self.platform_users_map = {}
+        self.usuarios_plataforma = IndicePlataforma()
         self.ramais_existentes = set()
+        self.alocador_ramais = AlocadorRamais()
+        self.alocador_sessao = None
+        self.cache_processamento = None
+        self.carga_incremental = False
+        self.relatorio_validacao = None
         self.template_loaded = False
         self.teams_loaded = False
+        self.interface_livre = True
+        self.carregando_api = False
         self.current_user_index = None
+        self.api_timings = {}
+        self.api_origens = {}
         self.pending_xlsx_path = None
+        self.processing_label = "Processando planilha"
+        self.export_label = "Salvando arquivo"
         self.form_line_edits, self.form_checkboxes, self.form_comboboxes = {}, {}, {}
-        self.role_checkboxes_map, self.team_checkboxes_map = {}, {}
+        self.role_checklist = self.team_checklist = None
         
         self.api_thread = None
         self.api_worker = None
+        self.processing_thread = None
+        self.processing_worker = None
+        self.export_worker = None
+        self.push_worker = None
+        self.falhas_envio = []
+        self.autosave = None
+        self.restaurando_sessao = False
+        self.user_list_model = UserListModel(self.dados_usuarios)
         
         setup_ui(self)
         self.setup_connections_and_thread()
@@ -39,32 +84,89 @@ class UserEditorApp(QMainWindow):
 
     def setup_connections_and_thread(self):
         self.load_xlsx_button.clicked.connect(self.carregar_em_massa_xlsx)
+        self.reload_session_button.clicked.connect(self.recarregar_sessao)
         self.compare_button.clicked.connect(self.comparar_com_xlsx)
         self.set_all_teams_button.clicked.connect(self.definir_time_para_todos)
+        self.selected_teams_button.clicked.connect(self.aplicar_time_aos_selecionados)
         self.save_button.clicked.connect(self.salvar_arquivo_json)
         self.save_csv_button.clicked.connect(self.salvar_arquivo_csv)
-        self.user_list_widget.currentItemChanged.connect(self.on_user_selection_changed)
+        self.push_button.clicked.connect(self.enviar_para_plataforma)
+        self.user_list_view.selectionModel().currentChanged.connect(self.on_user_selection_changed)
         self.clear_form_button.clicked.connect(self.clear_form_for_new_user)
         self.add_new_user_button.clicked.connect(self.add_new_user)
         self.save_changes_button.clicked.connect(self.save_changes)
+        self.cancel_processing_button.clicked.connect(self.cancelar_processamento)
+        self.refresh_button.clicked.connect(self.atualizar_da_plataforma)
+        self.offline_checkbox.toggled.connect(self.trigger_offline)
+        self.profiling_checkbox.setChecked(PERFIL.ativo)
+        self.profiling_checkbox.toggled.connect(self.definir_perfil_ativo)
+        self.diagnostics_button.clicked.connect(self.abrir_diagnostico)
+        # Busca: o texto espera uma pausa na digitação; os filtros de campo e situação valem na hora
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True); self.search_timer.setInterval(200)
+        self.search_timer.timeout.connect(self.aplicar_busca)
+        self.search_line_edit.textChanged.connect(lambda _: self.search_timer.start())
+        self.search_field_combo.currentIndexChanged.connect(self.aplicar_busca)
+        self.search_status_combo.currentIndexChanged.connect(self.aplicar_busca)
+        self.user_list_model.modelReset.connect(self.atualizar_contagem_busca)
+        self.user_list_model.rowsInserted.connect(self.atualizar_contagem_busca)
 
         self.api_thread = QThread()
         self.api_worker = ApiWorker()
         self.api_worker.moveToThread(self.api_thread)
         self.api_worker.success.connect(self.on_api_success)
         self.api_worker.error.connect(self.on_api_load_error)
+        self.api_worker.request_timed.connect(self.on_api_request_timed)
+        self.api_worker.teams_indexed.connect(self.on_teams_indexed)
+        self.api_worker.cache_status.connect(self.on_api_cache_status)
         self.trigger_api_call.connect(self.api_worker.start_job)
+        self.trigger_api_batch.connect(self.api_worker.start_batch)
+        self.trigger_api_refresh.connect(self.api_worker.start_refresh)
+        self.trigger_offline.connect(self.api_worker.set_offline)
         self.api_thread.finished.connect(self.api_worker.deleteLater)
         self.api_thread.start()
 
+        self.processing_thread = QThread()
+        self.processing_worker = ProcessingWorker()
+        self.processing_worker.moveToThread(self.processing_thread)
+        self.processing_worker.batch_ready.connect(self.on_processing_batch)
+        self.processing_worker.progress.connect(self.on_processing_progress)
+        self.processing_worker.finished.connect(self.on_processing_finished)
+        self.processing_worker.error.connect(self.on_processing_error)
+        self.processing_worker.validation_ready.connect(self.on_validation_ready)
+        self.trigger_processing.connect(self.processing_worker.start_job)
+        self.trigger_reload.connect(self.processing_worker.start_reload)
+        self.processing_worker.comparison_ready.connect(self.on_comparison_ready)
+        self.processing_worker.comparison_error.connect(self.on_comparison_error)
+        self.trigger_compare.connect(self.processing_worker.start_compare)
+        self.trigger_preload.connect(self.processing_worker.preload)
+        self.processing_worker.preloaded.connect(self.on_preloaded)
+        self.processing_thread.finished.connect(self.processing_worker.deleteLater)
+
+        # As exportações rodam na mesma thread do processamento (nunca ao mesmo tempo)
+        self.export_worker = ExportWorker()
+        self.export_worker.moveToThread(self.processing_thread)
+        self.export_worker.progress.connect(self.on_export_progress)
+        self.export_worker.finished.connect(self.on_export_finished)
+        self.export_worker.error.connect(self.on_export_error)
+        self.trigger_export_csv.connect(self.export_worker.start_csv)
+        self.trigger_export_json.connect(self.export_worker.start_json)
+        self.processing_thread.finished.connect(self.export_worker.deleteLater)
+
+        # O envio à plataforma também (a interface fica bloqueada enquanto ele roda)
+        self.push_worker = PushWorker()
+        self.push_worker.moveToThread(self.processing_thread)
+        self.push_worker.progress.connect(self.on_push_progress)
+        self.push_worker.failure.connect(self.on_push_failure)
+        self.push_worker.finished.connect(self.on_push_finished)
+        self.push_worker.error.connect(self.on_push_error)
+        self.trigger_push.connect(self.push_worker.start_push)
+        self.processing_thread.finished.connect(self.push_worker.deleteLater)
+        self.processing_thread.start()
+
     def set_ui_enabled(self, enabled, loading_message=""):
-        self.load_xlsx_button.setEnabled(enabled)
-        self.right_panel_group.setEnabled(enabled)
-        has_data = enabled and len(self.dados_usuarios) > 0
-        self.compare_button.setEnabled(has_data)
-        self.set_all_teams_button.setEnabled(has_data)
-        self.save_button.setEnabled(has_data)
-        self.save_csv_button.setEnabled(has_data)
+        self.interface_livre = enabled
+        self.aplicar_prontidao()
         if loading_message:
             self.statusBar().showMessage(loading_message)
             QApplication.setOverrideCursor(Qt.WaitCursor)
@@ -72,50 +174,148 @@ class UserEditorApp(QMainWindow):
             self.statusBar().clearMessage()
             QApplication.restoreOverrideCursor()
 
+    def aplicar_prontidao(self):
+        """
+        Habilita cada ação assim que os dados de que ela depende chegam: o formulário e
+        as exportações só precisam do template; a carga, a comparação e os times em
+        massa, também da lista de times. Nada fica habilitado enquanto algo roda.
+        """
+        livre = self.interface_livre
+        com_template = livre and self.template_loaded
+        completa = com_template and self.teams_loaded
+        has_data = com_template and len(self.dados_usuarios) > 0
+        self.load_xlsx_button.setEnabled(completa)
+        self.reload_session_button.setEnabled(completa)
+        self.refresh_button.setEnabled(livre and not self.carregando_api)
+        self.right_panel_group.setEnabled(com_template)
+        self.compare_button.setEnabled(has_data and self.teams_loaded)
+        self.set_all_teams_button.setEnabled(has_data and self.teams_loaded)
+        self.selected_teams_button.setEnabled(has_data and self.teams_loaded)
+        self.save_button.setEnabled(has_data)
+        self.save_csv_button.setEnabled(has_data)
+        self.push_button.setEnabled(has_data)
+
     def carregar_dados_iniciais(self):
-        self.set_ui_enabled(False, "Carregando template de usuário...")
-        self.trigger_api_call.emit("TEMPLATE_API_URL", 'template')
+        # A janela já está aberta: só as ações que dependem do template e dos times esperam por eles
+        self.carregando_api = True
+        self.aplicar_prontidao()
+        self.statusBar().showMessage("Carregando template de usuário e lista de times...")
+        self.trigger_api_batch.emit(self.JOBS_INICIAIS)
+
+    def atualizar_da_plataforma(self):
+        """Busca template e times de novo na plataforma, ignorando o TTL do cache local."""
+        self.api_origens.clear()
+        self.carregando_api = True
+        self.set_ui_enabled(False, "Atualizando template e lista de times da plataforma...")
+        self.trigger_api_refresh.emit(self.JOBS_INICIAIS)
+
+    def on_api_request_timed(self, url_key, segundos, tamanho):
+        self.api_timings[url_key] = (segundos, tamanho)
+
+    def on_api_cache_status(self, url_key, origem):
+        self.api_origens[url_key] = origem
 
     def on_api_success(self, data, data_type):
         if data_type == 'template':
-            self.template_usuario = copy.deepcopy(data[0])
-            self.template_loaded = True
-            self.statusBar().showMessage("Template carregado. Buscando lista de times...")
-            self.trigger_api_call.emit("TEAMS_API_URL", 'teams')
+            novo_template = copy.deepcopy(data[0])
+            if novo_template != self.template_usuario:
+                self.template_usuario = novo_template
+                self.molde_usuario = TemplateUsuario(self.template_usuario)
+                # Usuários já carregados passam a apontar para o template novo
+                self.dados_usuarios = [self.molde_usuario.registro_de_dict(u.para_dict()) for u in self.dados_usuarios]
+                self.user_list_model.definir_usuarios(self.dados_usuarios)
+                self.criar_formulario_dinamico()
+            if not self.template_loaded:
+                self.template_loaded = True
+                self.etapa_inicio.emit('template')
+            self.verificar_prontidao_inicial()
         elif data_type == 'teams':
-            self.processar_dados_de_times(data)
+            self.on_teams_indexed(data)
+
+    def on_teams_indexed(self, indice):
+        self.processar_dados_de_times(indice)
+        if not self.teams_loaded:
             self.teams_loaded = True
-            self.verificar_prontidao_inicial()
+            self.etapa_inicio.emit('times')
+        self.verificar_prontidao_inicial()
+
+    def _reserva_ramais(self):
+        """Faixa reserva de RAMAIS_RESERVA; se ela for inválida, avisa e segue sem reserva."""
+        try:
+            return reserva_configurada()
+        except ValueError as e:
+            QMessageBox.warning(self, "Faixa Reserva de Ramais", f"{e}\nOs ramais serão gerados sem faixa reserva.")
+            return None
 
-    def processar_dados_de_times(self, teams_list):
+    def processar_dados_de_times(self, teams):
+        """Aceita um IndiceTimes já montado (streaming) ou a lista de times da API."""
         try:
-            self.team_id_map = {team['name']: team['id'] for team in teams_list if 'id' in team and 'name' in team}
-            self.platform_users_map = {}
-            self.ramais_existentes = set()
-            for team in teams_list:
-                team_info = {'name': team.get('name')}
-                for assignee in team.get('assignees', []):
-                    first_name = assignee.get('first_name', '')
-                    last_name = assignee.get('last_name', '')
-                    if not first_name: continue
-                    lookup_key = f"{first_name} {last_name}".strip()
-                    if lookup_key not in self.platform_users_map:
-                        self.platform_users_map[lookup_key] = []
-                    self.platform_users_map[lookup_key].append(team_info)
-                    ramal = assignee.get('extension_number')
-                    if ramal:
-                        self.ramais_existentes.add(str(ramal))
+            indice = teams if isinstance(teams, IndiceTimes) else construir_indice_times(teams)
+            self.team_id_map = indice.team_id_map
+            self.usuarios_plataforma = indice.usuarios_plataforma
+            self.ramais_existentes = indice.ramais_existentes
+            self.alocador_ramais = AlocadorRamais(self.ramais_existentes, reserva=self._reserva_ramais())
+            if self.usuarios_plataforma.ambiguos:
+                QMessageBox.warning(self, "Usuários Ambíguos na Plataforma",
+                                    "Usuários diferentes com o mesmo nome; para eles a busca só pelo nome junta os times de todos "
+                                    "(email ou matrícula na planilha resolvem):\n" + self.usuarios_plataforma.relatorio_ambiguos())
         except Exception as e:
             QMessageBox.critical(self, "Erro nos Dados da API", f"Formato inesperado na resposta da API de times: {e}")
             self.set_ui_enabled(False, "Erro crítico de API. Reinicie a aplicação.")
 
     def verificar_prontidao_inicial(self):
-        if self.template_loaded and self.teams_loaded:
-            self.set_ui_enabled(True)
-            self.criar_formulario_dinamico()
-            self.statusBar().showMessage("Aplicação pronta para uso.", 5000)
+        if not (self.template_loaded and self.teams_loaded):
+            self.aplicar_prontidao()
+            self.statusBar().showMessage("Template carregado, o formulário já pode ser usado. Aguardando a lista de times..."
+                                         if self.template_loaded else "Lista de times carregada. Aguardando o template de usuário...")
+            return
+        self.carregando_api = False
+        self.set_ui_enabled(True)
+        tempos = ", ".join(f"{url_key}: {segundos:.2f}s [{self.api_origens.get(url_key, 'rede')}]"
+                           for url_key, (segundos, _) in self.api_timings.items())
+        self.statusBar().showMessage("Aplicação pronta para uso." + (f" ({tempos})" if tempos else ""), 5000)
+        if self.autosave is None:
+            self.etapa_inicio.emit('pronta')
+            # pandas/openpyxl só depois dos dados: importados junto com a indexação dos times, disputariam o GIL com ela
+            self.trigger_preload.emit()
+            self._iniciar_autosave()
+
+    def _iniciar_autosave(self):
+        """Liga o salvamento automático da sessão e oferece restaurar a da última execução."""
+        caminho = caminho_padrao()
+        try:
+            resumo = SessaoSqlite.resumo(caminho)
+            autosave = SessionAutosave(self.user_list_model, caminho, lambda: (self.template_usuario, self.team_id_map), self)
+            if autosave.erro: raise autosave.erro
+        except Exception as e:
+            QMessageBox.warning(self, "Salvamento Automático", f"A sessão não será salva automaticamente ('{caminho}'):\n{e}")
+            return
+        self.autosave = autosave
+        if resumo and not self.dados_usuarios:
+            resposta = QMessageBox.question(self, "Restaurar Sessão",
+                                            f"Há uma sessão salva automaticamente com {resumo.usuarios} usuários "
+                                            f"(última alteração em {resumo.salvo_em}).\n\nRestaurar essa sessão?",
+                                            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if resposta == QMessageBox.Yes: self._recarregar_de(caminho, "Restaurando sessão")
+
+    def _ramais_da_sessao(self):
+        return self.alocador_sessao.ramais - self.ramais_existentes if self.alocador_sessao is not None else set()
+
+    def _sessao_alterada(self):
+        """Avisa o salvamento automático dos ramais alocados (depois de uma carga ou de uma edição de ramal)."""
+        if self.autosave is None: return
+        if self.restaurando_sessao:
+            self.restaurando_sessao = False
+            self.autosave.retomar(self._ramais_da_sessao())
+        else:
+            self.autosave.ramais_alterados(self._ramais_da_sessao())
+
+    def on_preloaded(self, segundos):
+        self.etapa_inicio.emit('modulos')
 
     def on_api_load_error(self, error_msg):
+        if self.carregando_api and self.autosave is None: self.trigger_preload.emit()
+        self.carregando_api = False
         QMessageBox.critical(self, "Erro de API", f"Não foi possível completar a operação.\n\n{error_msg}")
         self.set_ui_enabled(True)
         self.statusBar().showMessage("Falha na operação de API.")
@@ -128,71 +328,179 @@ class UserEditorApp(QMainWindow):
         caminho, _ = QFileDialog.getOpenFileName(self, "Abrir Planilha de Usuários", "", "Excel Files (*.xlsx)")
         if not caminho: return
 
-        try:
-            self.set_ui_enabled(False, "Processando planilha...")
-            QApplication.processEvents()
-            
-            all_sheets_data = pd.read_excel(caminho, sheet_name=None, header=2)
-            combined_df = pd.concat(all_sheets_data.values(), ignore_index=True)
+        resposta = QMessageBox.question(self, 'Gerar Ramais?', 'Deseja gerar ramais únicos por time?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        gerar_ramais_flag = (resposta == QMessageBox.Yes)
 
-            resposta = QMessageBox.question(self, 'Gerar Ramais?', 'Deseja gerar ramais únicos por time?', QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
-            gerar_ramais_flag = (resposta == QMessageBox.Yes)
-            
-            novos, nao_encontrados, times_sem_id = processar_dataframe(
-                combined_df, self.template_usuario, self.platform_users_map, 
-                gerar_ramais=gerar_ramais_flag, ramais_existentes=self.ramais_existentes.copy(), team_id_map=self.team_id_map
-            )
-            
-            self.dados_usuarios = novos
-            self.atualizar_lista_gui()
-            
-            if nao_encontrados: QMessageBox.warning(self, "Times Inválidos", "Ignorados: " + ", ".join(nao_encontrados))
-            if times_sem_id: QMessageBox.warning(self, "IDs de Time Desconhecidos", "Não foi possível gerar ramais para os times: " + ", ".join(times_sem_id))
-            
-            self.statusBar().showMessage(f"{len(novos)} usuários processados.", 5000)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro ao Processar Planilha", f"Ocorreu um erro: {e}")
-        finally:
-            self.set_ui_enabled(True)
+        anterior = None
+        if self.cache_processamento is not None and self.dados_usuarios and self.cache_processamento.compativel(
+                self.molde_usuario, self.usuarios_plataforma, self.team_id_map, gerar_ramais_flag):
+            resposta = QMessageBox.question(self, 'Carga Incremental',
+                                            'Reprocessar só as linhas novas ou alteradas?\n\nOs usuários de linhas que não mudaram '
+                                            'mantêm as edições feitas no formulário e os ramais.',
+                                            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes)
+            if resposta == QMessageBox.Yes: anterior = self.cache_processamento
+        from .logic.incremental import CacheProcessamento
+        self.cache_processamento = CacheProcessamento(self.molde_usuario, self.usuarios_plataforma, self.team_id_map, gerar_ramais_flag)
+        self.carga_incremental = anterior is not None
 
-    def definir_time_para_todos(self):
-        if not self.dados_usuarios:
-            QMessageBox.warning(self, "Ação Inválida", "Não há usuários carregados na lista.")
+        self._iniciar_processamento("Processando planilha")
+        self.trigger_processing.emit(caminho, self.molde_usuario, self.usuarios_plataforma,
+                                     gerar_ramais_flag, self.alocador_sessao, self.team_id_map,
+                                     anterior, self.cache_processamento)
+
+    def recarregar_sessao(self):
+        """Recarrega uma sessão salva em JSON/JSONL ou SQLite, sem reprocessar a planilha original."""
+        if not (self.template_loaded and self.teams_loaded):
+            QMessageBox.warning(self, "Aviso", "Aguarde o carregamento completo dos dados iniciais da API.")
             return
+        caminho, _ = QFileDialog.getOpenFileName(self, "Recarregar Sessão Salva", "",
+                                                 "Sessões (*.json *.jsonl *.sqlite3 *.sqlite *.db);;JSON Files (*.json *.jsonl);;SQLite (*.sqlite3 *.sqlite *.db)")
+        if not caminho: return
+        self._recarregar_de(caminho, "Recarregando sessão")
+
+    def _recarregar_de(self, caminho, descricao):
+        self.cache_processamento = None
+        # Restaurando do próprio arquivo do salvamento automático, ele não é apagado nem regravado durante a leitura
+        self.restaurando_sessao = (self.autosave is not None and os.path.exists(self.autosave.caminho)
+                                   and os.path.samefile(caminho, self.autosave.caminho))
+        if self.restaurando_sessao: self.autosave.pausar()
+        self._iniciar_processamento(descricao)
+        self.trigger_reload.emit(caminho, self.molde_usuario, self.usuarios_plataforma, self.alocador_sessao)
+
+    def _iniciar_processamento(self, descricao):
+        self.processing_label = descricao
+        self.dados_usuarios = []
+        self.current_user_index = None
+        self.atualizar_lista_gui()
+        self.set_ui_enabled(False, f"{descricao}...")
+        self.cancel_processing_button.setVisible(True); self.cancel_processing_button.setEnabled(True)
+        self.progress_bar.setRange(0, 0); self.progress_bar.setVisible(True)
+        self.alocador_sessao = self.alocador_ramais.copia()
+
+    def definir_perfil_ativo(self, ativo):
+        PERFIL.ativo = ativo
+        self.statusBar().showMessage("Medição de desempenho ligada." if ativo else "Medição de desempenho desligada.", 3000)
+
+    def abrir_diagnostico(self):
+        DiagnosticsDialog(PERFIL, self).exec_()
+
+    def cancelar_processamento(self):
+        self.cancel_processing_button.setEnabled(False)
+        self.statusBar().showMessage("Cancelando processamento...")
+        self.processing_worker.cancel()
+        self.push_worker.cancel()
+
+    def on_processing_batch(self, lote):
+        with PERFIL.etapa('atualizar_lista', itens=len(lote)):
+            self.user_list_model.anexar(lote)
+
+    def on_processing_progress(self, linhas, total, taxa, eta):
+        if total:
+            self.progress_bar.setRange(0, total); self.progress_bar.setValue(linhas)
+        texto_eta = f", restam ~{eta:.0f}s" if eta >= 0 else ""
+        self.statusBar().showMessage(f"{self.processing_label}... {linhas} linhas ({taxa:.0f} linhas/s{texto_eta}) - {len(self.dados_usuarios)} usuários")
 
+    def _finalizar_processamento(self):
+        self.cancel_processing_button.setVisible(False)
+        self.progress_bar.setVisible(False)
+        self.set_ui_enabled(True)
+
+    def on_processing_finished(self, nao_encontrados, times_sem_id, cancelado):
+        self._finalizar_processamento()
+        self._sessao_alterada()
+        if nao_encontrados: QMessageBox.warning(self, "Times Inválidos", "Ignorados: " + ", ".join(nao_encontrados))
+        if times_sem_id: QMessageBox.warning(self, "IDs de Time Desconhecidos", "Não foi possível gerar ramais para os times: " + ", ".join(times_sem_id))
+        if self.alocador_sessao.plano.excedentes: QMessageBox.warning(self, "Ramais Esgotados", "Mais usuários do que ramais livres nos prefixos:\n" + self.alocador_sessao.plano.resumo_texto())
+        relatorio, self.relatorio_validacao = self.relatorio_validacao, None
+        if relatorio is not None and relatorio.problemas: self._mostrar_relatorio_validacao(relatorio)
+        if cancelado:
+            self.statusBar().showMessage(f"Processamento cancelado. {len(self.dados_usuarios)} usuários carregados.", 5000)
+        else:
+            etapas = f" ({PERFIL.resumo_texto()})" if PERFIL.ativo else ""
+            incremental = ""
+            if self.carga_incremental:
+                incremental = f" {self.cache_processamento.reaproveitados} reaproveitados, {self.cache_processamento.reprocessados} reprocessados."
+                self.carga_incremental = False
+            self.statusBar().showMessage(f"{len(self.dados_usuarios)} usuários processados.{incremental}{etapas}", 5000)
+
+    def on_validation_ready(self, relatorio):
+        self.relatorio_validacao = relatorio
+
+    def _mostrar_relatorio_validacao(self, relatorio):
+        resposta = QMessageBox.question(self, "Problemas na Planilha",
+                                        relatorio.resumo_texto() + "\n\nSalvar o relatório completo em CSV?",
+                                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if resposta != QMessageBox.Yes: return
+        caminho, _ = QFileDialog.getSaveFileName(self, "Salvar Relatório da Validação", "relatorio_validacao.csv", "CSV Files (*.csv)")
+        if not caminho: return
+        try:
+            relatorio.salvar_csv(caminho)
+            self.statusBar().showMessage(f"Relatório da validação salvo em '{caminho}'.", 5000)
+        except OSError as e:
+            QMessageBox.critical(self, "Erro ao Salvar", f"Não foi possível salvar o relatório da validação:\n{e}")
+
+    def on_processing_error(self, error_msg):
+        self._finalizar_processamento()
+        self._sessao_alterada()
+        QMessageBox.critical(self, "Erro ao Processar Planilha", error_msg)
+
+    def _escolher_time(self, titulo, texto, linhas=None):
+        """Pede um time da plataforma, mostrando quantos dos usuários (das 'linhas') já estão nele."""
         nomes_dos_times = list(self.team_id_map.keys())
         if not nomes_dos_times:
             QMessageBox.warning(self, "Sem Times", "Não foi possível encontrar a lista de times da plataforma.")
-            return
+            return None
+        contagem = self.user_list_model.membros('teams').contagem_por_nome(linhas)
+        opcoes = {f"{nome} ({contagem.get(nome, 0)})": nome for nome in nomes_dos_times}
+        escolha, ok = QInputDialog.getItem(self, titulo, texto, list(opcoes), 0, False)
+        return opcoes[escolha] if ok and escolha else None
 
-        time_selecionado, ok = QInputDialog.getItem(self, "Definir Time para Todos", 
-                                                    "Selecione o time que será aplicado a todos os usuários:", 
-                                                    nomes_dos_times, 0, False)
-        
-        if ok and time_selecionado:
-            for usuario in self.dados_usuarios:
-                for team_data in usuario.get('teams', []) or []:
-                    team_data['value'] = 1 if team_data['name'] == time_selecionado else 0
-            
-            if self.current_user_index is not None:
-                self.populate_form_with_user_data(self.dados_usuarios[self.current_user_index])
+    def _membros_alterados(self):
+        if self.current_user_index is not None:
+            self.populate_form_with_user_data(self.dados_usuarios[self.current_user_index])
+
+    def definir_time_para_todos(self):
+        if not self.dados_usuarios:
+            QMessageBox.warning(self, "Ação Inválida", "Não há usuários carregados na lista.")
+            return
 
+        time_selecionado = self._escolher_time("Definir Time para Todos", "Selecione o time que será aplicado a todos os usuários:")
+        if time_selecionado:
+            self.user_list_model.alterar_membros('teams', 'definir', {time_selecionado})
+            self._membros_alterados()
             self.statusBar().showMessage(f"O time '{time_selecionado}' foi definido para todos os {len(self.dados_usuarios)} usuários.", 5000)
 
+    def aplicar_time_aos_selecionados(self):
+        indices = (self.user_list_model.indice_usuario(i) for i in self.user_list_view.selectionModel().selectedRows())
+        linhas = sorted(i for i in indices if i is not None)
+        if not linhas:
+            QMessageBox.warning(self, "Ação Inválida", "Selecione um ou mais usuários na lista (Ctrl/Shift + clique).")
+            return
+
+        operacao, ok = QInputDialog.getItem(self, "Times dos Selecionados", f"O que fazer com os {len(linhas)} usuários selecionados?",
+                                            list(self.OPERACOES_MEMBROS), 0, False)
+        if not ok: return
+        time_selecionado = self._escolher_time("Times dos Selecionados", "Selecione o time (entre parênteses, quantos selecionados já estão nele):", linhas)
+        if time_selecionado:
+            alterados = self.user_list_model.alterar_membros('teams', self.OPERACOES_MEMBROS[operacao], {time_selecionado}, linhas)
+            self._membros_alterados()
+            self.statusBar().showMessage(f"Time '{time_selecionado}': {alterados} de {len(linhas)} usuários selecionados alterados.", 5000)
+
     def closeEvent(self, event):
-        if self.api_thread and self.api_thread.isRunning():
-            self.api_thread.quit()
-            self.api_thread.wait() 
+        if self.processing_worker:
+            self.processing_worker.cancel()
+        if self.push_worker:
+            self.push_worker.cancel()
+        for thread in (self.api_thread, self.processing_thread):
+            if thread and thread.isRunning():
+                thread.quit()
+                thread.wait()
+        if self.autosave:
+            self.autosave.close()
         event.accept()
 
     def atualizar_lista_gui(self):
-        self.user_list_widget.currentItemChanged.disconnect()
-        self.user_list_widget.clear()
-        for usuario in self.dados_usuarios:
-            prefixo = "🆕" if usuario.get('is_new', True) else "🔄"
-            display_text = f"{prefixo} {usuario.get('first_name')} {usuario.get('last_name')} ({usuario.get('email')})"
-            self.user_list_widget.addItem(display_text)
-        self.user_list_widget.currentItemChanged.connect(self.on_user_selection_changed)
+        self.user_list_model.definir_usuarios(self.dados_usuarios)
         self.set_ui_enabled(True)
         
     def criar_formulario_dinamico(self):
@@ -222,19 +530,29 @@ class UserEditorApp(QMainWindow):
         if 'extension_number' in self.form_line_edits:
             self.form_line_edits['extension_number'].setReadOnly(False)
             
-        self.role_checkboxes_map = self._create_checkbox_group(form_layout, "Cargos (Roles)", self.template_usuario.get('roles', []))
-        self.team_checkboxes_map = self._create_checkbox_group(form_layout, "Times (Teams)", self.template_usuario.get('teams', []))
+        self.role_checklist = self._create_checklist_group(form_layout, "Cargos (Roles)", 'roles')
+        self.team_checklist = self._create_checklist_group(form_layout, "Times (Teams)", 'teams')
 
-    def _create_checkbox_group(self, layout, title, items):
-        group_box = QGroupBox(title); group_layout = QVBoxLayout(); checkbox_map = {}
-        for item in items or []:
-            name = item.get("name"); checkbox = QCheckBox(name); group_layout.addWidget(checkbox); checkbox_map[name] = checkbox
+    def _create_checklist_group(self, layout, title, group):
+        """Grupo com filtro e lista marcável (virtualizada) dos itens do template."""
+        checklist = ChecklistModel(self.molde_usuario, group, self)
+        group_box = QGroupBox(title); group_layout = QVBoxLayout()
+        filter_edit = QLineEdit(); filter_edit.setPlaceholderText("Filtrar..."); filter_edit.setClearButtonEnabled(True)
+        count_label = QLabel()
+        # QTreeView plano: ao contrário da QListView, não refaz o layout de todas as linhas a cada dataChanged
+        view = QTreeView(); view.setUniformRowHeights(True); view.setRootIsDecorated(False); view.setHeaderHidden(True)
+        view.setModel(checklist)
+        view.setMaximumHeight(view.sizeHintForRow(0) * 12 + 2 * view.frameWidth() if len(checklist) else 60)
+        filter_edit.textChanged.connect(checklist.filtrar)
+        checklist.marcados_alterados.connect(lambda total: count_label.setText(f"{total} de {len(checklist)} marcados"))
+        checklist.marcados_alterados.emit(0)
+        group_layout.addWidget(filter_edit); group_layout.addWidget(view); group_layout.addWidget(count_label)
         group_box.setLayout(group_layout); layout.addRow(group_box)
-        return checkbox_map
+        return checklist
 
-    def on_user_selection_changed(self, current_item, previous_item):
-        if not current_item: self.current_user_index = None; return
-        self.current_user_index = self.user_list_widget.row(current_item)
+    def on_user_selection_changed(self, current, previous):
+        self.current_user_index = self.user_list_model.indice_usuario(current)
+        if self.current_user_index is None: return
         user_data = self.dados_usuarios[self.current_user_index]
         self.populate_form_with_user_data(user_data)
         self.add_new_user_button.setEnabled(False); self.save_changes_button.setEnabled(True)
@@ -243,23 +561,37 @@ class UserEditorApp(QMainWindow):
         for key, widget in self.form_line_edits.items(): widget.setText(str(user_data.get(key, "")))
         for key, widget in self.form_checkboxes.items(): widget.setChecked(str(user_data.get(key, "0")) in ["1", "true", "True"])
         for key, widget in self.form_comboboxes.items(): widget.setCurrentText(str(user_data.get(key, "")))
-        self._update_checkbox_group(self.role_checkboxes_map, user_data.get('roles', []))
-        self._update_checkbox_group(self.team_checkboxes_map, user_data.get('teams', []))
+        self.role_checklist.marcar_do_usuario(user_data)
+        self.team_checklist.marcar_do_usuario(user_data)
+
+    def aplicar_busca(self):
+        self.search_timer.stop()
+        # O usuário em edição continua no formulário (com o que já foi digitado), visível ou não no filtro
+        selecao = self.user_list_view.selectionModel()
+        selecao.currentChanged.disconnect(self.on_user_selection_changed)
+        try:
+            with PERFIL.etapa('buscar_usuarios'):
+                self.user_list_model.filtrar(self.search_line_edit.text(), self.search_field_combo.currentData(),
+                                             self.search_status_combo.currentData())
+            indice = self.user_list_model.indice_modelo(self.current_user_index)
+            if indice.isValid():
+                self.user_list_view.setCurrentIndex(indice); self.user_list_view.scrollTo(indice)
+        finally:
+            selecao.currentChanged.connect(self.on_user_selection_changed)
 
-    def _update_checkbox_group(self, checkbox_map, items):
-        for checkbox in checkbox_map.values(): checkbox.setChecked(False)
-        for item in items or []:
-            if item.get("value") in [1, "1", True]:
-                name = item.get("name")
-                if name in checkbox_map: checkbox_map[name].setChecked(True)
+    def atualizar_contagem_busca(self, *args):
+        total = len(self.dados_usuarios)
+        if self.user_list_model.filtrado():
+            self.search_count_label.setText(f"{self.user_list_model.rowCount()} de {total} usuários")
+        else:
+            self.search_count_label.setText(f"{total} usuários" if total else "")
 
     def clear_form_for_new_user(self):
-        self.user_list_widget.setCurrentRow(-1); self.current_user_index = None
+        self.user_list_view.setCurrentIndex(QModelIndex()); self.current_user_index = None
         for widget in self.form_line_edits.values(): widget.clear()
         for widget in self.form_checkboxes.values(): widget.setChecked(False)
         for widget in self.form_comboboxes.values(): widget.setCurrentIndex(-1)
-        for widget in self.role_checkboxes_map.values(): widget.setChecked(False)
-        for widget in self.team_checkboxes_map.values(): widget.setChecked(False)
+        self.role_checklist.limpar(); self.team_checklist.limpar()
         self.add_new_user_button.setEnabled(True); self.save_changes_button.setEnabled(False)
         self.statusBar().showMessage("Formulário limpo. Preencha para um novo usuário.", 5000)
 
@@ -267,30 +599,37 @@ class UserEditorApp(QMainWindow):
         for key, widget in self.form_line_edits.items(): target_user_obj[key] = widget.text()
         for key, widget in self.form_checkboxes.items(): target_user_obj[key] = "1" if widget.isChecked() else "0"
         for key, widget in self.form_comboboxes.items(): target_user_obj[key] = widget.currentText()
-        self._read_checkbox_group_into_user(self.role_checkboxes_map, target_user_obj.get('roles'))
-        self._read_checkbox_group_into_user(self.team_checkboxes_map, target_user_obj.get('teams'))
-
-    def _read_checkbox_group_into_user(self, checkbox_map, user_item_list):
-        for item in user_item_list or []:
-            name = item.get("name")
-            if name in checkbox_map:
-                item['value'] = 1 if checkbox_map[name].isChecked() else 0
+        for checklist in (self.role_checklist, self.team_checklist):
+            target_user_obj.definir_itens(checklist.grupo, checklist.valores())
 
     def save_changes(self):
         if self.current_user_index is None: return
         user_a_modificar = self.dados_usuarios[self.current_user_index]
+        ramal_anterior = user_a_modificar.get('extension_number')
         self._read_data_from_form(user_a_modificar)
-        self.atualizar_lista_gui()
-        self.user_list_widget.setCurrentRow(self.current_user_index)
+        self._atualizar_reserva_ramal(ramal_anterior, user_a_modificar.get('extension_number'))
+        self.user_list_model.usuario_alterado(self.current_user_index)
         self.statusBar().showMessage(f"Usuário '{user_a_modificar['email']}' atualizado.", 5000)
     
+    def _atualizar_reserva_ramal(self, ramal_anterior, ramal_novo):
+        """Mantém o alocador da sessão em dia quando um ramal é alterado manualmente."""
+        if self.alocador_sessao is None: self.alocador_sessao = self.alocador_ramais.copia()
+        if ramal_anterior == ramal_novo: return
+        if ramal_anterior: self.alocador_sessao.liberar(ramal_anterior)
+        if ramal_novo: self.alocador_sessao.reservar(ramal_novo)
+        self._sessao_alterada()
+
     def add_new_user(self):
+        if not self.teams_loaded:
+            # O ramal do usuário novo é reservado contra os ramais da plataforma, que vêm com os times
+            QMessageBox.warning(self, "Aviso", "Aguarde o carregamento da lista de times da API."); return
         email_widget = self.form_line_edits.get('email');
         if not email_widget or not email_widget.text():
             QMessageBox.warning(self, "Erro", "O campo 'email' é obrigatório."); return
-        novo_usuario = copy.deepcopy(self.template_usuario); self._read_data_from_form(novo_usuario)
+        novo_usuario = self.molde_usuario.novo_registro(); self._read_data_from_form(novo_usuario)
         novo_usuario.update({'location': "", 'alias': "", 'new_email': "", 'is_new': True})
-        self.dados_usuarios.append(novo_usuario); self.atualizar_lista_gui(); self.clear_form_for_new_user()
+        self._atualizar_reserva_ramal(None, novo_usuario.get('extension_number'))
+        self.user_list_model.anexar([novo_usuario]); self.set_ui_enabled(True); self.clear_form_for_new_user()
         self.statusBar().showMessage(f"Novo usuário '{novo_usuario['email']}' adicionado.", 5000)
     
     def comparar_com_xlsx(self):
@@ -299,85 +638,101 @@ class UserEditorApp(QMainWindow):
             return
         caminho_novo, _ = QFileDialog.getOpenFileName(self, "Selecione a Nova Planilha para Comparar", "", "Excel Files (*.xlsx)")
         if not caminho_novo: return
-        try:
-            df_novo = pd.read_excel(caminho_novo, header=2)
-            if 'Email' not in df_novo.columns:
-                raise ValueError("A nova planilha precisa ter uma coluna 'Email'.")
-            emails_atuais = {user['email'] for user in self.dados_usuarios}
-            emails_novos = set(df_novo['Email'].dropna().astype(str))
-            emails_em_comum = emails_atuais.intersection(emails_novos)
-            emails_removidos = emails_atuais - emails_novos
-            emails_adicionados = emails_novos - emails_atuais
-            resultado_texto = (
-                f"--- Resultado da Comparação ---\n\n"
-                f"👥 Usuários em comum: {len(emails_em_comum)}\n"
-                f"➕ Adicionados (só na nova lista): {len(emails_adicionados)}\n"
-                f"➖ Removidos (só na lista antiga): {len(emails_removidos)}\n\n"
-                f"--- Detalhes ---\n\n"
-                f"✅ Adicionados:\n" + ("\n".join(f"- {email}" for email in sorted(list(emails_adicionados))) or "Nenhum") + "\n\n"
-                f"❌ Removidos:\n" + ("\n".join(f"- {email}" for email in sorted(list(emails_removidos))) or "Nenhum")
-            )
-            msgBox = QMessageBox(self); msgBox.setIcon(QMessageBox.Information)
-            msgBox.setText("Comparação Concluída"); msgBox.setInformativeText(resultado_texto)
-            msgBox.setWindowTitle("Relatório de Comparação"); msgBox.setStandardButtons(QMessageBox.Ok)
-            msgBox.exec_()
-            self.statusBar().showMessage("Comparação concluída.", 5000)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro na Comparação", f"Não foi possível comparar os arquivos:\n{e}")
+        self.set_ui_enabled(False, "Comparando planilhas...")
+        self.progress_bar.setRange(0, 0); self.progress_bar.setVisible(True)
+        self.trigger_compare.emit(caminho_novo, list(self.dados_usuarios), self.molde_usuario, self.usuarios_plataforma, self.team_id_map)
+
+    def on_comparison_ready(self, resultado):
+        self._finalizar_processamento()
+        self.statusBar().showMessage(f"Comparação concluída: {len(resultado.diferencas)} diferenças.", 5000)
+        from .comparison_dialog import ComparisonDialog
+        ComparisonDialog(resultado, self).exec_()
+
+    def on_comparison_error(self, error_msg):
+        self._finalizar_processamento()
+        QMessageBox.critical(self, "Erro na Comparação", error_msg)
 
     def salvar_arquivo_json(self):
-        caminho, _ = QFileDialog.getSaveFileName(self, "Salvar Arquivo JSON", "dados_finais.json", "JSON Files (*.json)")
+        caminho, filtro = QFileDialog.getSaveFileName(self, "Salvar Arquivo JSON", "dados_finais.json", ";;".join(self.FILTROS_JSON))
         if not caminho: return
-        try:
-            dados_para_salvar = [user.copy() for user in self.dados_usuarios]
-            for user in dados_para_salvar:
-                user.pop('is_new', None)
-            with open(caminho, 'w', encoding='utf-8') as f:
-                json.dump(dados_para_salvar, f, indent=4, ensure_ascii=False)
-            self.statusBar().showMessage(f"Arquivo salvo com sucesso em '{caminho}'!", 5000)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro ao Salvar", f"Não foi possível salvar o arquivo: {e}")
+        formato = self.FILTROS_JSON.get(filtro, 'jsonl' if caminho.lower().endswith('.jsonl') else 'indentado')
+        self._iniciar_exportacao("Salvando arquivo JSON")
+        self.trigger_export_json.emit(list(self.dados_usuarios), caminho, formato)
 
     def salvar_arquivo_csv(self):
         if not self.dados_usuarios:
             QMessageBox.warning(self, "Aviso", "Não há dados para salvar."); return
         caminho, _ = QFileDialog.getSaveFileName(self, "Salvar Arquivo CSV", "dados_finais.csv", "CSV Files (*.csv)")
         if not caminho: return
-        try:
-            json_key_map = {
-                'Email': 'email', 'New email': 'new_email', 'Agent ID': 'agent_number', 'First name': 'first_name',
-                'Last name': 'last_name', 'Alias': 'alias', 'Status': 'status', 'Location': 'location',
-                'Chat concurrency': 'max_chat_limit', 'Chat concurrency status': 'max_chat_limit_enabled',
-                'Non-restricted international calling': 'unrestricted_international_calling',
-                'External User': 'external_user', 'External SIP URI': 'ucaas_sip_uri',
-                'UCaaS username': 'ucaas_user_name', 'Agent Extensions': 'extension_number',
-                'Availability Filter Name': 'availability_filter',
-                'Direct Inbound Number: 1': 'direct_inbound_number1', 'Direct Inbound Number: 2': 'direct_inbound_number2',
-                'Direct Inbound Number: 3': 'direct_inbound_number3', 'Direct Inbound Number: 4': 'direct_inbound_number4',
-                'Direct Inbound Number: 5': 'direct_inbound_number5'
-            }
-            final_headers = list(json_key_map.keys())
-            role_headers = [f"Role: {role['name']}" for role in self.template_usuario.get('roles', []) or []]
-            team_headers = [f"Team: {team['name']}" for team in self.template_usuario.get('teams', []) or []]
-            final_headers.extend(role_headers); final_headers.extend(team_headers)
-            dados_planos = []
-            for user_data in self.dados_usuarios:
-                linha = {}
-                for header, json_key in json_key_map.items():
-                    linha[header] = user_data.get(json_key, "")
-                active_roles = {role['name'] for role in user_data.get('roles', []) or [] if role.get('value') == 1}
-                for role_header in role_headers:
-                    role_name = role_header.replace("Role: ", "")
-                    linha[role_header] = 1 if role_name in active_roles else 0
-                active_teams = {team['name'] for team in user_data.get('teams', []) or [] if team.get('value') == 1}
-                for team_header in team_headers:
-                    team_name = team_header.replace("Team: ", "")
-                    linha[team_header] = 1 if team_name in active_teams else 0
-                dados_planos.append(linha)
-            
-            df = pd.DataFrame(dados_planos)
-            df = df.reindex(columns=final_headers)
-            df.to_csv(caminho, index=False, sep=',', encoding='utf-8-sig')
-            self.statusBar().showMessage(f"Arquivo CSV salvo com sucesso em '{caminho}'!", 5000)
-        except Exception as e:
-            QMessageBox.critical(self, "Erro ao Salvar CSV", f"Não foi possível salvar o arquivo:\n{e}")
\ No newline at end of file
+        self._iniciar_exportacao("Salvando arquivo CSV")
+        self.trigger_export_csv.emit(list(self.dados_usuarios), self.template_usuario, caminho)
+
+    def _iniciar_exportacao(self, descricao):
+        self.export_label = descricao
+        self.set_ui_enabled(False, f"{descricao}...")
+        self.progress_bar.setRange(0, len(self.dados_usuarios)); self.progress_bar.setValue(0); self.progress_bar.setVisible(True)
+
+    def on_export_progress(self, escritos, total):
+        self.progress_bar.setValue(escritos)
+        self.statusBar().showMessage(f"{self.export_label}... {escritos}/{total} usuários")
+
+    def on_export_finished(self, caminho, resumo):
+        self.progress_bar.setVisible(False)
+        self.set_ui_enabled(True)
+        memoria = f", {resumo.memoria_bloco / 2**20:.1f} MB por bloco" if resumo.memoria_bloco is not None else ""
+        self.statusBar().showMessage(f"Arquivo salvo com sucesso em '{caminho}'! ({resumo.linhas} usuários em {resumo.segundos:.2f}s{memoria})", 5000)
+
+    def on_export_error(self, error_msg):
+        self.progress_bar.setVisible(False)
+        self.set_ui_enabled(True)
+        QMessageBox.critical(self, "Erro ao Salvar", error_msg)
+
+    def enviar_para_plataforma(self):
+        if not self.dados_usuarios:
+            QMessageBox.warning(self, "Aviso", "Não há usuários para enviar."); return
+        from .logic.envio import a_enviar
+        novos, existentes = a_enviar(self.dados_usuarios, os.getenv("AGENTS_UPDATE_API_URL"))
+        pulados = len(self.dados_usuarios) - novos - existentes
+        if not novos + existentes:
+            QMessageBox.warning(self, "Aviso", f"Os {pulados} usuários já existem na plataforma e AGENTS_UPDATE_API_URL "
+                                               "não está configurada para atualizá-los."); return
+        aviso = (f"\n\n{pulados} usuários existentes não serão enviados: AGENTS_UPDATE_API_URL não está configurada "
+                 "(um POST criaria agentes duplicados).") if pulados else ""
+        resposta = QMessageBox.question(self, "Enviar para a Plataforma",
+                                        f"Enviar {novos} usuários novos e {existentes} existentes para a plataforma?{aviso}",
+                                        QMessageBox.Yes | QMessageBox.No, QMessageBox.No)
+        if resposta != QMessageBox.Yes: return
+        # Um log que já existe é retomado: os usuários enviados com sucesso nele são pulados
+        caminho, _ = QFileDialog.getSaveFileName(self, "Log do Envio (um log existente é retomado)", "envio_usuarios.jsonl",
+                                                 "JSON Lines (*.jsonl)", options=QFileDialog.DontConfirmOverwrite)
+        if not caminho: return
+        self.falhas_envio = []
+        self.set_ui_enabled(False, "Enviando usuários para a plataforma...")
+        self.cancel_processing_button.setVisible(True); self.cancel_processing_button.setEnabled(True)
+        self.progress_bar.setRange(0, novos + existentes); self.progress_bar.setValue(0); self.progress_bar.setVisible(True)
+        self.trigger_push.emit(list(self.dados_usuarios), caminho)
+
+    def on_push_progress(self, concluidos, total, taxa, falhas):
+        self.progress_bar.setRange(0, total); self.progress_bar.setValue(concluidos)
+        self.statusBar().showMessage(f"Enviando para a plataforma... {concluidos}/{total} usuários ({taxa:.1f} usuários/s) - {falhas} falhas")
+
+    def on_push_failure(self, resultado):
+        self.falhas_envio.append(resultado)
+
+    def on_push_finished(self, resumo, caminho_log):
+        self._finalizar_processamento()
+        texto = (f"{resumo.enviados} enviados, {resumo.falhas} falhas e {resumo.pulados} já enviados antes (pulados) "
+                 f"em {resumo.segundos:.1f}s.\nLog por usuário: {caminho_log}")
+        if resumo.cancelado:
+            texto = "Envio cancelado. Envie de novo com o mesmo log para continuar.\n" + texto
+        if self.falhas_envio:
+            linhas = [f"{r.email}: {r.status or 'sem resposta'} {r.erro[:80]}" for r in self.falhas_envio[:10]]
+            if len(self.falhas_envio) > 10: linhas.append(f"... e mais {len(self.falhas_envio) - 10}")
+            QMessageBox.warning(self, "Envio Concluído com Falhas", texto + "\n\nFalhas:\n" + "\n".join(linhas))
+        else:
+            QMessageBox.information(self, "Envio Concluído", texto)
+        self.statusBar().showMessage(f"Envio: {resumo.enviados} enviados, {resumo.falhas} falhas, {resumo.pulados} pulados.", 5000)
+
+    def on_push_error(self, error_msg):
+        self._finalizar_processamento()
+        QMessageBox.critical(self, "Erro no Envio", error_msg)
\ No newline at end of file
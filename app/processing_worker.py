@@ -0,0 +1,146 @@
+# app/processing_worker.py
+import importlib
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from .logic.sessao_sqlite import SessaoSqlite, eh_sessao_sqlite
+from .logic.perfil import PERFIL, memoria_processo
+
+TAMANHO_LOTE_SESSAO = 5000
+# Módulos que trazem pandas/openpyxl: importados no primeiro uso ou por preload(), nunca ao abrir a janela
+MODULOS_PESADOS = ('.logic.leitor_xlsx', '.logic.validacao', '.logic.incremental', '.logic.comparacao', '.logic.exportacao')
+
+class ProcessingWorker(QObject):
+    """Worker que vive em uma thread e processa planilhas em lotes, sem travar a interface."""
+    batch_ready = pyqtSignal(list)
+    progress = pyqtSignal(int, int, float, float)  # linhas lidas, total estimado, linhas/s, ETA em segundos (-1 se desconhecido)
+    finished = pyqtSignal(object, object, bool)    # times não encontrados, times sem ID, cancelado
+    error = pyqtSignal(str)
+    comparison_ready = pyqtSignal(object)          # ResultadoComparacao
+    comparison_error = pyqtSignal(str)
+    validation_ready = pyqtSignal(object)          # RelatorioValidacao da carga (antes de finished)
+    preloaded = pyqtSignal(float)                  # segundos gastos importando MODULOS_PESADOS
+
+    def __init__(self):
+        super().__init__()
+        self._cancelar = threading.Event()
+
+    def cancel(self):
+        """Pode ser chamado de qualquer thread; o processamento para no próximo lote."""
+        self._cancelar.set()
+
+    @pyqtSlot()
+    def preload(self):
+        """Importa MODULOS_PESADOS nesta thread, com a janela já aberta, para a primeira carga não esperar por eles."""
+        inicio = time.perf_counter()
+        for modulo in MODULOS_PESADOS:
+            importlib.import_module(modulo, __package__)
+        PERFIL.registrar('importar_modulos', inicio, time.perf_counter() - inicio, categoria='inicio')
+        self.preloaded.emit(time.perf_counter() - inicio)
+
+    @pyqtSlot(str, object, object, bool, object, object, object, object)
+    def start_job(self, caminho, molde, usuarios_plataforma, gerar_ramais, alocador, team_id_map, anterior, novo):
+        """
+        Este slot é chamado para processar uma planilha. Com um CacheProcessamento
+        'anterior', as linhas que não mudaram reaproveitam os usuários já processados;
+        'novo' recebe as impressões das linhas desta carga. As linhas passam antes
+        pelo ValidadorPlanilha; o relatório sai em validation_ready.
+        """
+        from .logic.incremental import processar_em_blocos_incremental
+        from .logic.leitor_xlsx import estimar_linhas, ler_xlsx_em_blocos
+        from .logic.validacao import ValidadorPlanilha
+
+        self._cancelar.clear()
+        nao_encontrados, times_sem_id = set(), set()
+        linhas_lidas = 0
+        try:
+            total_estimado = estimar_linhas(caminho)
+            memoria, inicio = memoria_processo(), time.perf_counter()
+
+            def contar_linhas(blocos):
+                nonlocal linhas_lidas
+                for bloco in blocos:
+                    linhas_lidas += len(bloco)
+                    yield bloco
+
+            validador = ValidadorPlanilha(molde)
+            blocos = PERFIL.medir_gerador('leitura_xlsx', ler_xlsx_em_blocos(caminho))
+            resultados = processar_em_blocos_incremental(
+                validador.filtrar(contar_linhas(blocos)), molde, usuarios_plataforma, gerar_ramais, alocador, team_id_map, anterior, novo
+            )
+            try:
+                for novos, nao_encontrados_bloco, sem_id_bloco in resultados:
+                    nao_encontrados.update(nao_encontrados_bloco)
+                    times_sem_id.update(sem_id_bloco)
+                    self.batch_ready.emit(novos)
+
+                    decorrido = time.perf_counter() - inicio
+                    taxa = linhas_lidas / decorrido if decorrido > 0 else 0.0
+                    restante = max(total_estimado - linhas_lidas, 0)
+                    eta = restante / taxa if taxa > 0 and total_estimado else -1.0
+                    self.progress.emit(linhas_lidas, max(total_estimado, linhas_lidas), taxa, eta)
+
+                    if self._cancelar.is_set():
+                        break
+            finally:
+                resultados.close()
+
+            PERFIL.registrar('carga_planilha', inicio, time.perf_counter() - inicio, itens=linhas_lidas, categoria='total', memoria_inicio=memoria)
+            self.validation_ready.emit(validador.relatorio)
+            self.finished.emit(nao_encontrados, times_sem_id, self._cancelar.is_set())
+        except Exception as e:
+            self.error.emit(f"Ocorreu um erro ao processar a planilha: {e}")
+
+    @pyqtSlot(str, object, object, object)
+    def start_reload(self, caminho, molde, usuarios_plataforma, alocador):
+        """
+        Recarrega uma sessão salva em JSON/JSONL ou SQLite, em lotes. 'is_new' é
+        recalculado com os usuários atuais da plataforma e os ramais são
+        reservados no alocador (na SQLite, também os ramais alocados na sessão).
+        """
+        self._cancelar.clear()
+        sessao = None
+        try:
+            memoria, inicio, lidos, lote, total = memoria_processo(), time.perf_counter(), 0, [], 0
+            if eh_sessao_sqlite(caminho):
+                sessao = SessaoSqlite(caminho)
+                total = len(sessao)
+                for ramal in sessao.ramais(): alocador.reservar(ramal)
+                usuarios = sessao.ler_usuarios(molde)
+            else:
+                from .logic.exportacao import ler_json_usuarios
+                usuarios = (molde.registro_de_dict(dados) for dados in ler_json_usuarios(caminho))
+            for usuario in usuarios:
+                nome_completo = f"{usuario.get('first_name') or ''} {usuario.get('last_name') or ''}"
+                usuario['is_new'] = usuarios_plataforma.times_de(nome_completo, usuario.get('email'), usuario.get('agent_number')) is None
+                if usuario.get('extension_number'): alocador.reservar(usuario['extension_number'])
+                lote.append(usuario)
+                if len(lote) >= TAMANHO_LOTE_SESSAO:
+                    lidos += len(lote)
+                    self.batch_ready.emit(lote); lote = []
+                    decorrido = time.perf_counter() - inicio
+                    self.progress.emit(lidos, total, lidos / decorrido if decorrido > 0 else 0.0, -1.0)
+                    if self._cancelar.is_set(): break
+            if lote and not self._cancelar.is_set():
+                lidos += len(lote)
+                self.batch_ready.emit(lote)
+            PERFIL.registrar('recarregar_sessao', inicio, time.perf_counter() - inicio, itens=lidos, categoria='total', memoria_inicio=memoria)
+            self.finished.emit(set(), set(), self._cancelar.is_set())
+        except Exception as e:
+            self.error.emit(f"Ocorreu um erro ao recarregar a sessão: {e}")
+        finally:
+            if sessao is not None: sessao.close()
+
+    @pyqtSlot(str, object, object, object, object)
+    def start_compare(self, caminho, usuarios, molde, usuarios_plataforma, team_id_map):
+        """Compara os usuários carregados com uma nova planilha (todas as abas)."""
+        from .logic.comparacao import comparar_com_planilha
+
+        try:
+            memoria, inicio = memoria_processo(), time.perf_counter()
+            resultado = comparar_com_planilha(usuarios, caminho, molde, usuarios_plataforma, team_id_map)
+            PERFIL.registrar('comparar_com_xlsx', inicio, time.perf_counter() - inicio, itens=len(usuarios), categoria='total', memoria_inicio=memoria)
+            self.comparison_ready.emit(resultado)
+        except Exception as e:
+            self.comparison_error.emit(f"Não foi possível comparar os arquivos:\n{e}")
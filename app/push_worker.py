@@ -0,0 +1,67 @@
+# app/push_worker.py
+import os
+import threading
+import time
+from PyQt5.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from .logic.perfil import PERFIL
+
+INTERVALO_PROGRESSO = 0.25  # segundos entre dois avisos de progresso à interface
+
+
+class PushWorker(QObject):
+    """Worker que vive em uma thread e envia os usuários à plataforma, sem travar a interface."""
+    progress = pyqtSignal(int, int, float, int)  # concluídos, total, usuários/s, falhas
+    failure = pyqtSignal(object)                 # ResultadoEnvio de cada falha definitiva
+    finished = pyqtSignal(object, str)           # ResumoEnvio, caminho do log
+    error = pyqtSignal(str)
+
+    def __init__(self):
+        super().__init__()
+        self._cancelar = threading.Event()
+
+    def cancel(self):
+        """Pode ser chamado de qualquer thread; as requisições em andamento terminam e o resto fica para a retomada."""
+        self._cancelar.set()
+
+    @pyqtSlot(object, str)
+    def start_push(self, usuarios, caminho_log):
+        """
+        Este slot é chamado para enviar os usuários. Novos vão por POST em
+        AGENTS_API_URL; existentes, por PATCH em AGENTS_UPDATE_API_URL (se
+        configurada; sem ela, os existentes não são enviados). Conexões e taxa
+        vêm de PUSH_MAX_CONNECTIONS e PUSH_RATE_LIMIT.
+        """
+        from .api_client import ApiClient
+        from .logic.envio import CONEXOES_PADRAO, TAXA_PADRAO, RegistroEnvio, a_enviar, enviar_usuarios, montar_pedidos
+
+        self._cancelar.clear()
+        try:
+            client = ApiClient()
+            conexoes = int(os.getenv("PUSH_MAX_CONNECTIONS") or CONEXOES_PADRAO)
+            taxa = float(os.getenv("PUSH_RATE_LIMIT") or TAXA_PADRAO)
+            url_existentes = os.getenv("AGENTS_UPDATE_API_URL")
+            pedidos = montar_pedidos(usuarios, client.url("AGENTS_API_URL"), url_existentes)
+            total = sum(a_enviar(usuarios, url_existentes))
+            ultimo_aviso = 0.0
+
+            def progresso(concluidos, total, taxa_usuarios, falhas):
+                nonlocal ultimo_aviso
+                agora = time.perf_counter()
+                if agora - ultimo_aviso >= INTERVALO_PROGRESSO or concluidos == total:
+                    ultimo_aviso = agora
+                    self.progress.emit(concluidos, total, taxa_usuarios, falhas)
+
+            inicio = time.perf_counter()
+            sessao = client.sessao_envio(conexoes)
+            try:
+                with RegistroEnvio(caminho_log) as registro:
+                    resumo = enviar_usuarios(pedidos, total, sessao, registro, conexoes=conexoes, taxa=taxa,
+                                             progresso=progresso, falha=self.failure.emit, cancelado=self._cancelar)
+            finally:
+                sessao.close()
+            PERFIL.registrar('envio_plataforma', inicio, time.perf_counter() - inicio,
+                             itens=resumo.enviados + resumo.falhas, categoria='total')
+            self.finished.emit(resumo, caminho_log)
+        except Exception as e:
+            self.error.emit(f"Ocorreu um erro ao enviar os usuários: {e}")
@@ -0,0 +1,108 @@
+# app/session_autosave.py
+from PyQt5.QtCore import QObject, QTimer
+
+from .logic.perfil import PERFIL
+from .logic.sessao_sqlite import GravadorSessao, SessaoSqlite
+
+ATRASO_MS = 1000        # espera máxima entre uma alteração e a gravação
+LOTE_GRAVACAO = 10000   # usuários copiados por vez na thread da interface
+
+
+class SessionAutosave(QObject):
+    """
+    Salvamento automático da sessão em SQLite. Acompanha os sinais do
+    UserListModel e, no máximo ATRASO_MS depois da primeira alteração pendente,
+    copia o estado compacto só dos usuários alterados e o entrega ao
+    GravadorSessao, que grava em segundo plano. Muitas alterações de uma vez
+    (carga, time para todos) são copiadas em lotes de LOTE_GRAVACAO, um por
+    volta do loop de eventos. 'snapshot' é uma função que retorna o template e
+    o mapa de times atuais.
+    """
+
+    def __init__(self, modelo, caminho, snapshot, parent=None):
+        super().__init__(parent)
+        self.modelo = modelo
+        self.caminho = caminho
+        self._snapshot = snapshot
+        self._pendentes = set()
+        self._trocada = False
+        self._ramais = None
+        self._pausado = False
+        self.gravador = GravadorSessao(caminho)
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.gravar)
+        modelo.lista_trocada.connect(self._lista_trocada)
+        modelo.usuarios_alterados.connect(self._usuarios_alterados)
+
+    @property
+    def erro(self):
+        return self.gravador.erro
+
+    def _agendar(self):
+        # Não reinicia o timer: durante uma carga longa a sessão continua sendo gravada aos poucos
+        if not self._timer.isActive(): self._timer.start(ATRASO_MS)
+
+    def _lista_trocada(self):
+        if self._pausado: return
+        self._trocada = True
+        self._pendentes = set(range(len(self.modelo.usuarios())))
+        self._ramais = None
+        self._agendar()
+
+    def _usuarios_alterados(self, posicoes):
+        if self._pausado: return
+        self._pendentes.update(posicoes)
+        self._agendar()
+
+    def ramais_alterados(self, ramais):
+        """Ramais alocados na sessão (sem os que já existiam na plataforma)."""
+        if self._pausado: return
+        self._ramais = set(ramais)
+        self._agendar()
+
+    def pausar(self):
+        """Ignora as alterações (ex.: enquanto a própria sessão é restaurada deste arquivo)."""
+        self.gravar(limite=None)
+        self._pausado = True
+
+    def retomar(self, ramais):
+        """
+        Volta a acompanhar as alterações depois de restaurar a sessão deste arquivo.
+        Usuários além dos restaurados (restauração cancelada) são apagados, e tudo é
+        regravado se o template mudou desde que a sessão foi salva.
+        """
+        self._pausado = False
+        resumo = SessaoSqlite.resumo(self.caminho) if self.gravador.erro is None else None
+        if resumo is not None and resumo.template != self._snapshot()[0]:
+            self._lista_trocada()
+        else:
+            self.gravador.truncar(len(self.modelo.usuarios()))
+        self.ramais_alterados(ramais)
+
+    def gravar(self, limite=LOTE_GRAVACAO):
+        """Entrega agora as alterações pendentes ao gravador (até 'limite' usuários; o resto na próxima volta)."""
+        self._timer.stop()
+        if self._pausado: return
+        usuarios = self.modelo.usuarios()
+        with PERFIL.etapa('salvar_sessao', itens=len(self._pendentes)):
+            if self._trocada:
+                template, team_id_map = self._snapshot()
+                self.gravador.limpar(template, team_id_map)
+                self._trocada = False
+            if self._pendentes:
+                posicoes = sorted(p for p in self._pendentes if p < len(usuarios))
+                if limite is not None and len(posicoes) > limite:
+                    posicoes, self._pendentes = posicoes[:limite], set(posicoes[limite:])
+                    self._timer.start(0)
+                else:
+                    self._pendentes = set()
+                self.gravador.gravar_usuarios([(p, usuarios[p].estado()) for p in posicoes])
+            if self._ramais is not None:
+                self.gravador.definir_ramais(self._ramais)
+                self._ramais = None
+
+    def close(self):
+        """Grava o que falta e espera a thread de gravação terminar."""
+        self.gravar(limite=None)
+        self.gravador.close()
@@ -0,0 +1,59 @@
+# app/startup_timer.py
+import sys
+import time
+from PyQt5.QtCore import QCoreApplication, QEvent, QObject, QTimer
+
+LIMITE_ESPERA_MS = 120000
+ETAPAS_FINAIS = ('pronta', 'modulos')
+
+
+class StartupTimer(QObject):
+    """
+    Modo '--medir-inicio' do main.py: anota quando cada parte da abertura fica
+    pronta, em segundos desde o início do main.py (importações, montagem da
+    janela, primeira pintura e as etapas de UserEditorApp.etapa_inicio), mostra
+    o relatório no stderr e fecha a aplicação quando tudo terminou (ou depois de
+    LIMITE_ESPERA_MS).
+    """
+
+    def __init__(self, origem, parent=None):
+        super().__init__(parent)
+        self.origem = origem
+        self.marcas = []
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(lambda: self.encerrar(completo=False))
+
+    def marcar(self, nome, instante=None):
+        self.marcas.append((nome, (instante if instante is not None else time.perf_counter()) - self.origem))
+
+    def acompanhar(self, janela):
+        """Passa a anotar a primeira pintura e as etapas da janela; encerra quando ETAPAS_FINAIS chegarem."""
+        QCoreApplication.instance().installEventFilter(self)
+        janela.etapa_inicio.connect(self._etapa)
+        self._timer.start(LIMITE_ESPERA_MS)
+
+    def eventFilter(self, objeto, evento):
+        if evento.type() == QEvent.Paint:
+            # A marca vem depois que todo o primeiro quadro foi pintado, não só o primeiro widget
+            QCoreApplication.instance().removeEventFilter(self)
+            QTimer.singleShot(0, lambda: self.marcar('janela_pintada'))
+        return False
+
+    def _etapa(self, nome):
+        self.marcar(nome)
+        vistas = {marca for marca, _ in self.marcas}
+        if all(etapa in vistas for etapa in ETAPAS_FINAIS): self.encerrar(completo=True)
+
+    def relatorio(self):
+        linhas, anterior = ["Tempo de abertura (segundos desde o início do main.py):"], 0.0
+        for nome, segundos in self.marcas:
+            linhas.append(f"  {nome:<20} {segundos:8.3f}s  (+{segundos - anterior:.3f}s)")
+            anterior = segundos
+        return "\n".join(linhas)
+
+    def encerrar(self, completo):
+        self._timer.stop()
+        print(self.relatorio() + ("" if completo else f"\n  (incompleto: sem {', '.join(ETAPAS_FINAIS)} em {LIMITE_ESPERA_MS // 1000}s)"),
+              file=sys.stderr, flush=True)
+        QCoreApplication.instance().exit(0 if completo else 1)
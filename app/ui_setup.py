@@ -1,7 +1,7 @@
 # app/ui_setup.py
 from PyQt5.QtWidgets import (
-    QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListWidget, QLineEdit, QLabel,
-    QFormLayout, QGroupBox, QScrollArea, QCheckBox, QComboBox, QStatusBar
+    QAbstractItemView, QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QListView, QLineEdit, QLabel,
+    QFormLayout, QGroupBox, QScrollArea, QCheckBox, QComboBox, QStatusBar, QProgressBar
 )
 
 def setup_ui(main_window):
@@ -18,27 +18,63 @@ def setup_ui(main_window):
     controls_group = QGroupBox("Ações")
     controls_layout = QVBoxLayout()
     main_window.load_xlsx_button = QPushButton("Carregar Usuários (XLSX)")
+    main_window.reload_session_button = QPushButton("📂 Recarregar Sessão")
     main_window.compare_button = QPushButton("🔄 Comparar com XLSX")
     
     # <<< NOVO BOTÃO AQUI >>>
     main_window.set_all_teams_button = QPushButton("👥 Definir Time para Todos")
+    main_window.selected_teams_button = QPushButton("🎯 Times dos Selecionados")
 
     main_window.save_button = QPushButton("💾 Salvar em JSON")
     main_window.save_csv_button = QPushButton("📄 Salvar em CSV")
+    main_window.push_button = QPushButton("🚀 Enviar para a Plataforma")
+    main_window.refresh_button = QPushButton("🔃 Atualizar da Plataforma")
+    main_window.offline_checkbox = QCheckBox("Modo offline (usar cache local)")
+    main_window.profiling_checkbox = QCheckBox("Medir desempenho (diagnóstico)")
+    main_window.diagnostics_button = QPushButton("📊 Diagnóstico")
+    main_window.cancel_processing_button = QPushButton("⛔ Cancelar Processamento")
+    main_window.cancel_processing_button.setVisible(False)
     
     controls_layout.addWidget(main_window.load_xlsx_button)
+    controls_layout.addWidget(main_window.reload_session_button)
     controls_layout.addWidget(main_window.compare_button)
     controls_layout.addWidget(main_window.set_all_teams_button) # Adicionado ao layout
+    controls_layout.addWidget(main_window.selected_teams_button)
     controls_layout.addWidget(main_window.save_button)
     controls_layout.addWidget(main_window.save_csv_button)
+    controls_layout.addWidget(main_window.push_button)
+    controls_layout.addWidget(main_window.refresh_button)
+    controls_layout.addWidget(main_window.offline_checkbox)
+    controls_layout.addWidget(main_window.profiling_checkbox)
+    controls_layout.addWidget(main_window.diagnostics_button)
+    controls_layout.addWidget(main_window.cancel_processing_button)
     
     controls_group.setLayout(controls_layout)
     left_panel.addWidget(controls_group)
     
     user_list_group = QGroupBox("Usuários")
     user_list_layout = QVBoxLayout()
-    main_window.user_list_widget = QListWidget()
-    user_list_layout.addWidget(main_window.user_list_widget)
+    search_layout = QHBoxLayout()
+    main_window.search_line_edit = QLineEdit()
+    main_window.search_line_edit.setPlaceholderText("🔍 Buscar por nome, email, matrícula, ramal ou time")
+    main_window.search_line_edit.setClearButtonEnabled(True)
+    main_window.search_field_combo = QComboBox()
+    for texto, campo in (("Todos os campos", None), ("Nome", 'nome'), ("Email", 'email'), ("Matrícula", 'matricula'), ("Ramal", 'ramal'), ("Time", 'time')):
+        main_window.search_field_combo.addItem(texto, campo)
+    main_window.search_status_combo = QComboBox()
+    for texto, situacao in (("Todos", None), ("🆕 Novos", 'novos'), ("🔄 Existentes", 'existentes')):
+        main_window.search_status_combo.addItem(texto, situacao)
+    search_layout.addWidget(main_window.search_line_edit, 1)
+    search_layout.addWidget(main_window.search_field_combo)
+    search_layout.addWidget(main_window.search_status_combo)
+    user_list_layout.addLayout(search_layout)
+    main_window.search_count_label = QLabel("")
+    user_list_layout.addWidget(main_window.search_count_label)
+    main_window.user_list_view = QListView()
+    main_window.user_list_view.setUniformItemSizes(True)
+    main_window.user_list_view.setSelectionMode(QAbstractItemView.ExtendedSelection)
+    main_window.user_list_view.setModel(main_window.user_list_model)
+    user_list_layout.addWidget(main_window.user_list_view)
     user_list_group.setLayout(user_list_layout)
     left_panel.addWidget(user_list_group)
     main_layout.addLayout(left_panel, 1)
@@ -65,5 +101,10 @@ def setup_ui(main_window):
     main_layout.addWidget(main_window.right_panel_group, 2)
     
     main_window.setStatusBar(QStatusBar(main_window))
+    main_window.progress_bar = QProgressBar()
+    main_window.progress_bar.setMaximumWidth(250)
+    main_window.progress_bar.setVisible(False)
+    main_window.statusBar().addPermanentWidget(main_window.progress_bar)
     
-    main_window.set_ui_enabled(False)
\ No newline at end of file
+    # Tudo começa desabilitado; cada ação é liberada quando os dados de que ela depende chegam
+    main_window.aplicar_prontidao()
\ No newline at end of file
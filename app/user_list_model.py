@@ -0,0 +1,168 @@
+# app/user_list_model.py
+from PyQt5.QtCore import QAbstractListModel, QModelIndex, Qt, pyqtSignal
+
+from .logic.busca_usuarios import IndiceBusca
+from .logic.matriz_membros import MatrizMembros
+
+
+def texto_usuario(usuario):
+    prefixo = "🆕" if usuario.get('is_new', True) else "🔄"
+    return f"{prefixo} {usuario.get('first_name')} {usuario.get('last_name')} ({usuario.get('email')})"
+
+
+class UserListModel(QAbstractListModel):
+    """
+    Modelo da lista de usuários sobre a própria lista 'dados_usuarios' da janela.
+    O texto de cada linha só é montado quando a view pede (linhas visíveis), e
+    as alterações avisam apenas as linhas afetadas.
+
+    Também mantém, sob demanda, as matrizes de participação em times e cargos
+    (MatrizMembros) alinhadas às linhas, para as operações em massa, e o índice
+    de busca (IndiceBusca). Com um filtro ativo, as linhas do modelo são só as
+    posições de 'dados_usuarios' que atendem à busca ('_visiveis', ordenadas).
+
+    Toda alteração passa por aqui e é avisada com as posições alteradas
+    ('usuarios_alterados') ou, com a lista inteira trocada, por 'lista_trocada'
+    (usado pelo salvamento automático da sessão).
+    """
+    usuarios_alterados = pyqtSignal(object)  # posições (range, lista ou array) em 'dados_usuarios'
+    lista_trocada = pyqtSignal()
+
+    def __init__(self, usuarios=None, parent=None):
+        super().__init__(parent)
+        self._usuarios = usuarios if usuarios is not None else []
+        self._membros = {}
+        self._busca = IndiceBusca(self._usuarios)
+        self._filtro = None
+        self._visiveis = None
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid(): return 0
+        return len(self._usuarios) if self._visiveis is None else len(self._visiveis)
+
+    def data(self, index, role=Qt.DisplayRole):
+        posicao = self.indice_usuario(index)
+        if posicao is None:
+            return None
+        usuario = self._usuarios[posicao]
+        if role == Qt.DisplayRole:
+            return texto_usuario(usuario)
+        if role == Qt.ToolTipRole:
+            return usuario.get('email')
+        return None
+
+    def usuarios(self):
+        """A lista 'dados_usuarios' sobre a qual o modelo está."""
+        return self._usuarios
+
+    # --- Atualizações ---
+
+    def definir_usuarios(self, usuarios):
+        """Troca a lista inteira (nova planilha, template novo)."""
+        self.beginResetModel()
+        self._usuarios = usuarios
+        self._membros.clear()
+        self._busca = IndiceBusca(usuarios)
+        self._visiveis = self._buscar() if self._filtro else None
+        self.endResetModel()
+        self.lista_trocada.emit()
+
+    def anexar(self, usuarios):
+        """Acrescenta usuários ao fim da lista, avisando só as linhas novas (as que passam no filtro, se houver)."""
+        if not usuarios: return
+        inicio = len(self._usuarios)
+        if not self._filtro:
+            self.beginInsertRows(QModelIndex(), inicio, inicio + len(usuarios) - 1)
+        self._usuarios.extend(usuarios)
+        for matriz in self._membros.values():
+            matriz.anexar(usuarios)
+        self._busca.anexar(usuarios)
+        self.usuarios_alterados.emit(range(inicio, len(self._usuarios)))
+        if self._filtro:
+            # Posições novas são maiores que as já visíveis: as linhas que passam entram no fim
+            import numpy as np
+            resultado = self._buscar()
+            novas = resultado[np.searchsorted(resultado, inicio):]
+            if not len(novas): return
+            linha = len(self._visiveis)
+            self.beginInsertRows(QModelIndex(), linha, linha + len(novas) - 1)
+            self._visiveis = np.concatenate([self._visiveis, novas])
+        self.endInsertRows()
+
+    def usuario_alterado(self, indice_usuario):
+        """
+        Redesenha apenas a linha do usuário alterado e atualiza os índices. Com
+        um filtro ativo, o usuário continua visível até a próxima busca, mesmo
+        que não atenda mais a ela.
+        """
+        if indice_usuario is None or not 0 <= indice_usuario < len(self._usuarios): return
+        for matriz in self._membros.values():
+            matriz.atualizar(indice_usuario, self._usuarios[indice_usuario])
+        self._busca.atualizar(indice_usuario, self._usuarios[indice_usuario])
+        self.usuarios_alterados.emit((indice_usuario,))
+        indice = self.indice_modelo(indice_usuario)
+        if indice.isValid():
+            self.dataChanged.emit(indice, indice, [Qt.DisplayRole, Qt.ToolTipRole])
+
+    # --- Busca ---
+
+    def _buscar(self):
+        texto, campo, situacao = self._filtro
+        return self._busca.buscar(texto, campo, situacao, self.membros('teams'))
+
+    def filtrar(self, texto="", campo=None, situacao=None):
+        """
+        Mostra só os usuários que atendem à busca (ver IndiceBusca.buscar). Sem
+        texto e sem situação, volta a mostrar todos. Retorna quantos ficaram visíveis.
+        """
+        self.beginResetModel()
+        self._filtro = (texto, campo, situacao) if texto.strip() or situacao else None
+        self._visiveis = self._buscar() if self._filtro else None
+        self.endResetModel()
+        return self.rowCount()
+
+    def filtrado(self):
+        return self._filtro is not None
+
+    # --- Participação em times e cargos ---
+
+    def membros(self, grupo):
+        """Matriz de participação do grupo ('teams' ou 'roles'), montada na primeira consulta (None sem usuários)."""
+        if not self._usuarios: return None
+        matriz = self._membros.get(grupo)
+        if matriz is None:
+            matriz = self._membros[grupo] = MatrizMembros(self._usuarios[0].molde, grupo, self._usuarios)
+        return matriz
+
+    def alterar_membros(self, grupo, operacao, nomes, linhas=None):
+        """
+        Aplica 'definir', 'adicionar' ou 'remover' com os itens 'nomes' aos
+        usuários das 'linhas' (todos se None). O texto das linhas não mostra
+        times nem cargos, então não há o que redesenhar. Retorna quantos
+        usuários foram gravados.
+        """
+        matriz = self.membros(grupo)
+        if matriz is None: return 0
+        alterados = getattr(matriz, operacao)(self._usuarios, nomes, linhas)
+        if alterados: self.usuarios_alterados.emit(range(len(self._usuarios)) if linhas is None else linhas)
+        return alterados
+
+    # --- Índices ---
+
+    def indice_usuario(self, indice):
+        """Posição em 'dados_usuarios' do usuário de um índice do modelo (None se inválido)."""
+        if not indice.isValid() or not 0 <= indice.row() < self.rowCount():
+            return None
+        return indice.row() if self._visiveis is None else int(self._visiveis[indice.row()])
+
+    def indice_modelo(self, indice_usuario):
+        """Índice do modelo para uma posição em 'dados_usuarios' (inválido se o usuário está fora do filtro)."""
+        if indice_usuario is None or not 0 <= indice_usuario < len(self._usuarios):
+            return QModelIndex()
+        if self._visiveis is None:
+            return self.index(indice_usuario)
+        import numpy as np
+        linha = int(np.searchsorted(self._visiveis, indice_usuario))
+        if linha < len(self._visiveis) and self._visiveis[linha] == indice_usuario:
+            return self.index(linha)
+        return QModelIndex()
@@ -0,0 +1,226 @@
+# benchmarks/executar.py
+"""
+Benchmarks dos caminhos críticos com dados sintéticos.
+
+Uso (na raiz do projeto):
+    python -m benchmarks.executar                                  # 1k, 10k e 100k usuários
+    python -m benchmarks.executar --tamanhos 1000 10000 --saida base.json
+    python -m benchmarks.executar --comparar base.json --falhar-em-regressao
+
+Os resultados são gravados em JSON (um baseline por execução) e podem ser
+comparados com um baseline anterior para detectar regressões.
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from app.logic.comparacao import comparar_com_planilha
+from app.logic.data_processor import gerar_ramal_unico, processar_dataframe, processar_em_blocos
+from app.logic.exportacao import salvar_csv, salvar_json
+from app.logic.indice_times import construir_indice_times
+from app.logic.leitor_xlsx import ler_xlsx_em_blocos
+from app.logic.ramais import AlocadorRamais, PrefixoEsgotadoError
+from app.logic.registro_usuario import TemplateUsuario
+from app.logic.validacao import ValidadorPlanilha
+
+from .geradores import gerar_planilha, gerar_template, gerar_times
+
+TAMANHOS_PADRAO = (1000, 10000, 100000)
+VERSAO_BASELINE = 1
+DIRETORIO_RESULTADOS = os.path.join(os.path.dirname(__file__), 'resultados')
+
+
+def medir(funcao, repeticoes=3, tempo_max=20.0):
+    """Executa 'funcao' até 'repeticoes' vezes (para antes se passar de 'tempo_max' segundos no total)."""
+    tempos, resultado = [], None
+    while len(tempos) < repeticoes and (not tempos or sum(tempos) < tempo_max):
+        inicio = time.perf_counter()
+        resultado = funcao()
+        tempos.append(time.perf_counter() - inicio)
+    return tempos, resultado
+
+
+class Cenario:
+    """Dados sintéticos de um tamanho (template, times, planilhas e usuários processados)."""
+
+    def __init__(self, tamanho, diretorio, n_times=50, n_cargos=10, abas=3):
+        self.tamanho = tamanho
+        self.diretorio = diretorio
+        self.template = gerar_template(n_times, n_cargos)
+        self.molde = TemplateUsuario(self.template)
+        self.times = gerar_times(n_times, n_assignees=max(tamanho // 2, n_times))
+        self.indice = construir_indice_times(self.times)
+        self.planilha = gerar_planilha(os.path.join(diretorio, f"usuarios_{tamanho}.xlsx"), tamanho, self.times, abas)
+        # Segunda planilha para a comparação: ~10% dos usuários trocados
+        self.planilha_nova = gerar_planilha(os.path.join(diretorio, f"usuarios_{tamanho}_nova.xlsx"), tamanho, self.times,
+                                            abas=1, semente=3)
+        self.df = pd.concat(pd.read_excel(self.planilha, sheet_name=None, header=2).values(), ignore_index=True)
+        self.usuarios = None
+
+    def processar(self, colunar):
+        return processar_dataframe(self.df, self.molde, self.indice.usuarios_plataforma, gerar_ramais=True,
+                                   ramais_existentes=AlocadorRamais(set(self.indice.ramais_existentes)),
+                                   team_id_map=self.indice.team_id_map, colunar=colunar)
+
+
+def _ramais_densos(tamanho, ocupacao=0.8, semente=4):
+    """Prefixos de 1 dígito (999 posições) com 'ocupacao' das posições já usadas; até 'tamanho' pedidos."""
+    rng = random.Random(semente)
+    existentes = set()
+    for prefixo in range(1, 10):
+        for sequencial in rng.sample(range(1, 1000), int(999 * ocupacao)):
+            existentes.add(f"{prefixo}{sequencial:03d}")
+    livres = 9 * 999 - len(existentes)
+    pedidos = [str(1 + i % 9) for i in range(min(tamanho, livres))]
+    return existentes, pedidos
+
+def _gerar_ramais_legado(existentes, pedidos):
+    ramais = set(existentes)
+    return [gerar_ramal_unico(prefixo, ramais) for prefixo in pedidos]
+
+def _gerar_ramais_alocador(existentes, pedidos):
+    alocador = AlocadorRamais(set(existentes))
+    ramais = []
+    for prefixo in pedidos:
+        try:
+            ramais.append(alocador.alocar(prefixo))
+        except PrefixoEsgotadoError:
+            ramais.append("")
+    return ramais
+
+def _gerar_ramais_em_blocos(existentes, pedidos):
+    usuarios = [{} for _ in pedidos]
+    AlocadorRamais(set(existentes)).alocar_pedidos(list(zip(usuarios, pedidos)))
+    return [usuario['extension_number'] for usuario in usuarios]
+
+def _processar_dados_de_times(times):
+    # Mesmo trabalho de UserEditorApp.processar_dados_de_times, sem a janela
+    indice = construir_indice_times(times)
+    return AlocadorRamais(indice.ramais_existentes)
+
+def _carga_xlsx(cenario):
+    blocos = ler_xlsx_em_blocos(cenario.planilha, processos=1)
+    return list(itertools.chain.from_iterable(
+        novos for novos, _, _ in processar_em_blocos(blocos, cenario.molde, cenario.indice.usuarios_plataforma, True,
+                                                     AlocadorRamais(set(cenario.indice.ramais_existentes)),
+                                                     cenario.indice.team_id_map)))
+
+
+def benchmarks_do_cenario(cenario):
+    """Lista de (nome, função, quantidade de itens processados) para um cenário."""
+    caminho = lambda nome: os.path.join(cenario.diretorio, nome)
+    existentes, pedidos = _ramais_densos(cenario.tamanho)
+    if cenario.usuarios is None:
+        cenario.usuarios = cenario.processar(colunar=True)[0]
+    usuarios = cenario.usuarios
+    return [
+        ('processar_dataframe', lambda: cenario.processar(colunar=False), len(cenario.df)),
+        ('processar_dataframe_colunar', lambda: cenario.processar(colunar=True), len(cenario.df)),
+        ('validar_planilha', lambda: ValidadorPlanilha(cenario.molde).validar(cenario.df), len(cenario.df)),
+        ('carga_xlsx_em_blocos', lambda: _carga_xlsx(cenario), cenario.tamanho),
+        ('gerar_ramal_unico_denso', lambda: _gerar_ramais_legado(existentes, pedidos), len(pedidos)),
+        ('alocador_ramais_denso', lambda: _gerar_ramais_alocador(existentes, pedidos), len(pedidos)),
+        ('alocar_pedidos_denso', lambda: _gerar_ramais_em_blocos(existentes, pedidos), len(pedidos)),
+        ('processar_dados_de_times', lambda: _processar_dados_de_times(cenario.times),
+         sum(len(t['assignees']) for t in cenario.times)),
+        ('comparar_com_xlsx', lambda: comparar_com_planilha(usuarios, cenario.planilha_nova, cenario.molde,
+                                                                cenario.indice.usuarios_plataforma, cenario.indice.team_id_map), len(usuarios)),
+        ('exportar_csv', lambda: salvar_csv(usuarios, cenario.molde, caminho('saida.csv')), len(usuarios)),
+        ('exportar_json', lambda: salvar_json(usuarios, caminho('saida.json')), len(usuarios)),
+        ('exportar_jsonl', lambda: salvar_json(usuarios, caminho('saida.jsonl'), 'jsonl'), len(usuarios)),
+    ]
+
+
+def ambiente():
+    return {
+        'python': platform.python_version(), 'plataforma': platform.platform(), 'cpus': os.cpu_count(),
+        'pandas': pd.__version__, 'numpy': np.__version__, 'openpyxl': openpyxl.__version__,
+    }
+
+def executar(tamanhos, apenas=None, repeticoes=3, tempo_max=20.0, log=print):
+    """Roda os benchmarks e retorna o baseline (dicionário serializável em JSON)."""
+    resultados = []
+    with tempfile.TemporaryDirectory(prefix="bench_ccaip_") as diretorio:
+        for tamanho in tamanhos:
+            inicio = time.perf_counter()
+            cenario = Cenario(tamanho, diretorio)
+            log(f"[{tamanho}] dados gerados em {time.perf_counter() - inicio:.1f}s")
+            for nome, funcao, itens in benchmarks_do_cenario(cenario):
+                if apenas and not any(filtro in nome for filtro in apenas): continue
+                tempos, _ = medir(funcao, repeticoes, tempo_max)
+                melhor = min(tempos)
+                resultados.append({
+                    'nome': nome, 'tamanho': tamanho, 'itens': itens, 'repeticoes': len(tempos),
+                    'segundos_min': melhor, 'segundos_mediana': statistics.median(tempos),
+                    'itens_por_segundo': itens / melhor if melhor > 0 else None,
+                })
+                log(f"[{tamanho}] {nome:<30} {melhor:9.4f}s  ({len(tempos)}x, {itens} itens)")
+    return {'versao': VERSAO_BASELINE, 'criado_em': datetime.now().isoformat(timespec='seconds'),
+            'ambiente': ambiente(), 'resultados': resultados}
+
+
+def comparar_baselines(atual, anterior, limiar=1.2):
+    """
+    Compara dois baselines pelo tempo mínimo de cada (nome, tamanho). Retorna
+    [(nome, tamanho, anterior, atual, razão, situação)], com situação
+    'regressão', 'melhora', 'igual' ou 'novo'.
+    """
+    referencia = {(r['nome'], r['tamanho']): r['segundos_min'] for r in anterior.get('resultados', [])}
+    linhas = []
+    for r in atual['resultados']:
+        antes = referencia.get((r['nome'], r['tamanho']))
+        if antes is None:
+            linhas.append((r['nome'], r['tamanho'], None, r['segundos_min'], None, 'novo')); continue
+        razao = r['segundos_min'] / antes if antes > 0 else float('inf')
+        situacao = 'regressão' if razao > limiar else 'melhora' if razao < 1 / limiar else 'igual'
+        linhas.append((r['nome'], r['tamanho'], antes, r['segundos_min'], razao, situacao))
+    return linhas
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks do processamento de usuários.")
+    parser.add_argument('--tamanhos', type=int, nargs='+', default=list(TAMANHOS_PADRAO), help="Quantidades de usuários")
+    parser.add_argument('--apenas', nargs='+', help="Roda só os benchmarks cujo nome contém um destes textos")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--tempo-max', type=float, default=20.0, help="Limite de segundos somados por benchmark antes de parar de repetir")
+    parser.add_argument('--saida', help="Arquivo JSON do baseline (padrão: benchmarks/resultados/<data>.json)")
+    parser.add_argument('--comparar', help="Baseline anterior para comparação")
+    parser.add_argument('--limiar', type=float, default=1.2, help="Razão de tempo a partir da qual é regressão (padrão: 1.2)")
+    parser.add_argument('--falhar-em-regressao', action='store_true', help="Sai com código 1 se houver regressão")
+    args = parser.parse_args(argv)
+
+    baseline = executar(args.tamanhos, args.apenas, args.repeticoes, args.tempo_max)
+    saida = args.saida or os.path.join(DIRETORIO_RESULTADOS, datetime.now().strftime("%Y%m%d-%H%M%S") + ".json")
+    os.makedirs(os.path.dirname(os.path.abspath(saida)), exist_ok=True)
+    with open(saida, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+    print(f"Baseline salvo em '{saida}'.")
+
+    if args.comparar:
+        with open(args.comparar, encoding='utf-8') as f:
+            anterior = json.load(f)
+        linhas = comparar_baselines(baseline, anterior, args.limiar)
+        print(f"\n{'benchmark':<30} {'tamanho':>8} {'anterior':>10} {'atual':>10} {'razão':>7}  situação")
+        for nome, tamanho, antes, depois, razao, situacao in linhas:
+            antes_txt = f"{antes:.4f}" if antes is not None else "-"
+            razao_txt = f"{razao:.2f}" if razao is not None else "-"
+            print(f"{nome:<30} {tamanho:>8} {antes_txt:>10} {depois:>10.4f} {razao_txt:>7}  {situacao}")
+        if args.falhar_em_regressao and any(linha[5] == 'regressão' for linha in linhas):
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,83 @@
+# benchmarks/geradores.py
+"""Geradores de dados sintéticos (template, times e planilhas) para os benchmarks."""
+import random
+
+from openpyxl import Workbook
+
+CABECALHO_PLANILHA = ['Email', 'Nome', 'Sobrenome', 'Cargo', 'Time', 'Matricula', 'Limite de Chats']
+CARGOS = ['Supervisor', 'Atendente', 'Atendente', 'Atendente', 'Outro']
+PRIMEIROS_NOMES = ['Ana', 'Bruno', 'Carla', 'Diego', 'Elisa', 'Fábio', 'Gabriela', 'Heitor', 'Isabela', 'João',
+                   'Karina', 'Lucas', 'Marina', 'Nuno', 'Olívia', 'Paulo', 'Renata', 'Sérgio', 'Tânia', 'Vítor']
+SOBRENOMES = ['Silva', 'Souza', 'Oliveira', 'Santos', 'Lima', 'Pereira', 'Costa', 'Rodrigues', 'Almeida', 'Nascimento',
+              'Carvalho', 'Gomes', 'Martins', 'Araújo', 'Ribeiro', 'Barbosa', 'Rocha', 'Dias', 'Moreira', 'Teixeira']
+PRIMEIRO_ID_TIME = 10
+
+
+def nome_time(indice):
+    return f"Time {indice:03d}"
+
+def gerar_template(n_times=50, n_cargos=10):
+    """Template de usuário no formato da API, com 'n_times' times e 'n_cargos' cargos."""
+    cargos = ['Agent', 'Manager Atendente'] + [f"Cargo {i:02d}" for i in range(max(n_cargos - 2, 0))]
+    return {
+        'email': "", 'first_name': "", 'last_name': "", 'status': "Active", 'agent_number': "",
+        'extension_number': "", 'location': "", 'alias': "", 'new_email': "",
+        'max_chat_limit': "", 'max_chat_limit_enabled': "0",
+        'unrestricted_international_calling': "0", 'external_user': "0",
+        'ucaas_sip_uri': "", 'ucaas_user_name': "", 'availability_filter': "",
+        **{f'direct_inbound_number{i}': "" for i in range(1, 6)},
+        'roles': [{'name': nome, 'value': 0} for nome in cargos[:n_cargos]],
+        'teams': [{'name': nome_time(i), 'value': 0} for i in range(n_times)],
+    }
+
+def gerar_times(n_times=50, n_assignees=1000, ocupacao_ramais=0.5, semente=1):
+    """
+    Payload da API de times: 'n_assignees' usuários distribuídos entre os times,
+    com ramais existentes ocupando ~'ocupacao_ramais' das posições de cada prefixo.
+    """
+    rng = random.Random(semente)
+    times = [{'id': PRIMEIRO_ID_TIME + i, 'name': nome_time(i), 'assignees': []} for i in range(n_times)]
+    for indice in range(n_assignees):
+        times[indice % n_times]['assignees'].append({
+            'first_name': rng.choice(PRIMEIROS_NOMES),
+            'last_name': f"{rng.choice(SOBRENOMES)} {indice}",
+            'extension_number': "",
+        })
+    for time in times:
+        prefixo = str(time['id'])
+        capacidade = 10 ** (4 - len(prefixo)) - 1
+        ocupados = rng.sample(range(1, capacidade + 1), int(capacidade * ocupacao_ramais))
+        for assignee, sequencial in zip(time['assignees'], ocupados):
+            assignee['extension_number'] = f"{prefixo}{sequencial:0{4 - len(prefixo)}d}"
+    return times
+
+def gerar_linhas(n_usuarios, times, fracao_existentes=0.3, semente=2):
+    """Linhas da planilha; 'fracao_existentes' dos usuários têm o nome de um usuário da plataforma."""
+    rng = random.Random(semente)
+    existentes = [(a['first_name'], a['last_name']) for time in times for a in time['assignees']]
+    for indice in range(n_usuarios):
+        if existentes and rng.random() < fracao_existentes:
+            nome, sobrenome = rng.choice(existentes)
+        else:
+            nome, sobrenome = rng.choice(PRIMEIROS_NOMES), f"{rng.choice(SOBRENOMES)} N{indice}"
+        if rng.random() < 0.2:  # sobrenome vazio: extraído do nome completo
+            nome, sobrenome = f"{nome} {sobrenome}", None
+        yield [
+            f"usuario{indice}@exemplo.com", nome, sobrenome, rng.choice(CARGOS),
+            rng.choice(times)['name'] if times else "", 100000 + indice,
+            rng.choice([None, None, 2, 3, 5]),
+        ]
+
+def gerar_planilha(caminho, n_usuarios, times, abas=3, fracao_existentes=0.3, semente=2):
+    """Grava um .xlsx com 'abas' abas no layout header=2 (duas linhas antes do cabeçalho)."""
+    wb = Workbook(write_only=True)
+    folhas = [wb.create_sheet(f"Aba {i + 1}") for i in range(max(abas, 1))]
+    for folha in folhas:
+        folha.append(["Carga de usuários (gerada para benchmark)"])
+        folha.append([])
+        folha.append(CABECALHO_PLANILHA)
+    por_aba = -(-n_usuarios // len(folhas))
+    for indice, linha in enumerate(gerar_linhas(n_usuarios, times, fracao_existentes, semente)):
+        folhas[indice // por_aba].append(linha)
+    wb.save(caminho)
+    return caminho
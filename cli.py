@@ -0,0 +1,143 @@
+# cli.py
+"""
+Processamento em lote sem interface gráfica (ex.: carga noturna em servidor).
+
+Exemplos:
+    python cli.py planilha1.xlsx planilha2.xlsx --csv saida.csv --json saida.json --gerar-ramais
+    python cli.py planilhas/*.xlsx --template template.json --times times.json --csv saida.csv
+    python cli.py planilhas/*.xlsx --gerar-ramais --sessao sessao.sqlite3   # abre na interface em "Recarregar Sessão"
+    python cli.py planilhas/*.xlsx --planejar-ramais --ramais-reserva 9000-9999
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+from app.logic.exportacao import FORMATOS_JSON, salvar_csv, salvar_json
+from app.logic.indice_times import construir_indice_times
+from app.logic.json_stream import LeitorListaJson, ler_blocos_arquivo
+from app.logic.lote import processar_arquivos
+from app.logic.ramais import AlocadorRamais, faixa_reserva
+from app.logic.registro_usuario import TemplateUsuario
+from app.logic.sessao_sqlite import SessaoSqlite
+from app.logic.validacao import RelatorioValidacao
+
+
+def ler_lista_json(caminho):
+    """Itens de um arquivo JSON salvo da API (lista pura ou dict com 'data'/'agents'/'teams')."""
+    return LeitorListaJson(ler_blocos_arquivo(caminho)).itens()
+
+def carregar_template(args, client):
+    if args.template:
+        with open(args.template, encoding='utf-8') as f:
+            dados = json.load(f)
+        # Aceita a resposta da API salva em arquivo (lista ou {'data': [...]}) ou o template puro
+        if isinstance(dados, dict) and isinstance(dados.get('data', dados.get('agents')), list):
+            dados = dados.get('data', dados.get('agents'))
+        if isinstance(dados, list):
+            dados = dados[0] if dados else None
+    else:
+        dados = next(iter(client.buscar("TEMPLATE_API_URL")), None)
+    if not isinstance(dados, dict):
+        raise ValueError("A resposta do template não é uma lista válida ou está vazia.")
+    return copy.deepcopy(dados)
+
+def carregar_times(args, client):
+    if args.times:
+        return construir_indice_times(ler_lista_json(args.times))
+    return construir_indice_times(client.iterar("TEAMS_API_URL"))
+
+def _criar_cliente(args):
+    if args.template and args.times:
+        return None
+    from app.api_client import ApiClient
+    from app.api_cache import CacheApi
+    return ApiClient(cache=None if args.sem_cache else CacheApi(), offline=args.offline or None)
+
+def _log(mensagem):
+    print(mensagem, file=sys.stderr, flush=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Processa planilhas de usuários e gera os arquivos JSON/CSV de importação.")
+    parser.add_argument('planilhas', nargs='+', help="Arquivos .xlsx de entrada (processados em paralelo)")
+    parser.add_argument('--template', help="JSON do template de usuário (padrão: TEMPLATE_API_URL)")
+    parser.add_argument('--times', help="JSON da lista de times (padrão: TEAMS_API_URL)")
+    parser.add_argument('--json', dest='saida_json', help="Arquivo JSON de saída")
+    parser.add_argument('--formato-json', choices=FORMATOS_JSON, default='indentado', help="Formato do JSON de saída (padrão: indentado)")
+    parser.add_argument('--csv', dest='saida_csv', help="Arquivo CSV de saída")
+    parser.add_argument('--sessao', dest='saida_sessao', help="Sessão SQLite de saída (reaberta na interface sem reprocessar)")
+    parser.add_argument('--relatorio-validacao', help="CSV com todos os problemas da validação das planilhas")
+    parser.add_argument('--gerar-ramais', action='store_true', help="Gera ramais únicos por time")
+    parser.add_argument('--ramais-reserva', default=os.getenv("RAMAIS_RESERVA"),
+                        help="Faixa de ramais para quem não couber no prefixo do time, ex.: 9000-9999 (padrão: RAMAIS_RESERVA)")
+    parser.add_argument('--planejar-ramais', action='store_true',
+                        help="Só mostra os ramais livres de cada prefixo frente aos usuários das planilhas, sem gravar saídas")
+    parser.add_argument('--processos', type=int, default=None, help="Processos em paralelo (padrão: núcleos da máquina)")
+    parser.add_argument('--offline', action='store_true', help="Usa somente o cache local da API")
+    parser.add_argument('--medir-memoria', action='store_true', help="Mede o pico de memória da exportação CSV (mais lento)")
+    parser.add_argument('--sem-cache', action='store_true', help="Não lê nem grava o cache local da API")
+    args = parser.parse_args(argv)
+    if not (args.saida_json or args.saida_csv or args.saida_sessao or args.planejar_ramais):
+        parser.error("informe --json, --csv e/ou --sessao")
+    try:
+        reserva = faixa_reserva(args.ramais_reserva)
+    except ValueError as e:
+        parser.error(str(e))
+    gerar_ramais = args.gerar_ramais or args.planejar_ramais
+
+    inicio = time.perf_counter()
+    client = _criar_cliente(args)
+    try:
+        template_usuario = carregar_template(args, client)
+        indice = carregar_times(args, client)
+    finally:
+        if client: client.close()
+    _log(f"Template e {indice.total_times} times ({len(indice.usuarios_plataforma)} usuários da plataforma) carregados em {time.perf_counter() - inicio:.2f}s.")
+    if indice.usuarios_plataforma.ambiguos:
+        _log("Nomes ambíguos na plataforma (a busca só pelo nome junta os times): " + indice.usuarios_plataforma.relatorio_ambiguos())
+
+    molde = TemplateUsuario(template_usuario)
+    ramais_plataforma = set(indice.ramais_existentes)  # o alocador atualiza o conjunto no lugar
+    relatorio = RelatorioValidacao()
+    usuarios, nao_encontrados, times_sem_id, alocador = processar_arquivos(
+        args.planilhas, molde, indice.usuarios_plataforma, indice.team_id_map,
+        gerar_ramais=gerar_ramais, ramais_existentes=AlocadorRamais(indice.ramais_existentes, reserva=reserva), processos=args.processos,
+        ao_concluir=lambda caminho, quantidade: _log(f"{caminho}: {quantidade} usuários."), relatorio=relatorio)
+    _log(f"{len(usuarios)} usuários processados em {time.perf_counter() - inicio:.2f}s.")
+
+    if relatorio.problemas: _log("Validação: " + relatorio.resumo_texto())
+    if args.relatorio_validacao:
+        relatorio.salvar_csv(args.relatorio_validacao)
+        _log(f"Relatório da validação salvo em '{args.relatorio_validacao}'.")
+
+    if nao_encontrados: _log("Times inválidos ignorados: " + ", ".join(sorted(nao_encontrados)))
+    if times_sem_id: _log("Não foi possível gerar ramais para os times: " + ", ".join(sorted(times_sem_id)))
+    if args.planejar_ramais:
+        _log("Ramais por prefixo:\n" + alocador.plano.resumo_texto(todos=True))
+        return 0
+    if alocador.plano.excedentes: _log("Mais usuários do que ramais livres nos prefixos:\n" + alocador.plano.resumo_texto())
+
+    if args.saida_json:
+        salvar_json(usuarios, args.saida_json, args.formato_json)
+        _log(f"JSON salvo em '{args.saida_json}'.")
+    if args.saida_sessao:
+        with SessaoSqlite(args.saida_sessao) as sessao:
+            sessao.limpar(template_usuario, indice.team_id_map)
+            sessao.gravar_usuarios((posicao, usuario.estado()) for posicao, usuario in enumerate(usuarios))
+            sessao.definir_ramais(alocador.ramais - ramais_plataforma)
+        _log(f"Sessão salva em '{args.saida_sessao}'.")
+    if args.saida_csv:
+        resumo = salvar_csv(usuarios, molde, args.saida_csv, medir_memoria=args.medir_memoria)
+        memoria = f", pico de {resumo.memoria_pico / 2**20:.1f} MB" if resumo.memoria_pico is not None else ""
+        _log(f"CSV salvo em '{args.saida_csv}' ({resumo.linhas} usuários em {resumo.segundos:.2f}s{memoria}).")
+    return 0
+
+
+if __name__ == '__main__':
+    try:
+        sys.exit(main())
+    except Exception as e:
+        _log(f"Erro: {e}")
+        sys.exit(1)
@@ -1,14 +1,30 @@
 # main.py
 import sys
+import time
+INICIO = time.perf_counter()
+
 from PyQt5.QtWidgets import QApplication
-# Importa a classe principal do pacote 'app'
+IMPORTOU_QT = time.perf_counter()
+# Importa a classe principal do pacote 'app' (pandas e openpyxl ficam para depois da janela aberta)
 from app.main_window import UserEditorApp
+IMPORTOU_APP = time.perf_counter()
 
 if __name__ == '__main__':
     """
-    Ponto de entrada principal e enxuto da aplicação.
+    Ponto de entrada principal e enxuto da aplicação. Com '--medir-inicio', mostra
+    quanto tempo cada parte da abertura levou e fecha quando tudo estiver pronto.
     """
+    medir_inicio = '--medir-inicio' in sys.argv
+    if medir_inicio: sys.argv.remove('--medir-inicio')
     app = QApplication(sys.argv)
+    if medir_inicio:
+        from app.startup_timer import StartupTimer
+        medidor = StartupTimer(INICIO)
+        medidor.marcar('importar_qt', IMPORTOU_QT)
+        medidor.marcar('importar_aplicacao', IMPORTOU_APP)
     ex = UserEditorApp()
+    if medir_inicio:
+        medidor.marcar('montar_janela')
+        medidor.acompanhar(ex)
     ex.show()
-    sys.exit(app.exec_())
\ No newline at end of file
+    sys.exit(app.exec_())
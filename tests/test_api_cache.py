@@ -0,0 +1,21 @@
+# tests/test_api_cache.py
+from app.api_cache import CacheApi
+
+URL = "https://plataforma.exemplo/api/teams"
+
+
+def _gravar(cache, corpo):
+    list(cache.gravar('TEAMS_API_URL', URL, {'ETag': '"v1"'}, {}, [corpo]))
+
+
+def test_entradas_separadas_por_credencial(tmp_path):
+    cache_a = CacheApi(str(tmp_path), ttl=3600, credencial="token-a")
+    cache_b = CacheApi(str(tmp_path), ttl=3600, credencial="token-b")
+    _gravar(cache_a, b'[{"id": 1}]')
+
+    assert cache_a.fresco(cache_a.metadados('TEAMS_API_URL', URL))
+    assert cache_b.metadados('TEAMS_API_URL', URL) is None
+    _gravar(cache_b, b'[{"id": 2}]')
+    assert b"".join(cache_a.ler('TEAMS_API_URL', URL)) == b'[{"id": 1}]'
+    assert b"".join(cache_b.ler('TEAMS_API_URL', URL)) == b'[{"id": 2}]'
+    assert not any("token" in caminho.name for caminho in tmp_path.iterdir())
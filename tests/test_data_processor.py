@@ -0,0 +1,94 @@
+# tests/test_data_processor.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.logic.data_processor import processar_dataframe
+from app.logic.ramais import AlocadorRamais, faixa_reserva
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'last_name': '', 'status': 'Active', 'agent_number': '', 'extension_number': '',
+    'max_chat_limit': '', 'max_chat_limit_enabled': '0',
+    'roles': [{'name': 'Agent', 'value': 0}, {'name': 'Manager Atendente', 'value': 0}, {'name': 'Admin', 'value': 0}],
+    'teams': [{'name': f'T{i}', 'value': 0} for i in range(5)],
+}
+TEAM_ID_MAP = {f'T{i}': i + 10 for i in range(5)}
+USUARIOS_PLATAFORMA = {'ana silva': [{'name': 'T3'}], 'joao': [{'name': 'T4'}, {'name': 'T1'}]}
+
+LINHAS = [
+    # Email, Nome, Sobrenome, Cargo, Time, Matricula, Limite de Chats
+    ('ana@x.com', 'Ana Silva', np.nan, 'Atendente', 'T1', 1, 3),         # sobrenome tirado do nome; já existe na plataforma
+    (' b@x.com ', '  Maria  da  Costa ', '', ' Supervisor ', ' T2 ', np.nan, ''),
+    ('c@x.com', 'Pedro', ' ', 'Outro', 'T2', 'abc', 5.7),                 # cargo desconhecido, limite com casas decimais
+    ('d@x.com', 'Joao', 'Souza', np.nan, 'X', 2.0, ' '),                   # time fora do template
+    (np.nan, 'Sem Email', 'X', 'Atendente', 'T1', 3, 4),                   # linha ignorada
+    ('e@x.com', 'Joao', np.nan, 'Atendente', np.nan, np.nan, '2.0'),       # sem time na planilha, times da plataforma
+    ('f@x.com', 'José Ávila', 'Lima', 'Atendente', 'T0', np.nan, 1e20),    # limite acima do int64
+    ('g@x.com', '', np.nan, 'Atendente', '', np.nan, np.nan),
+]
+
+
+def _planilha(repeticoes=1):
+    colunas = ['Email', 'NOME', 'Sobrenome', 'cargo', 'Time', 'Matricula', 'Limite de Chats']
+    return pd.DataFrame(LINHAS * repeticoes, columns=colunas)
+
+def _processar(df, colunar, gerar_ramais):
+    return processar_dataframe(df, TEMPLATE, USUARIOS_PLATAFORMA, gerar_ramais=gerar_ramais,
+                               ramais_existentes={'1101', '1102'}, team_id_map=TEAM_ID_MAP, colunar=colunar)
+
+
+@pytest.mark.parametrize('gerar_ramais', [False, True])
+def test_colunar_igual_ao_linha_a_linha(gerar_ramais):
+    df = _planilha(repeticoes=30)  # 30 repetições esgotam o prefixo de um dos times
+    linha_a_linha = _processar(df, colunar=False, gerar_ramais=gerar_ramais)
+    colunar = _processar(df, colunar=True, gerar_ramais=gerar_ramais)
+
+    assert linha_a_linha[1:] == colunar[1:]
+    assert [list(u.items()) for u in linha_a_linha[0]] == [list(u.items()) for u in colunar[0]]
+
+@pytest.mark.parametrize('reserva', [None, '9990-9999'])
+@pytest.mark.parametrize('linhas_a, linhas_b', [(250, 50), (400, 100)])
+def test_colunar_igual_ao_linha_a_linha_com_prefixos_aninhados(reserva, linhas_a, linhas_b):
+    # O prefixo 12 (time B) fica dentro do prefixo 1 (time A): os dois disputam 1200-1299
+    template = dict(TEMPLATE, teams=[{'name': 'A', 'value': 0}, {'name': 'B', 'value': 0}])
+    linhas = [(f'a{i}@x.com', f'A{i}', 'S', 'Atendente', 'A', np.nan, np.nan) for i in range(linhas_a)]
+    linhas += [(f'b{i}@x.com', f'B{i}', 'S', 'Atendente', 'B', np.nan, np.nan) for i in range(linhas_b)]
+    df = pd.DataFrame(linhas, columns=['Email', 'Nome', 'Sobrenome', 'Cargo', 'Time', 'Matricula', 'Limite de Chats'])
+
+    def processar(colunar):
+        alocador = AlocadorRamais({'1001', '1205', '9991'}, reserva=faixa_reserva(reserva))
+        resultado = processar_dataframe(df, template, {}, gerar_ramais=True, ramais_existentes=alocador,
+                                        team_id_map={'A': 1, 'B': 12}, colunar=colunar)
+        return [u['extension_number'] for u in resultado[0]], alocador.plano
+
+    linha_a_linha, plano_linhas = processar(colunar=False)
+    colunar, plano_colunar = processar(colunar=True)
+
+    assert linha_a_linha == colunar
+    assert plano_linhas.resumo_texto(todos=True) == plano_colunar.resumo_texto(todos=True)
+    ramais = [r for r in colunar if r]
+    assert len(ramais) == len(set(ramais)) and not {'1001', '1205', '9991'} & set(ramais)
+    na_reserva = [r for r in ramais if r.startswith('99')]
+    # B tem 98 ramais livres (1205 já existe); o que passar disso vai para a reserva, que tem 9 livres
+    assert len(na_reserva) == (min(max(linhas_b - 98, 0), 9) if reserva else 0)
+
+def test_casos_de_borda():
+    usuarios, nao_encontrados, times_sem_id = _processar(_planilha(), colunar=True, gerar_ramais=True)
+    por_email = {u['email']: u for u in usuarios}
+
+    assert len(usuarios) == 7 and 'X' in nao_encontrados and 'X' in times_sem_id
+    assert (por_email['ana@x.com']['first_name'], por_email['ana@x.com']['last_name']) == ('Ana', 'Silva')
+    assert (por_email['b@x.com']['first_name'], por_email['b@x.com']['last_name']) == ('Maria', 'da Costa')
+    assert por_email['ana@x.com']['is_new'] is False and por_email['b@x.com']['is_new'] is True
+    assert por_email['c@x.com']['max_chat_limit'] == '5'
+    assert por_email['f@x.com']['max_chat_limit'] == str(10 ** 20)
+    assert (por_email['g@x.com']['max_chat_limit'], por_email['g@x.com']['max_chat_limit_enabled']) == ('', '0')
+    # Ramal pelo time de maior ID (T3 da plataforma = 13), pulando os já existentes
+    assert por_email['ana@x.com']['extension_number'] == '1301'
+    assert por_email['b@x.com']['extension_number'] == '1201'
+
+@pytest.mark.parametrize('colunar', [False, True])
+def test_coluna_obrigatoria_ausente(colunar):
+    df = _planilha().drop(columns=['Matricula'])
+    with pytest.raises(ValueError, match="'matricula'"):
+        _processar(df, colunar=colunar, gerar_ramais=False)
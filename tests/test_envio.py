@@ -0,0 +1,110 @@
+# tests/test_envio.py
+import json
+import threading
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+import requests
+
+from app.logic.envio import BaldeTokens, RegistroEnvio, a_enviar, enviar_usuarios, montar_pedidos
+
+# Respostas do servidor local por email, em ordem; a última se repete
+ROTEIRO = {
+    'ok@x.com': [(201, {})],
+    'instavel@x.com': [(503, {}), (503, {}), (201, {})],
+    'limite@x.com': [(429, {'Retry-After': '0'}), (201, {})],
+    'ruim@x.com': [(400, {})],
+    'existente@x.com': [(200, {})],
+}
+
+
+class _Plataforma(BaseHTTPRequestHandler):
+    """Stand-in da API de agentes: responde conforme ROTEIRO e anota cada requisição."""
+
+    def _responder(self):
+        corpo = json.loads(self.rfile.read(int(self.headers['Content-Length'])))
+        servidor = self.server
+        with servidor.trava:
+            servidor.pedidos.append((self.command, self.path, corpo['email'], self.headers['Idempotency-Key']))
+            respostas = ROTEIRO[corpo['email']]
+            status, cabecalhos = respostas[min(servidor.vezes[corpo['email']], len(respostas) - 1)]
+            servidor.vezes[corpo['email']] += 1
+        self.send_response(status)
+        for nome, valor in cabecalhos.items(): self.send_header(nome, valor)
+        self.send_header('Content-Length', '0')
+        self.end_headers()
+
+    do_POST = do_PATCH = _responder
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def plataforma():
+    servidor = ThreadingHTTPServer(('127.0.0.1', 0), _Plataforma)
+    servidor.pedidos, servidor.vezes, servidor.trava = [], Counter(), threading.Lock()
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield servidor
+    servidor.shutdown()
+    servidor.server_close()
+
+
+def _usuarios():
+    novos = [{'email': email, 'first_name': 'Nome', 'is_new': True} for email in ROTEIRO if email != 'existente@x.com']
+    return novos + [{'email': 'existente@x.com', 'first_name': 'Nome', 'is_new': False}]
+
+def _enviar(servidor, caminho_log, usuarios, url_existentes=True):
+    base = f"http://127.0.0.1:{servidor.server_address[1]}/agents"
+    url_existentes = base + "/{email}" if url_existentes else None
+    with requests.Session() as sessao, RegistroEnvio(caminho_log) as registro:
+        return enviar_usuarios(montar_pedidos(usuarios, base, url_existentes), sum(a_enviar(usuarios, url_existentes)),
+                               sessao, registro, conexoes=4, taxa=1000, backoff=0.01, timeout=5)
+
+def _log(caminho):
+    with open(caminho, encoding='utf-8') as f:
+        return {entrada['email']: entrada for entrada in map(json.loads, f)}
+
+
+def test_repete_e_registra_cada_usuario(plataforma, tmp_path):
+    caminho = tmp_path / "envio.jsonl"
+    resumo = _enviar(plataforma, caminho, _usuarios())
+
+    assert (resumo.enviados, resumo.falhas, resumo.pulados, resumo.cancelado) == (4, 1, 0, False)
+    log = _log(caminho)
+    assert {email: (e['ok'], e['status'], e['tentativas']) for email, e in log.items()} == {
+        'ok@x.com': (True, 201, 1),
+        'instavel@x.com': (True, 201, 3),
+        'limite@x.com': (True, 201, 2),
+        'ruim@x.com': (False, 400, 1),   # 4xx que não é 429 não é repetido
+        'existente@x.com': (True, 200, 1),
+    }
+    assert ('PATCH', '/agents/existente%40x.com') in {(m, p) for m, p, _, _ in plataforma.pedidos}
+    # As novas tentativas mandam a mesma chave de idempotência
+    chaves = {email: {chave for _, _, e, chave in plataforma.pedidos if e == email} for email in ROTEIRO}
+    assert all(len(c) == 1 for c in chaves.values())
+
+def test_retomada_pula_os_ja_enviados(plataforma, tmp_path):
+    caminho = tmp_path / "envio.jsonl"
+    _enviar(plataforma, caminho, _usuarios())
+    antes = len(plataforma.pedidos)
+
+    resumo = _enviar(plataforma, caminho, _usuarios())
+
+    assert (resumo.enviados, resumo.falhas, resumo.pulados) == (0, 1, 4)
+    assert [email for _, _, email, _ in plataforma.pedidos[antes:]] == ['ruim@x.com']
+
+def test_sem_url_de_atualizacao_nao_envia_existentes(plataforma, tmp_path):
+    resumo = _enviar(plataforma, tmp_path / "envio.jsonl", _usuarios(), url_existentes=False)
+
+    assert resumo.enviados + resumo.falhas == 4
+    assert 'existente@x.com' not in {email for _, _, email, _ in plataforma.pedidos}
+    assert {metodo for metodo, _, _, _ in plataforma.pedidos} == {'POST'}
+
+def test_pausas_simultaneas_nao_se_somam():
+    agora = [0.0]
+    balde = BaldeTokens(10, relogio=lambda: agora[0])
+    for _ in range(8): balde.pausar(2)
+    assert balde.tentar() == pytest.approx(2.1)
@@ -0,0 +1,70 @@
+# tests/test_exportacao.py
+import csv
+import json
+
+import pytest
+
+from app.logic.exportacao import ler_json_usuarios, salvar_csv, salvar_json
+from app.logic.registro_usuario import TemplateUsuario
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'status': 'Active', 'agent_number': None, 'external_user': 0, 'max_chat_limit': '',
+    'roles': [{'name': 'Agent', 'value': 0}, {'name': 'Adm', 'value': 0}],
+    'teams': [{'name': 'T1', 'value': 0}, {'name': 'T2', 'value': 0}, {'name': 'T1', 'value': 0}],
+}
+
+
+def _usuarios(molde):
+    usuarios = []
+    for i in range(50):
+        usuario = molde.novo_registro()
+        usuario['email'] = f'u{i}@x.com'
+        usuario['first_name'] = 'Zé, "o"' if i % 7 == 0 else 'Ana'
+        # Números só nos primeiros blocos e None nos demais: os tipos não podem depender do bloco
+        usuario['agent_number'] = i if i < 20 else None
+        usuario['max_chat_limit'] = 2.5 if i == 3 else ''
+        usuario.definir_ativos('teams', {'T1'} if i % 2 else {'T2'})
+        usuarios.append(usuario)
+    usuarios.append({'email': 'dict@x.com', 'teams': [{'name': 'T1', 'value': 1}], 'roles': []})
+    return usuarios
+
+def _ler(caminho):
+    with open(caminho, encoding='utf-8-sig', newline='') as f:
+        return list(csv.reader(f))
+
+
+def test_saida_nao_depende_do_tamanho_do_bloco(tmp_path):
+    molde = TemplateUsuario(TEMPLATE)
+    usuarios = _usuarios(molde)
+    salvar_csv(usuarios, molde, tmp_path / "um_bloco.csv")
+    progresso = []
+    resumo = salvar_csv(usuarios, molde, tmp_path / "blocos.csv", tamanho_bloco=7, progresso=lambda a, b: progresso.append(a))
+
+    assert (tmp_path / "um_bloco.csv").read_bytes() == (tmp_path / "blocos.csv").read_bytes()
+    assert progresso == list(range(7, 51, 7)) + [51] and resumo.linhas == 51
+    linhas = _ler(tmp_path / "blocos.csv")
+    cabecalho = linhas[0]
+    primeira, vigesima = dict(zip(cabecalho, linhas[1])), dict(zip(cabecalho, linhas[21]))
+    assert (primeira['Agent ID'], vigesima['Agent ID']) == ('0', '')
+    assert (primeira['Team: T1'], primeira['Team: T2']) == ('0', '1')
+    assert dict(zip(cabecalho, linhas[-1]))['Team: T1'] == '1'
+
+@pytest.mark.parametrize('formato, extensao', [('indentado', 'json'), ('compacto', 'json'), ('jsonl', 'jsonl')])
+@pytest.mark.parametrize('quantidade', [0, 1, 51])
+def test_json_ida_e_volta(tmp_path, formato, extensao, quantidade):
+    molde = TemplateUsuario(TEMPLATE)
+    usuarios = _usuarios(molde)[:quantidade]
+    if usuarios: usuarios[0]['is_new'] = True  # campo interno, não é salvo
+    caminho = str(tmp_path / f"usuarios.{extensao}")
+    resumo = salvar_json(usuarios, caminho, formato=formato)
+
+    esperado = [{chave: valor for chave, valor in dict(u).items() if chave != 'is_new'} for u in usuarios]
+    assert list(ler_json_usuarios(caminho)) == esperado and resumo.linhas == quantidade
+    if formato == 'indentado':
+        with open(tmp_path / "referencia.json", 'w', encoding='utf-8') as f:
+            json.dump(esperado, f, indent=4, ensure_ascii=False)
+        assert (tmp_path / "usuarios.json").read_bytes() == (tmp_path / "referencia.json").read_bytes()
+
+def test_formato_de_json_desconhecido(tmp_path):
+    with pytest.raises(ValueError):
+        salvar_json([], str(tmp_path / "x.json"), formato='xml')
@@ -0,0 +1,73 @@
+# tests/test_incremental.py
+import openpyxl
+
+from app.logic.incremental import CacheProcessamento, processar_em_blocos_incremental
+from app.logic.leitor_xlsx import ler_xlsx_em_blocos
+from app.logic.ramais import AlocadorRamais
+from app.logic.registro_usuario import TemplateUsuario
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'last_name': '', 'status': 'Active', 'agent_number': '', 'extension_number': '',
+    'max_chat_limit': '', 'max_chat_limit_enabled': '0',
+    'roles': [{'name': 'Agent', 'value': 0}, {'name': 'Manager Atendente', 'value': 0}],
+    'teams': [{'name': 'A', 'value': 0}, {'name': 'B', 'value': 0}],
+}
+TEAM_ID_MAP = {'A': 1, 'B': 12}
+CABECALHO = ['Email', 'Nome', 'Sobrenome', 'Cargo', 'Time', 'Matricula', 'Limite de Chats']
+
+
+def _planilha(caminho, linhas):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    for linha in [['Usuários'], [], CABECALHO, *linhas]:
+        ws.append(linha)
+    wb.save(caminho)
+    return str(caminho)
+
+def _carregar(caminho, molde, anterior, novo):
+    alocador = AlocadorRamais()
+    usuarios = []
+    for registros, _, _ in processar_em_blocos_incremental(
+            ler_xlsx_em_blocos(caminho, processos=1), molde, {}, True, alocador, TEAM_ID_MAP, anterior, novo):
+        usuarios.extend(registros)
+    return {u['email']: u for u in usuarios}, alocador
+
+
+def test_recarga_reprocessa_so_as_linhas_novas_ou_alteradas(tmp_path):
+    molde = TemplateUsuario(TEMPLATE)
+    linhas = [
+        ['ana@x.com', 'Ana', 'Silva', 'Atendente', 'A', 1, 3],
+        ['bia@x.com', 'Bia', 'Souza', 'Atendente', 'B', 2, 3],
+        ['caio@x.com', 'Caio', 'Lima', 'Atendente', 'B', 3, 3],
+    ]
+    primeira = CacheProcessamento(molde, {}, TEAM_ID_MAP, True)
+    antes, _ = _carregar(_planilha(tmp_path / "v1.xlsx", linhas), molde, None, primeira)
+    assert [antes[e]['extension_number'] for e in ('ana@x.com', 'bia@x.com', 'caio@x.com')] == ['1001', '1201', '1202']
+    antes['ana@x.com']['first_name'] = 'Ana Editada'  # edição feita no formulário
+
+    linhas[1][5] = 20                                                # Bia alterada, mesmo time
+    del linhas[2]                                                    # Caio removido
+    linhas.append(['davi@x.com', 'Davi', 'Reis', 'Atendente', 'B', 4, 3])  # Davi novo
+    segunda = CacheProcessamento(molde, {}, TEAM_ID_MAP, True)
+    depois, alocador = _carregar(_planilha(tmp_path / "v2.xlsx", linhas), molde, primeira, segunda)
+
+    assert (segunda.reaproveitados, segunda.reprocessados) == (1, 2)
+    assert depois['ana@x.com'] is antes['ana@x.com'] and depois['ana@x.com']['first_name'] == 'Ana Editada'
+    assert depois['bia@x.com'] is not antes['bia@x.com']
+    assert depois['bia@x.com']['agent_number'] == '20'
+    assert depois['bia@x.com']['extension_number'] == '1201'      # mesmo email e prefixo: mantém o ramal
+    assert depois['davi@x.com']['extension_number'] == '1203'     # o do Caio só é liberado no fim da carga
+    assert alocador.ramais == {'1001', '1201', '1203'}            # o 1202 do Caio voltou a ficar livre
+    assert len(segunda) == 3 and len(primeira) == 1            # só o Caio sobrou no cache anterior
+
+def test_time_alterado_troca_o_ramal(tmp_path):
+    molde = TemplateUsuario(TEMPLATE)
+    linhas = [['ana@x.com', 'Ana', 'Silva', 'Atendente', 'A', 1, 3]]
+    primeira = CacheProcessamento(molde, {}, TEAM_ID_MAP, True)
+    _carregar(_planilha(tmp_path / "v1.xlsx", linhas), molde, None, primeira)
+
+    linhas[0][4] = 'B'
+    segunda = CacheProcessamento(molde, {}, TEAM_ID_MAP, True)
+    depois, alocador = _carregar(_planilha(tmp_path / "v2.xlsx", linhas), molde, primeira, segunda)
+    assert depois['ana@x.com']['extension_number'] == '1201'
+    assert alocador.ramais == {'1201'}                            # o 1001 do prefixo antigo foi liberado
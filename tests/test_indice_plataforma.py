@@ -0,0 +1,60 @@
+# tests/test_indice_plataforma.py
+import pytest
+
+from app.logic.indice_plataforma import IndicePlataforma, normalizar_nome
+
+
+def _assignee(first_name, last_name, email=None, agent_number=None):
+    return {'first_name': first_name, 'last_name': last_name, 'email': email, 'agent_number': agent_number}
+
+
+@pytest.mark.parametrize('texto, esperado', [
+    ("José  da   Conceição", "jose da conceicao"),
+    ("  ÁLVARO Müller ", "alvaro muller"),
+    ("STRASSE", "strasse"),
+    ("Ana\tSilva\n", "ana silva"),
+    (None, ""),
+])
+def test_normalizar_nome(texto, esperado):
+    assert normalizar_nome(texto) == esperado
+
+def test_busca_por_email_matricula_e_nome():
+    indice = IndicePlataforma()
+    indice.adicionar(_assignee("Ana", "Silva", "Ana@Empresa.com", 101), 1, "Vendas")
+    indice.adicionar(_assignee("Ana", "Silva", "ana@empresa.com"), 2, "Suporte")
+    indice.adicionar(_assignee("Bruno", "Costa", agent_number="202"), 3, "Cobrança")
+    indice.adicionar(_assignee("Célia", "Souza"), 1, "Vendas")
+
+    assert len(indice) == 3
+    assert indice.times_de("qualquer", email=" ANA@empresa.com ") == (1, 2)
+    assert indice.times_de("qualquer", agente=202) == (3,)
+    assert indice.times_de("celia  SOUZA") == (1,)
+    assert indice.times_de("Fulano de Tal", email="x@y.z", agente="999") is None
+    assert indice.nomes_dos_times(indice.times_de("Ana Silva")) == ["Vendas", "Suporte"]
+    assert indice.relatorio_ambiguos() == ""
+
+@pytest.mark.parametrize('ordem', [(0, 1), (1, 0)])
+def test_matricula_e_email_do_mesmo_usuario_em_qualquer_ordem(ordem):
+    registros = [_assignee("Ana", "Silva", agent_number="101"),
+                 _assignee("Ana", "Silva", "ana@empresa.com", "101")]
+    indice = IndicePlataforma()
+    for time, posicao in enumerate(ordem):
+        indice.adicionar(registros[posicao], time, f"Time {time}")
+
+    assert len(indice) == 1
+    assert indice.relatorio_ambiguos() == ""
+    assert indice.times_de("", email="ana@empresa.com") == indice.times_de("", agente="101") == (0, 1)
+
+def test_relatorio_de_nomes_ambiguos():
+    indice = IndicePlataforma()
+    indice.adicionar(_assignee("Ana", "Silva", "ana1@empresa.com"), 1, "Vendas")
+    indice.adicionar(_assignee("ANA", "Silva", "ana2@empresa.com"), 2, "Suporte")
+    indice.adicionar(_assignee("Ana", "Silva", agent_number="7"), 3, "Cobrança")
+    for n in range(12):
+        indice.adicionar(_assignee("Nome", str(n), f"a{n}@x.com"), 4, "Outro")
+        indice.adicionar(_assignee("Nome", str(n), f"b{n}@x.com"), 4, "Outro")
+
+    assert indice.relatorio_ambiguos(limite=2) == "Ana Silva (3), Nome 0 (2) e mais 11"
+    # Pelo nome, a busca devolve a união dos times dos homônimos
+    assert indice.times_de("ana silva") == (1, 2, 3)
+    assert indice.times_de("ana silva", email="ana2@empresa.com") == (2,)
@@ -0,0 +1,48 @@
+# tests/test_json_stream.py
+import json
+
+import pytest
+
+from app.logic.json_stream import LeitorListaJson, ler_blocos_arquivo, proxima_pagina
+
+ITENS = [
+    {'id': 1, 'name': 'Vendas São Paulo', 'assignees': [{'first_name': 'José', 'agent_number': 12345678901234567890}]},
+    {'id': 2.5e-3, 'name': 'Ação "especial" \\ ✓', 'vazio': {}, 'lista': []},
+    [], "texto", 1234567, None, True,
+]
+
+
+def _em_pedacos(dados, tamanho):
+    return [dados[i:i + tamanho] for i in range(0, len(dados), tamanho)]
+
+
+@pytest.mark.parametrize('tamanho', [1, 2, 3, 7, 64, 1 << 20])
+@pytest.mark.parametrize('separadores', [(',', ':'), (', ', ': ')])
+def test_pagina_dividida_em_qualquer_ponto(tamanho, separadores):
+    pagina = {'total': 7, 'data': ITENS, 'links': {'next': '/teams?page=2'}, 'next_page': None}
+    dados = json.dumps(pagina, ensure_ascii=False, separators=separadores, indent=None).encode('utf-8')
+    leitor = LeitorListaJson(_em_pedacos(dados, tamanho))  # quebra também caracteres UTF-8 de vários bytes
+
+    assert list(leitor.itens()) == ITENS
+    assert leitor.metadados == {'total': 7, 'links': {'next': '/teams?page=2'}, 'next_page': None}
+    assert proxima_pagina('https://api.x.com/v1/teams?page=1', leitor.metadados) == 'https://api.x.com/teams?page=2'
+
+@pytest.mark.parametrize('tamanho', [1, 5, 1 << 16])
+def test_lista_no_topo_e_numero_no_fim_do_bloco(tamanho):
+    dados = ("  [ 1, 22 ,333,\n4444 ,\t" + json.dumps({'a': "x" * 100_000}) + ", 55555 ]  ").encode()
+    assert list(LeitorListaJson(_em_pedacos(dados, tamanho)).itens()) == [1, 22, 333, 4444, {'a': "x" * 100_000}, 55555]
+
+def test_so_a_primeira_lista_conhecida_e_gerada():
+    leitor = LeitorListaJson([b'{"agents": [1], "teams": [2], "data": 3}'])
+    assert list(leitor.itens()) == [1]
+    assert leitor.metadados == {'teams': [2], 'data': 3}
+
+def test_ler_blocos_arquivo(tmp_path):
+    caminho = tmp_path / "pagina.json"
+    caminho.write_text(json.dumps({'data': ITENS}, ensure_ascii=False), encoding='utf-8')
+    assert list(LeitorListaJson(ler_blocos_arquivo(caminho, tamanho=3)).itens()) == ITENS
+
+@pytest.mark.parametrize('dados', [b'[1, 2', b'[1 2]', b'{"data": [1,]}', b'[{"a": 1}'])
+def test_json_invalido(dados):
+    with pytest.raises(ValueError):
+        list(LeitorListaJson(_em_pedacos(dados, 2)).itens())
@@ -0,0 +1,72 @@
+# tests/test_lote.py
+import openpyxl
+import pytest
+
+from app.logic.lote import processar_arquivos
+from app.logic.validacao import RelatorioValidacao
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'last_name': '', 'status': 'Active', 'agent_number': '', 'extension_number': '',
+    'max_chat_limit': '', 'max_chat_limit_enabled': '0',
+    'roles': [{'name': 'Agent', 'value': 0}, {'name': 'Manager Atendente', 'value': 0}, {'name': 'Admin', 'value': 0}],
+    'teams': [{'name': 'A', 'value': 0}, {'name': 'B', 'value': 0}],
+}
+TEAM_ID_MAP = {'A': 1, 'B': 12}
+CABECALHO = ['Email', 'Nome', 'Sobrenome', 'Cargo', 'Time', 'Matricula', 'Limite de Chats']
+
+
+def _salvar(caminho, abas):
+    wb = openpyxl.Workbook()
+    wb.remove(wb.active)
+    for nome, linhas in abas.items():
+        ws = wb.create_sheet(nome)
+        for linha in [['Usuários'], [], CABECALHO, *linhas]:  # cabeçalho na terceira linha
+            ws.append(linha)
+    wb.save(caminho)
+    return str(caminho)
+
+@pytest.fixture
+def planilhas(tmp_path):
+    primeira = _salvar(tmp_path / "primeira.xlsx", {
+        'Vendas': [[f'a{i}@x.com', f'A{i}', 'S', 'Atendente', 'A', i, 3] for i in range(60)],
+        'Suporte': [[f'b{i}@x.com', f'B{i}', 'S', 'Supervisor', 'B', None, None] for i in range(70)],
+    })
+    segunda = _salvar(tmp_path / "segunda.xlsx", {
+        'Geral': [[f'B{i}@X.com', 'Repetido', 'S', 'Atendente', 'A', None, None] for i in range(65, 75)]
+                 + [[f'c{i}@x.com', f'C{i}', 'S', 'Atendente', 'B', None, 2] for i in range(40)]
+                 + [['c0@x.com', 'Repetido', 'S', 'Atendente', 'A', None, None]],
+    })
+    return [primeira, segunda]
+
+
+def test_um_processo_igual_a_varios(planilhas):
+    def processar(processos):
+        concluidos, relatorio = [], RelatorioValidacao()
+        usuarios, nao_encontrados, sem_id, alocador = processar_arquivos(
+            planilhas, TEMPLATE, {}, TEAM_ID_MAP, gerar_ramais=True, ramais_existentes={'1205'},
+            processos=processos, relatorio=relatorio, ao_concluir=lambda caminho, n: concluidos.append((caminho, n)))
+        return ([list(u.items()) for u in usuarios], nao_encontrados, sem_id, sorted(alocador.ramais),
+                sorted(concluidos), relatorio.problemas)
+
+    um, dois = processar(1), processar(2)
+    assert um == dois
+
+    usuarios = [dict(u) for u in um[0]]
+    emails = [u['email'] for u in usuarios]
+    assert len(emails) == len(set(emails)) == 60 + 70 + 5 + 40   # B65..B69 já vieram na primeira; c0 repetido na mesma aba
+    assert um[4] == sorted([(planilhas[0], 130), (planilhas[1], 50)])
+    # Ramais alocados na ordem dos arquivos: os da primeira planilha vêm antes
+    ramais_b = [u['extension_number'] for u in usuarios if u['extension_number'].startswith('12')]
+    assert ramais_b[:3] == ['1201', '1202', '1203'] and '1205' not in ramais_b
+    assert sum(1 for u in usuarios if u['extension_number'] == "") == 70 + 40 - 98
+
+def test_ao_concluir_a_cada_arquivo_com_um_processo(planilhas, monkeypatch):
+    from app.logic import lote
+    ordem = []
+    processar_arquivo = lote.processar_arquivo
+    monkeypatch.setattr(lote, 'processar_arquivo', lambda caminho, *args: ordem.append(('processar', caminho))
+                        or processar_arquivo(caminho, *args))
+    processar_arquivos(planilhas, TEMPLATE, {}, TEAM_ID_MAP, processos=1,
+                       ao_concluir=lambda caminho, n: ordem.append(('concluido', caminho)))
+    assert ordem == [('processar', planilhas[0]), ('concluido', planilhas[0]),
+                     ('processar', planilhas[1]), ('concluido', planilhas[1])]
@@ -0,0 +1,21 @@
+# tests/test_matriz_membros.py
+from app.logic.matriz_membros import MatrizMembros
+from app.logic.registro_usuario import TemplateUsuario
+
+TEMPLATE = {'email': '', 'teams': [{'name': nome, 'value': 0} for nome in ['A', 'B', 'A', 'C', 'D', 'E', 'F', 'G', 'H', 'A']]}
+
+
+def test_contagem_por_nome_com_nomes_repetidos():
+    molde = TemplateUsuario(TEMPLATE)
+    assert molde.posicoes['teams'] == {'A': [0, 2, 9], 'B': [1], 'C': [3], 'D': [4], 'E': [5], 'F': [6], 'G': [7], 'H': [8]}
+    usuarios = []
+    for bits in (0b0000000101, 0b1000000000, 0b0100000010, 0):
+        usuario = molde.novo_registro()
+        usuario.definir_bits('teams', bits)
+        usuarios.append(usuario)
+    matriz = MatrizMembros(molde, 'teams', usuarios)
+
+    contagem = matriz.contagem_por_nome()
+    assert contagem == {'A': 2, 'B': 1, 'C': 0, 'D': 0, 'E': 0, 'F': 0, 'G': 0, 'H': 1}
+    assert matriz.contagem_por_nome([0, 3]) == dict(contagem, A=1, B=0, H=0)
+    assert matriz.contagens().tolist() == [1, 1, 1, 0, 0, 0, 0, 0, 1, 1]
@@ -0,0 +1,25 @@
+# tests/test_perfil.py
+import sys
+
+import pytest
+
+from app.logic.perfil import Perfilador
+
+MB = 2 ** 20
+
+
+@pytest.mark.skipif(not sys.platform.startswith('linux'), reason="RSS atual lido de /proc")
+def test_memoria_e_da_etapa_e_nao_do_processo():
+    perfil = Perfilador(ativo=True)
+    with perfil.etapa('grande'):
+        bloco = bytearray(200 * MB)
+        bloco[::4096] = b'\x01' * len(bloco[::4096])  # toca as páginas para entrarem no RSS
+        del bloco
+    with perfil.etapa('pequena'):
+        sum(range(1000))
+
+    grande, pequena = perfil.eventos()
+    assert grande['pico_aumento'] >= 150 * MB
+    assert pequena['pico_aumento'] < 10 * MB                 # não herda o pico da etapa anterior
+    assert pequena['rss_fim'] < grande['rss_pico_processo']  # o bloco já foi liberado
+    assert pequena['rss_pico_processo'] >= grande['pico_aumento']
@@ -0,0 +1,130 @@
+# tests/test_ramais.py
+import random
+
+import pytest
+
+from app.logic.data_processor import gerar_ramal_unico
+from app.logic.ramais import AlocadorRamais, PrefixoEsgotadoError, faixa_reserva, reserva_configurada
+
+
+def _pedidos(*quantidades):
+    """[(usuario, prefixo)] com 'quantidade' usuários por prefixo, na ordem dada."""
+    return [({}, prefixo) for prefixo, quantidade in quantidades for _ in range(quantidade)]
+
+
+def test_planejar_desconta_dos_prefixos_curtos_o_que_os_aninhados_ocupam():
+    alocador = AlocadorRamais({'1001', '1205', '1299', '2001'})
+    plano = alocador.planejar({'1': 500, '12': 120, '2': 10})
+
+    assert list(plano.prefixos) == ['12', '1', '2']          # mais longos primeiro
+    assert plano.prefixos['12'].livres == 97                 # 99 menos 1205 e 1299
+    assert plano.prefixos['1'].livres == 999 - 3 - 97        # o que o 12 vai ocupar já sai do 1
+    assert plano.prefixos['2'].livres == 998
+    assert list(plano.excedentes) == ['12']
+    assert plano.prefixos['12'].excedente == 23
+    assert alocador.ramais == {'1001', '1205', '1299', '2001'}  # planejar não aloca
+
+def test_alocar_pedidos_segue_o_plano_e_informa_os_excedentes():
+    alocador = AlocadorRamais({'1205'})
+    pedidos = _pedidos(('12', 100), ('1', 3))
+    plano = alocador.alocar_pedidos(pedidos)
+
+    ramais = [usuario['extension_number'] for usuario, _ in pedidos]
+    assert ramais[:98] == [f"12{n:02d}" for n in range(1, 100) if n != 5]
+    assert ramais[98:100] == ["", ""]
+    assert ramais[100:] == ['1001', '1002', '1003']          # o 1 só fica com o que o 12 não usou
+    assert plano.prefixos['12'].sem_ramal == 2 and plano.sem_ramal == 2
+    assert plano.resumo_texto() == "Prefixo 12: 100 usuários para 98 ramais livres (2 sem ramal)"
+    assert alocador.esgotados == {'12'}
+
+def test_plano_do_alocador_acumula_os_blocos():
+    alocador = AlocadorRamais()
+    alocador.alocar_pedidos(_pedidos(('123', 6)))
+    alocador.alocar_pedidos(_pedidos(('123', 6)))
+
+    capacidade = alocador.plano.prefixos['123']
+    assert (capacidade.demanda, capacidade.livres, capacidade.sem_ramal) == (12, 9, 3)
+    assert alocador.plano.resumo_texto() == "Prefixo 123: 12 usuários para 9 ramais livres (3 sem ramal)"
+
+def test_excedentes_vao_para_a_faixa_reserva(monkeypatch):
+    monkeypatch.setenv("RAMAIS_RESERVA", "9000-9004")
+    alocador = AlocadorRamais({'9001'}, reserva=reserva_configurada())
+    pedidos = _pedidos(('123', 15))
+    plano = alocador.alocar_pedidos(pedidos)
+
+    ramais = [usuario['extension_number'] for usuario, _ in pedidos]
+    assert ramais == [f"123{n}" for n in range(1, 10)] + ['9000', '9002', '9003', '9004', '', '']
+    capacidade = plano.prefixos['123']
+    assert (capacidade.na_reserva, capacidade.sem_ramal) == (4, 2)
+    assert plano.resumo_texto() == "Prefixo 123: 15 usuários para 9 ramais livres (4 na faixa reserva, 2 sem ramal)"
+    # alocar (um usuário) também usa a reserva quando o prefixo esgotou
+    alocador.liberar('9003')
+    assert alocador.alocar('123') == '9003'
+
+def test_sem_faixa_reserva_configurada(monkeypatch):
+    monkeypatch.delenv("RAMAIS_RESERVA", raising=False)
+    assert reserva_configurada() is None
+    alocador = AlocadorRamais(reserva=reserva_configurada())
+    plano = alocador.alocar_pedidos(_pedidos(('123', 10)))
+    assert (plano.prefixos['123'].na_reserva, plano.prefixos['123'].sem_ramal) == (0, 1)
+
+@pytest.mark.parametrize('texto', ['9000', '9-1', 'a-b', '9000-10000'])
+def test_faixa_reserva_invalida(texto):
+    with pytest.raises(ValueError):
+        faixa_reserva(texto)
+
+def test_alocar_bloco_igual_a_alocar_um_por_um():
+    existentes = {f"3{n:03d}" for n in range(1, 1000, 3)} | {'3400', '3401'}
+    um_por_um, em_bloco = AlocadorRamais(set(existentes)), AlocadorRamais(set(existentes))
+    em_bloco.livres('34')  # bitmap do prefixo aninhado já criado: também precisa ser atualizado
+    esperado = [um_por_um.alocar('3') for _ in range(500)]
+
+    assert em_bloco.alocar_bloco('3', 500) == esperado
+    assert em_bloco.ramais == um_por_um.ramais
+    assert em_bloco.livres('34') == um_por_um.livres('34') == AlocadorRamais(set(em_bloco.ramais)).livres('34')
+    assert em_bloco.alocar('3') == um_por_um.alocar('3')
+
+@pytest.mark.parametrize('semente', range(5))
+def test_alocar_reservar_liberar_iguais_a_gerar_ramal_unico(semente):
+    sorteio = random.Random(semente)
+    prefixos = ['1', '12', '123', '129', '5', '56', '567', '1234']
+    # Prefixos densos: a maior parte dos ramais de 12xx e 56xx já está ocupada
+    existentes = {f"{n:04d}" for n in range(1200, 1300) if sorteio.random() < 0.9}
+    existentes |= {f"{n:04d}" for n in range(5600, 5700) if sorteio.random() < 0.8}
+    referencia, alocador = set(existentes), AlocadorRamais(set(existentes))
+
+    for _ in range(3000):
+        operacao = sorteio.random()
+        if operacao < 0.15 and referencia:
+            ramal = sorteio.choice(sorted(referencia))
+            referencia.discard(ramal)
+            alocador.liberar(ramal)
+        elif operacao < 0.2:
+            ramal = f"{sorteio.randrange(10000):04d}"
+            referencia.add(ramal)
+            alocador.reservar(ramal)
+        else:
+            prefixo = sorteio.choice(prefixos)
+            esperado = gerar_ramal_unico(prefixo, referencia)
+            try:
+                obtido = alocador.alocar(prefixo)
+            except PrefixoEsgotadoError:
+                obtido = ""
+            assert obtido == esperado
+        assert alocador.ramais == referencia
+
+def test_cursor_volta_ao_ramal_liberado():
+    alocador = AlocadorRamais()
+    assert alocador.alocar_bloco('12', 99) == [f"12{n:02d}" for n in range(1, 100)]
+    with pytest.raises(PrefixoEsgotadoError):
+        alocador.alocar('12')
+    assert alocador.esgotados == {'12'}
+    alocador.liberar('1250')
+    alocador.liberar('1207')
+    assert alocador.esgotados == set() and alocador.livres('12') == 2
+    assert [alocador.alocar('12'), alocador.alocar('12')] == ['1207', '1250']
+    alocador.liberar('1299')
+    assert alocador.alocar_bloco('12', 5) == ['1299']
+    assert alocador.alocar('1') == '1001'  # o prefixo 1 não vê os ramais do 12 como livres
+    alocador.liberar('1230')
+    assert alocador.alocar('1') == '1002' and alocador.alocar('12') == '1230'
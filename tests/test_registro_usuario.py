@@ -0,0 +1,98 @@
+# tests/test_registro_usuario.py
+import copy
+import json
+import pickle
+
+import pytest
+
+from app.logic.registro_usuario import TemplateUsuario
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'status': 'Active', 'extra': {'a': [1]},
+    'roles': [{'name': 'Agent', 'value': 1}, {'name': 'Admin', 'value': 0}],
+    'teams': [{'name': 'A', 'value': 0}, {'name': 'B', 'value': "1"}, {'name': 'A', 'value': 0}],
+}
+
+
+def test_registro_novo_igual_ao_template():
+    registro = TemplateUsuario(TEMPLATE).novo_registro()
+    assert registro.para_dict() == TEMPLATE and dict(registro) == TEMPLATE
+    assert list(registro) == list(TEMPLATE) and len(registro) == len(TEMPLATE)
+    registro['extra']['a'].append(2)  # cópia: o template não muda
+    assert TEMPLATE['extra'] == {'a': [1]}
+
+def test_contrato_de_mutable_mapping():
+    molde = TemplateUsuario(TEMPLATE)
+    registro = molde.novo_registro()
+    registro.update(email='ana@x.com', novo=1)
+    registro['status'] = 'Active'           # igual ao template: não ocupa espaço no registro
+    del registro['first_name']
+
+    assert registro._campos == {'email': 'ana@x.com', 'first_name': registro._campos['first_name'], 'novo': 1}
+    assert 'first_name' not in registro and 'novo' in registro and 'x' not in registro
+    assert list(registro) == ['email', 'status', 'extra', 'roles', 'teams', 'novo']
+    assert registro.get('first_name', 'padrão') == 'padrão' and registro.pop('novo') == 1
+    with pytest.raises(KeyError):
+        registro['first_name']
+    with pytest.raises(KeyError):
+        del registro['first_name']
+    registro['first_name'] = 'Ana'
+    assert list(registro)[:2] == ['email', 'first_name']
+    recriado = molde.registro_de_dict(registro.para_dict())
+    assert list(recriado.items())[:3] == list(registro.items())[:3] and recriado.ativos('teams') == registro.ativos('teams')
+
+def test_definir_ativos_e_itens():
+    registro = TemplateUsuario(TEMPLATE).novo_registro()
+    assert registro.ativos('teams') == ['B'] and registro.ativos('roles') == ['Agent']
+    registro.definir_ativos('teams', {'A'})
+    assert registro.ativos('teams') == ['A', 'A']
+    assert [item['value'] for item in registro['teams']] == [1, 0, 1]
+    registro.definir_itens('roles', {'Admin': True})
+    assert registro.ativos('roles') == ['Agent', 'Admin']
+    registro['teams'] = [{'name': 'B', 'value': 1}]
+    assert registro.ativos('teams') == ['B'] and registro.bits_ativos('teams') == 0b010
+    registro.definir_ativos('inexistente', {'A'})  # grupo fora do template: ignorado
+
+def test_alterar_value_de_um_item_altera_o_registro():
+    registro = TemplateUsuario(TEMPLATE).novo_registro()
+    registro['teams'][0]['value'] = 1
+    registro['teams'][1]['value'] = 0
+    registro['roles'][1].update(value="1")
+
+    assert registro.ativos('teams') == ['A'] and registro.ativos('roles') == ['Agent', 'Admin']
+    assert registro.para_dict()['teams'] == [{'name': 'A', 'value': 1}, {'name': 'B', 'value': 0}, {'name': 'A', 'value': 0}]
+
+@pytest.mark.parametrize('alterar', [
+    lambda times: times.append({'name': 'C', 'value': 1}),
+    lambda times: times.pop(),
+    lambda times: times.__setitem__(0, {'name': 'A', 'value': 1}),
+    lambda times: times[0].__setitem__('name', 'C'),
+    lambda times: times[0].pop('value'),
+])
+def test_alteracao_que_se_perderia_levanta_erro(alterar):
+    registro = TemplateUsuario(TEMPLATE).novo_registro()
+    with pytest.raises(TypeError):
+        alterar(registro['teams'])
+    assert registro.para_dict() == TEMPLATE
+
+def test_para_dict_e_copias_sao_desligadas_do_registro():
+    registro = TemplateUsuario(TEMPLATE).novo_registro()
+    dados = registro.para_dict()
+    dados['teams'][0]['value'] = 1
+    dados['teams'].append({'name': 'C'})
+    copia = copy.deepcopy(registro['teams'])
+    copia[0]['value'] = 1
+    assert type(copia) is list and type(copia[0]) is dict
+    assert registro.para_dict() == TEMPLATE
+    assert json.loads(json.dumps(registro['teams'])) == TEMPLATE['teams']
+
+def test_pickle_preserva_chaves_removidas():
+    registro = TemplateUsuario(TEMPLATE).novo_registro()
+    registro['email'] = 'ana@x.com'
+    del registro['status']
+    registro.definir_ativos('teams', {'B'})
+    copia = pickle.loads(pickle.dumps(registro))
+
+    assert 'status' not in copia and copia.para_dict() == registro.para_dict()
+    assert copia.estado() == registro.estado()
+    assert pickle.loads(pickle.dumps(registro['teams'])) == registro.para_dict()['teams']
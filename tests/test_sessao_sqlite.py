@@ -0,0 +1,124 @@
+# tests/test_sessao_sqlite.py
+import sqlite3
+import threading
+
+import pytest
+
+from app.logic import sessao_sqlite
+from app.logic.registro_usuario import TemplateUsuario
+from app.logic.sessao_sqlite import GravadorSessao, SessaoSqlite
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'status': 'Active', 'extension_number': '', 'extra': {'a': [1]},
+    'roles': [{'name': 'Agent', 'value': 1}, {'name': 'Admin', 'value': 0}],
+    'teams': [{'name': 'A', 'value': 0}, {'name': 'B', 'value': "1"}, {'name': 'C', 'value': 0}],
+}
+
+
+def _usuarios(molde):
+    ana = molde.novo_registro()
+    ana.update(email='ana@x.com', first_name='Ána', extension_number='1201', novo_campo=[1, 2])
+    ana.definir_itens('teams', {'A': True, 'B': False})
+    del ana['status']
+    bruno = molde.novo_registro()
+    bruno['email'] = 'bruno@x.com'
+    bruno.definir_ativos('roles', ['Admin'])
+    return [ana, bruno, molde.novo_registro()]
+
+def test_estado_dos_usuarios_ida_e_volta(tmp_path):
+    molde = TemplateUsuario(TEMPLATE)
+    usuarios = _usuarios(molde)
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        sessao.limpar(TEMPLATE, {'A': 1})
+        sessao.gravar_usuarios((posicao, u.estado()) for posicao, u in enumerate(usuarios))
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        lidos = list(sessao.ler_usuarios(molde))
+        assert sessao.template() == TEMPLATE and sessao.team_id_map() == {'A': 1}
+
+    assert [u.para_dict() for u in lidos] == [u.para_dict() for u in usuarios]
+    assert [u.estado() for u in lidos] == [u.estado() for u in usuarios]
+    assert 'status' not in lidos[0] and all(u.molde is molde for u in lidos)
+
+def test_gravar_substitui_e_truncar_apaga_o_fim(tmp_path):
+    molde = TemplateUsuario(TEMPLATE)
+    usuarios = _usuarios(molde)
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        sessao.gravar_usuarios(enumerate(u.estado() for u in usuarios))
+        usuarios[1]['first_name'] = 'Bruno'
+        sessao.gravar_usuarios([(1, usuarios[1].estado())])
+        sessao.truncar(2)
+        assert len(sessao) == 2
+        assert [u['first_name'] for u in sessao.ler_usuarios(molde)] == ['Ána', 'Bruno']
+        assert SessaoSqlite.resumo(str(tmp_path / "outra.db")) is None
+
+def test_definir_ramais_grava_so_as_diferencas(tmp_path):
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        sessao.definir_ramais({'1201', '1202', '1203'})
+        antes = sessao.conexao.total_changes
+        sessao.definir_ramais({'1202', '1203', '1204'})
+        assert sessao.conexao.total_changes - antes == 2
+        assert sessao.ramais() == {'1202', '1203', '1204'}
+
+def test_ler_com_outro_template_converte_os_usuarios(tmp_path):
+    usuarios = _usuarios(TemplateUsuario(TEMPLATE))
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        sessao.limpar(TEMPLATE, {})
+        sessao.gravar_usuarios(enumerate(u.estado() for u in usuarios))
+    novo = dict(TEMPLATE, teams=[{'name': 'C', 'value': 1}, {'name': 'A', 'value': 0}, {'name': 'D', 'value': 0}])
+    molde = TemplateUsuario(novo)
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        lidos = list(sessao.ler_usuarios(molde))
+
+    assert all(u.molde is molde for u in lidos)
+    assert lidos[0].ativos('teams') == ['A']          # A ativo; C veio do template antigo (0)
+    assert lidos[1].ativos('teams') == [] and lidos[1].ativos('roles') == ['Admin']
+    assert lidos[0]['novo_campo'] == [1, 2] and 'status' not in lidos[0]
+
+def test_versao_do_esquema_diferente(tmp_path):
+    caminho = str(tmp_path / "sessao.db")
+    conexao = sqlite3.connect(caminho)
+    conexao.execute("PRAGMA user_version=99")
+    conexao.close()
+    with pytest.raises(ValueError):
+        SessaoSqlite(caminho)
+
+
+class _ConexaoQuebrada:
+    """Conexão cujo rollback também falha (ex.: banco travado ou corrompido)."""
+    def __init__(self, conexao):
+        self._conexao = conexao
+
+    def __getattr__(self, nome):
+        return getattr(self._conexao, nome)
+
+    def rollback(self):
+        raise sqlite3.OperationalError("database is locked")
+
+def _esperar(gravador, segundos=5):
+    """gravador.esperar() com prazo, para o teste falhar em vez de travar."""
+    esperando = threading.Thread(target=gravador.esperar, daemon=True)
+    esperando.start()
+    esperando.join(timeout=segundos)
+    return not esperando.is_alive()
+
+def test_gravador_continua_quando_o_rollback_falha(tmp_path, monkeypatch):
+    class SessaoFalha(SessaoSqlite):
+        def __init__(self, caminho):
+            super().__init__(caminho)
+            self.conexao = _ConexaoQuebrada(self.conexao)
+
+        def truncar(self, quantidade):
+            raise sqlite3.OperationalError("disk I/O error")
+
+    monkeypatch.setattr(sessao_sqlite, 'SessaoSqlite', SessaoFalha)
+    gravador = GravadorSessao(str(tmp_path / "sessao.db"))
+    gravador.truncar(0)
+    gravador.definir_ramais({'1201'})
+    assert _esperar(gravador)
+    assert isinstance(gravador.erro, sqlite3.OperationalError)
+
+    gravador.definir_ramais({'1202'})
+    assert _esperar(gravador)
+    gravador.close()
+    with SessaoSqlite(str(tmp_path / "sessao.db")) as sessao:
+        assert sessao.ramais() == {'1202'}
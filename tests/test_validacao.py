@@ -0,0 +1,103 @@
+# tests/test_validacao.py
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.logic import validacao
+from app.logic.registro_usuario import TemplateUsuario
+from app.logic.validacao import RelatorioValidacao, ValidadorPlanilha
+
+TEMPLATE = {
+    'email': '', 'first_name': '', 'extension_number': '',
+    'roles': [{'name': 'Agent', 'value': 0}, {'name': 'Manager Atendente', 'value': 0}],
+    'teams': [{'name': 'A', 'value': 0}, {'name': 'B', 'value': 0}],
+}
+COLUNAS = ['Email', 'Nome', 'Cargo', 'Time', 'Limite de Chats']
+
+
+def _bloco(linhas, primeira_linha=4, aba='Aba1'):
+    bloco = pd.DataFrame(linhas, columns=COLUNAS, index=pd.RangeIndex(primeira_linha, primeira_linha + len(linhas)),
+                         dtype=object)
+    bloco.attrs['aba'] = aba
+    return bloco
+
+def _problemas(relatorio):
+    return [(p.aba, p.linha, p.campo, p.descartada) for p in relatorio.problemas]
+
+
+@pytest.mark.parametrize('email, valido', [
+    ('ana@x.com', True), (' Ana.Silva+1@empresa.com.br ', True), ('ana@x.c', False), ('ana@x', False),
+    ('ana x@x.com', False), ('ana@@x.com', False), ('a;b@x.com', False), ('@x.com', False),
+])
+def test_formato_do_email(email, valido):
+    validador = ValidadorPlanilha(TemplateUsuario(TEMPLATE))
+    assert len(validador.validar(_bloco([(email, 'Ana', 'Atendente', 'A', 1)]))) == int(valido)
+
+def test_limite_de_chats_convertido_com_to_numeric():
+    validador = ValidadorPlanilha(TemplateUsuario(TEMPLATE))
+    limites = [3, '4', ' 5.0 ', 1e20, None, '', 'abc', '3 chats', 'inf']
+    bloco = _bloco([(f'u{i}@x.com', 'U', 'Atendente', 'A', limite) for i, limite in enumerate(limites)])
+    validos = validador.validar(bloco)
+
+    assert validos.index.tolist() == [4, 5, 6, 7, 8, 9]
+    assert [(p.linha, p.campo, p.descartada) for p in validador.relatorio.problemas] == [
+        (10, 'limite de chats', True), (11, 'limite de chats', True), (12, 'limite de chats', True)]
+    assert "'3 chats'" in validador.relatorio.problemas[1].mensagem
+
+def test_emails_repetidos_no_bloco_e_entre_blocos():
+    validador = ValidadorPlanilha(TemplateUsuario(TEMPLATE))
+    primeiro = _bloco([('ana@x.com', 'Ana', 'Atendente', 'A', 1), (' ANA@x.com', 'Ana', 'Atendente', 'A', 1),
+                       ('bia@x.com', 'Bia', 'Atendente', 'A', 'x'), ('bia@x.com', 'Bia', 'Atendente', 'A', 1)])
+    segundo = _bloco([('caio@x.com', 'Caio', 'Atendente', 'A', 1), ('Ana@X.com', 'Ana', 'Atendente', 'A', 1)],
+                     primeira_linha=20, aba='Aba2')
+
+    assert validador.validar(primeiro).index.tolist() == [4, 7]   # a linha descartada não "ocupa" o email
+    assert validador.validar(segundo).index.tolist() == [20]
+    repetidos = [p for p in validador.relatorio.problemas if p.mensagem.startswith("Email repetido")]
+    assert [(p.aba, p.linha) for p in repetidos] == [('Aba1', 5), ('Aba2', 21)]
+    assert repetidos[0].mensagem == "Email repetido (já aparece na linha 4 da aba 'Aba1')."
+    assert repetidos[1].mensagem == "Email repetido (já aparece na linha 4 da aba 'Aba1')."
+    assert (validador.relatorio.linhas, validador.relatorio.descartadas) == (6, 3)
+
+def test_cargo_e_time_desconhecidos_sao_avisos():
+    validador = ValidadorPlanilha(TemplateUsuario(TEMPLATE))
+    bloco = _bloco([('ana@x.com', 'Ana', ' Gerente ', 'A', 1), ('bia@x.com', 'Bia', 'Supervisor', 'Z', 1),
+                    ('caio@x.com', 'Caio', None, None, 1), ('', 'Sem', 'Gerente', 'Z', 1)])
+
+    assert len(validador.validar(bloco)) == 3
+    assert _problemas(validador.relatorio) == [('Aba1', 4, 'cargo', False), ('Aba1', 5, 'time', False),
+                                               ('Aba1', 7, 'email', True)]
+    assert validador.relatorio.problemas[0].mensagem.startswith("Cargo 'Gerente' desconhecido (esperado: Supervisor ou Atendente)")
+    assert validador.relatorio.avisos == 2
+
+def test_aceitar_usuarios_entre_arquivos():
+    molde = TemplateUsuario(TEMPLATE)
+    relatorio = RelatorioValidacao()
+    validador = ValidadorPlanilha(molde, relatorio)
+    usuarios = [molde.registro_de_dict(dict(TEMPLATE, email=email)) for email in ('ana@x.com', 'bia@x.com', 'BIA@x.com ')]
+
+    assert validador.aceitar_usuarios(usuarios[:2], 'um.xlsx') == usuarios[:2]
+    assert validador.aceitar_usuarios(usuarios[2:] + [usuarios[0]], 'dois.xlsx') == []
+    assert [(p.aba, p.linha, p.mensagem) for p in relatorio.problemas] == [
+        ('dois.xlsx', None, "Email repetido (já aparece em 'um.xlsx')."),
+        ('dois.xlsx', None, "Email repetido (já aparece em 'um.xlsx').")]
+    assert relatorio.descartadas == 2
+
+def test_colisao_de_hash_nao_descarta_email_diferente(monkeypatch):
+    # Todas as chaves iguais: só a comparação dos textos separa os emails
+    monkeypatch.setattr(validacao, 'chaves_emails', lambda emails: np.zeros(len(emails), dtype=np.uint64))
+    molde = TemplateUsuario(TEMPLATE)
+    validador = ValidadorPlanilha(molde)
+    primeiro = _bloco([('ana@x.com', 'Ana', 'Atendente', 'A', 1), ('bia@x.com', 'Bia', 'Atendente', 'A', 1),
+                       ('ANA@x.com', 'Ana', 'Atendente', 'A', 1)])
+    segundo = _bloco([('caio@x.com', 'Caio', 'Atendente', 'A', 1), ('bia@x.com', 'Bia', 'Atendente', 'A', 1),
+                      ('caio@x.com', 'Caio', 'Atendente', 'A', 1)], primeira_linha=10)
+
+    assert validador.validar(primeiro).index.tolist() == [4, 5]
+    assert validador.validar(segundo).index.tolist() == [10]
+    mensagens = [(p.linha, p.mensagem) for p in validador.relatorio.problemas]
+    assert mensagens == [(6, "Email repetido (já aparece na linha 4 da aba 'Aba1')."),
+                         (11, "Email repetido (já aparece na linha 5 da aba 'Aba1')."),
+                         (12, "Email repetido (já aparece na linha 10 da aba 'Aba1').")]
+    usuarios = [molde.registro_de_dict(dict(TEMPLATE, email=email)) for email in ('dora@x.com', 'caio@x.com')]
+    assert validador.aceitar_usuarios(usuarios, 'outro.xlsx') == usuarios[:1]